@@ -0,0 +1,290 @@
+import math
+import os
+from functools import partial
+from Layout import DEFAULT_LAYOUT
+from MonteCarlo import RunningStats
+from Parallel import processPool, trialResult
+
+class Histogram:
+    """
+    This class counts results in bins of equal width. Results outside the
+    bins are counted separately.
+    Attributes:
+        low, high : float
+            Range covered by the bins
+        width : float
+            Width of each bin
+        counts : List(int)
+            Number of results in each bin
+        underflow, overflow : int
+            Number of results below low and at or above high
+    """
+
+    def __init__(self, low=0, high=3000, numBins=60):
+        self.low = low
+        self.high = high
+        self.width = (high - low) / numBins
+        self.counts = [0] * numBins
+        self.underflow = 0
+        self.overflow = 0
+
+    def add(self, value):
+        if value < self.low:
+            self.underflow += 1
+        elif value >= self.high:
+            self.overflow += 1
+        else:
+            self.counts[int((value - self.low) / self.width)] += 1
+
+    def merge(self, other):
+        if (self.low, self.high, len(self.counts)) != (other.low, other.high, len(other.counts)):
+            raise ValueError("Histograms have different bins")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+
+    def bins(self):
+        #Start of each bin along with its count
+        return [(self.low + number * self.width, count) for number, count in enumerate(self.counts)]
+
+class QuantileSketch:
+    """
+    This class estimates quantiles of positive results to within a relative
+    error, by counting results in buckets whose widths grow geometrically
+    (DDSketch). Sketches of different results are merged by adding their
+    counts, so quantiles of the results of several processes are as
+    accurate as if one sketch had seen them all. If there are more than
+    maxBuckets buckets the lowest are combined, keeping the upper quantiles
+    accurate.
+    Attributes:
+        relativeError : float
+            Most an estimate differs from the true quantile, as a fraction
+            of it
+        gamma : float
+            Ratio of the bounds of each bucket
+        buckets : {int: int}
+            Number of results in each bucket
+        zeroCount : int
+            Number of results at or below 0
+        count : int
+            Number of results added
+        maxBuckets : int
+            Most buckets kept
+    """
+
+    def __init__(self, relativeError=0.01, maxBuckets=2048):
+        self.relativeError = relativeError
+        self.gamma = (1 + relativeError) / (1 - relativeError)
+        self.logGamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zeroCount = 0
+        self.count = 0
+        self.maxBuckets = maxBuckets
+
+    def add(self, value):
+        self.count += 1
+        if value <= 0:
+            self.zeroCount += 1
+            return
+        index = math.ceil(math.log(value) / self.logGamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        if len(self.buckets) > self.maxBuckets:
+            self.collapse()
+
+    def merge(self, other):
+        if self.gamma != other.gamma:
+            raise ValueError("Sketches have different relative errors")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zeroCount += other.zeroCount
+        self.count += other.count
+        if len(self.buckets) > self.maxBuckets:
+            self.collapse()
+
+    def collapse(self):
+        #Moves the lowest buckets into the lowest one kept
+        indexes = sorted(self.buckets)
+        extra = indexes[:len(indexes) - self.maxBuckets + 1]
+        kept = indexes[len(extra)]
+        for index in extra:
+            self.buckets[kept] += self.buckets.pop(index)
+
+    def quantile(self, q):
+        #Estimate of the value with a fraction q of the results below it
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeroCount
+        if seen > rank:
+            return 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2 * self.gamma**index / (self.gamma + 1)
+        return 2 * self.gamma**max(self.buckets) / (self.gamma + 1)
+
+class TimeAggregate:
+    """
+    This class keeps everything reported about the times of many trials in
+    a fixed amount of memory: the mean and variance, the lowest and highest
+    time, a histogram and a quantile sketch. Aggregates of trials run in
+    different processes are merged into one.
+    Attributes:
+        stats : RunningStats
+            Mean and variance of the times of finished trials
+        low, high : int
+            Lowest and highest time, None until a time is added
+        histogram : Histogram
+            Times in bins
+        sketch : QuantileSketch
+            Times for estimating quantiles
+        stopped : int
+            Number of trials that deadlocked or were stopped
+        deadlocked : int
+            Number of the stopped trials that deadlocked
+    """
+
+    def __init__(self, histogramLow=0, histogramHigh=3000, numBins=60, relativeError=0.01):
+        self.stats = RunningStats()
+        self.low = None
+        self.high = None
+        self.histogram = Histogram(histogramLow, histogramHigh, numBins)
+        self.sketch = QuantileSketch(relativeError)
+        self.stopped = 0
+        self.deadlocked = 0
+
+    def add(self, timeSteps, deadlocked=False):
+        #-1 is the time of a trial that didn't finish
+        if timeSteps == -1:
+            self.stopped += 1
+            self.deadlocked += deadlocked
+            return
+        self.stats.add(timeSteps)
+        if self.low is None or timeSteps < self.low:
+            self.low = timeSteps
+        if self.high is None or timeSteps > self.high:
+            self.high = timeSteps
+        self.histogram.add(timeSteps)
+        self.sketch.add(timeSteps)
+
+    def merge(self, other):
+        self.stats.merge(other.stats)
+        if other.low is not None:
+            self.low = other.low if self.low is None else min(self.low, other.low)
+            self.high = other.high if self.high is None else max(self.high, other.high)
+        self.histogram.merge(other.histogram)
+        self.sketch.merge(other.sketch)
+        self.stopped += other.stopped
+        self.deadlocked += other.deadlocked
+
+    def summary(self):
+        count = self.stats.count
+        return {
+            "finished": count,
+            "stopped": self.stopped,
+            "deadlocked": self.deadlocked,
+            "mean": self.stats.mean if count else None,
+            "stdev": self.stats.stdev() if count >= 2 else None,
+            "standardError": self.stats.standardError() if count >= 2 else None,
+            "min": self.low,
+            "max": self.high,
+            "p50": self.sketch.quantile(0.5),
+            "p90": self.sketch.quantile(0.9),
+            "p99": self.sketch.quantile(0.99),
+        }
+
+"""
+    Function that runs some trials and aggregates their times, used by the
+    workers of aggregateSimulationTest().
+    Parameters:
+        Type : String
+            Type of strategy to use
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        seed : int
+            Seed the random number generators of the trials are created from
+        maxTimeSteps : int
+            If given, stop trials after this many time steps
+        layout : CabinLayout
+            Cabin of the plane
+        options : Dictionary
+            Arguments of TimeAggregate
+        trials : range
+            Numbers of the trials to run
+    Returns:
+        TimeAggregate of the trials
+"""
+def aggregateChunk(Type, baggage, percentFast, randomiseBaggage, seed, maxTimeSteps, layout,
+                   options, trials):
+    aggregate = TimeAggregate(**options)
+    for trial in trials:
+        aggregate.add(*trialResult(Type, baggage, percentFast, randomiseBaggage, seed, trial,
+                                   maxTimeSteps, layout))
+    return aggregate
+
+"""
+    Function used to test the speed of a strategy over many trials without
+    storing their times. Each process aggregates its own trials and the
+    aggregates are merged, so memory doesn't grow with the number of trials.
+    Trials are seeded the same way as parallelTimes().
+    Parameters:
+        Type : String
+            Type of strategy to use
+        numTrials : int
+            Number of simulations to conduct
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        seed : int
+            Seed the random number generators of the trials are created from
+        workers : int
+            Number of processes to use, the number of CPUs by default
+        chunkSize : int
+            Number of trials aggregated by a process at a time
+        maxTimeSteps : int
+            If given, stop trials after this many time steps
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+        options :
+            Arguments of TimeAggregate, such as the range of the histogram
+    Returns:
+        TimeAggregate of all the trials
+"""
+def aggregateSimulationTest(Type, numTrials, baggage, percentFast, randomiseBaggage, seed=0,
+                            workers=None, chunkSize=1000, maxTimeSteps=None,
+                            layout=DEFAULT_LAYOUT, **options):
+    run = partial(aggregateChunk, Type, baggage, percentFast, randomiseBaggage, seed,
+                  maxTimeSteps, layout, options)
+    chunks = [range(start, min(start + chunkSize, numTrials))
+              for start in range(0, numTrials, chunkSize)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    total = TimeAggregate(**options)
+    if workers == 1:
+        for chunk in chunks:
+            total.merge(run(chunk))
+    else:
+        with processPool(workers) as executor:
+            for aggregate in executor.map(run, chunks):
+                total.merge(aggregate)
+    summary = total.summary()
+    if total.deadlocked:
+        print(str(total.deadlocked) + " trials deadlocked")
+    if total.stopped > total.deadlocked:
+        print(str(total.stopped - total.deadlocked) + " trials did not finish in "
+              + str(maxTimeSteps) + " time steps")
+    print("Average Time taken for strategy " + Type + " was " + str(summary["mean"]))
+    print("Standard Error in time is " + str(summary["standardError"]))
+    print("Times ranged from " + str(summary["min"]) + " to " + str(summary["max"])
+          + " with P50 " + str(summary["p50"]) + ", P90 " + str(summary["p90"])
+          + " and P99 " + str(summary["p99"]))
+    return total
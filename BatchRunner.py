@@ -0,0 +1,200 @@
+import argparse
+import json
+import os
+import sys
+import tomllib
+from concurrent.futures import as_completed
+from Project import STRATEGIES, simulation, DeadlockError
+from Layout import LAYOUTS
+from Aggregation import TimeAggregate
+from Parallel import processPool, trialRandom
+from Strategies import supportsLayout
+from Sweep import sweepGrid
+
+#Settings of a job spec that aren't given, see loadJob()
+DEFAULT_JOB = {
+    "strategies": None,
+    "baggage": [0],
+    "percentFast": [1],
+    "randomiseBaggage": [True],
+    "layouts": ["737"],
+    "trials": 100,
+    "seed": 0,
+    "workers": None,
+    "maxTimeSteps": 5000,
+    "chunkSize": 50,
+    "records": "both",
+}
+
+"""
+    Function that reads a job spec from a JSON or TOML file, going by its
+    extension, and fills in the settings not given. A job runs every
+    combination of strategies, baggage, percentFast, randomiseBaggage and
+    layouts for the same trials. If no strategies are given every strategy
+    is run, each only with the layouts it can be used with.
+    Parameters:
+        path : String
+            Path of the job spec
+    Returns:
+        Dictionary of the settings of the job
+"""
+def loadJob(path):
+    if path.endswith(".toml"):
+        with open(path, "rb") as file:
+            spec = tomllib.load(file)
+    else:
+        with open(path) as file:
+            spec = json.load(file)
+    unknown = set(spec) - set(DEFAULT_JOB)
+    if unknown:
+        raise ValueError("Unknown job settings " + ", ".join(sorted(unknown)))
+    job = dict(DEFAULT_JOB, **spec)
+    for name in job["layouts"]:
+        if name not in LAYOUTS:
+            raise ValueError("Invalid layout " + str(name))
+    if job["strategies"] is None:
+        #Every strategy that can be used with any of the layouts, runJob()
+        #skips the layouts each one can't be used with
+        job["strategies"] = [Type for Type in STRATEGIES
+                             if any(supportsLayout(Type, LAYOUTS[name]) for name in job["layouts"])]
+    else:
+        for Type in job["strategies"]:
+            if Type not in STRATEGIES:
+                raise ValueError("Invalid strategy " + str(Type))
+            for name in job["layouts"]:
+                if not supportsLayout(Type, LAYOUTS[name]):
+                    raise ValueError("Strategy " + Type + " can't be used with layout " + name)
+    if job["records"] not in ("trials", "summaries", "both"):
+        raise ValueError("records must be trials, summaries or both")
+    return job
+
+"""
+    Function that runs some of the trials of a configuration, used by the
+    workers of runJob(). A deadlocked trial is recorded with its error.
+    Parameters:
+        config : (String, int, float, Bool, String)
+            Type, baggage, percentFast, randomiseBaggage and layout name
+        trials : List(int)
+            Numbers of the trials to run
+        seed : int
+            Seed the random number generators of the trials are created from
+        maxTimeSteps : int
+            If given, stop trials after this many time steps
+    Returns:
+        List of the result of each trial
+"""
+def runChunk(config, trials, seed, maxTimeSteps):
+    Type, baggage, percentFast, randomiseBaggage, layoutName = config
+    results = []
+    for trial in trials:
+        record = configRecord(config)
+        record.update(type="trial", seed=seed, trial=trial)
+        try:
+            record["timeSteps"] = simulation(Type, baggage, percentFast, randomiseBaggage,
+                                             rng=trialRandom(seed, trial),
+                                             maxTimeSteps=maxTimeSteps,
+                                             layout=LAYOUTS[layoutName])
+        except DeadlockError as error:
+            record["timeSteps"] = -1
+            record["deadlock"] = str(error)
+        results.append(record)
+    return results
+
+"""
+    Function that creates the fields describing a configuration.
+    Parameters:
+        config : (String, int, float, Bool, String)
+            Type, baggage, percentFast, randomiseBaggage and layout name
+    Returns:
+        Dictionary of the fields
+"""
+def configRecord(config):
+    Type, baggage, percentFast, randomiseBaggage, layoutName = config
+    return {"strategy": Type, "baggage": baggage, "percentFast": percentFast,
+            "randomiseBaggage": randomiseBaggage, "layout": layoutName}
+
+"""
+    Function that creates the summary of the trials of a configuration.
+    Parameters:
+        config : (String, int, float, Bool, String)
+            Type, baggage, percentFast, randomiseBaggage and layout name
+        aggregate : TimeAggregate
+            Times of the trials
+        numTrials : int
+            Number of trials run
+    Returns:
+        Dictionary of the summary
+"""
+def summaryRecord(config, aggregate, numTrials):
+    record = configRecord(config)
+    record.update(type="summary", trials=numTrials)
+    record.update(aggregate.summary())
+    return record
+
+"""
+    Function that runs a job, calling write with each result as soon as it
+    is known. Trials are run in chunks across a pool of processes, and the
+    summary of a configuration is written once all its trials are done.
+    Trials are seeded the same way as parallelTimes(), so give the same
+    times as the other tools.
+    Parameters:
+        job : Dictionary
+            Settings of the job, see loadJob()
+        write : Function
+            Called with the dictionary of each result
+"""
+def runJob(job, write):
+    configs = [config + (layoutName,) for layoutName in job["layouts"]
+               for config in sweepGrid(job["strategies"], job["baggage"], job["percentFast"],
+                                       job["randomiseBaggage"])
+               if supportsLayout(config[0], LAYOUTS[layoutName])]
+    numTrials = job["trials"]
+    chunkSize = max(1, job["chunkSize"])
+    chunks = [(config, list(range(start, min(start + chunkSize, numTrials))))
+              for config in configs for start in range(0, numTrials, chunkSize)]
+    aggregates = {config: TimeAggregate() for config in configs}
+    done = {config: 0 for config in configs}
+
+    def collect(config, results):
+        for record in results:
+            aggregates[config].add(record["timeSteps"], "deadlock" in record)
+            if job["records"] != "summaries":
+                write(record)
+        done[config] += len(results)
+        if done[config] == numTrials and job["records"] != "trials":
+            write(summaryRecord(config, aggregates[config], numTrials))
+
+    workers = job["workers"]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 1:
+        for config, trials in chunks:
+            collect(config, runChunk(config, trials, job["seed"], job["maxTimeSteps"]))
+        return
+    with processPool(workers) as executor:
+        futures = {executor.submit(runChunk, config, trials, job["seed"], job["maxTimeSteps"]):
+                   config for config, trials in chunks}
+        for future in as_completed(futures):
+            collect(futures[future], future.result())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run a job spec of boarding simulations, writing one JSON line per result")
+    parser.add_argument("job", help="JSON or TOML job spec")
+    parser.add_argument("--output", help="file to write to instead of stdout")
+    parser.add_argument("--workers", type=int, help="overrides the workers of the job")
+    args = parser.parse_args()
+    job = loadJob(args.job)
+    if args.workers is not None:
+        job["workers"] = args.workers
+    output = open(args.output, "w") if args.output else sys.stdout
+
+    def write(record):
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+
+    try:
+        runJob(job, write)
+    finally:
+        if output is not sys.stdout:
+            output.close()
@@ -0,0 +1,485 @@
+import random
+import time
+import numpy as np
+from Project import assignSeats, emptyPlane, Boarding
+from Layout import DEFAULT_LAYOUT
+from Strategies import strategyGroups
+
+"""
+    Function that runs many simulations of the boarding process at once.
+    Parameters:
+        Type : String
+            Type of strategy to use
+        numTrials : int
+            Number of simulations to conduct
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        maxTimeSteps : int
+            Stop any simulation that hasn't finished after this many time steps
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+        seed : int
+            Seed used to create the passengers, random if not given
+    Returns:
+        Array of the time steps taken for each boarding to complete, -1 for
+        simulations that got stuck or didn't finish
+"""
+def batchSimulation(Type, numTrials, baggage, percentFast, randomiseBaggage,
+                    maxTimeSteps=None, layout=DEFAULT_LAYOUT, seed=None):
+    queues = queueArrays(Type, numTrials, baggage, percentFast, randomiseBaggage,
+                         np.random.default_rng(seed), layout)
+    return BatchBoarding(queues, maxTimeSteps, layout).run()
+
+"""
+    Function that creates the passengers for many simulations at once, with
+    the same distributions as assignSeats().
+    Parameters:
+        Type : String
+            Type of strategy to use
+        numQueues : int
+            Number of simulations to create passengers for
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        rng : Generator
+            NumPy random number generator to use
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+    Returns:
+        Dictionary of arrays of the seatRow, seatColumn, baggage,
+        walkingSpeed and aisle of each passenger, with one row per
+        simulation and one column per passenger in boarding order
+"""
+def queueArrays(Type, numQueues, baggage, percentFast, randomiseBaggage, rng,
+                layout=DEFAULT_LAYOUT):
+    #Every group is shuffled separately in each simulation
+    seats = np.concatenate([rng.permuted(np.tile(np.array(group, dtype=np.int32), (numQueues, 1)), axis=1)
+                            for group in strategyGroups(Type, layout)], axis=1)
+    shape = seats.shape
+    fast = rng.random(shape) < percentFast
+    slow = rng.random(shape) < 0.7
+    walkingSpeed = np.where(fast, 0, np.where(slow, 1, 2)).astype(np.int32)
+    if randomiseBaggage:
+        baggage = rng.integers(0, baggage + 1, shape, dtype=np.int32)
+    else:
+        baggage = np.full(shape, baggage, dtype=np.int32)
+    positions = np.array(layout.seatPositions, dtype=np.int32)
+    aisles = np.array([layout.seatAisle[column] for row, column in layout.seatPositions],
+                      dtype=np.int32)
+    return {
+        "seatRow": positions[seats, 0],
+        "seatColumn": positions[seats, 1],
+        "baggage": baggage,
+        "walkingSpeed": walkingSpeed,
+        "aisle": aisles[seats],
+    }
+
+"""
+    Function that turns lists of passengers into the arrays used by
+    BatchBoarding.
+    Parameters:
+        queues : List(List(Passenger))
+            Passengers of each simulation, in boarding order
+    Returns:
+        Dictionary of arrays in the same form as queueArrays()
+"""
+def passengerArrays(queues):
+    return {
+        "seatRow": np.array([[p.row for p in q] for q in queues], dtype=np.int32),
+        "seatColumn": np.array([[p.column for p in q] for q in queues], dtype=np.int32),
+        "baggage": np.array([[p.baggage for p in q] for q in queues], dtype=np.int32),
+        "walkingSpeed": np.array([[p.walkingSpeed for p in q] for q in queues], dtype=np.int32),
+        "aisle": np.array([[p.aisle for p in q] for q in queues], dtype=np.int32),
+    }
+
+"""
+    Function that times the batch engine against running simulation() one
+    trial at a time on the same passengers.
+    Parameters:
+        Type : String
+            Type of strategy to use
+        numTrials : int
+            Number of simulations to conduct
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        seed : int
+            Seed used to create the passengers
+        maxTimeSteps : int
+            Time steps after which a single simulation is treated as stuck
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+    Returns:
+        Time taken by the batch engine and by the single engine in seconds
+"""
+def benchmarkBatch(Type, numTrials, baggage, percentFast, randomiseBaggage,
+                   seed=0, maxTimeSteps=5000, layout=DEFAULT_LAYOUT):
+    #Both engines change the passengers so each gets its own copy
+    random.seed(seed)
+    queues = [assignSeats(Type, baggage, percentFast, randomiseBaggage, layout=layout)
+              for x in range(numTrials)]
+    start = time.perf_counter()
+    batchTimes = BatchBoarding(queues, maxTimeSteps, layout).run()
+    batchTime = time.perf_counter() - start
+
+    random.seed(seed)
+    queues = [assignSeats(Type, baggage, percentFast, randomiseBaggage, layout=layout)
+              for x in range(numTrials)]
+    start = time.perf_counter()
+    singleTimes = []
+    for queue in queues:
+        boarding = Boarding(queue, layout=layout)
+        boarding.run(maxTimeSteps)
+        singleTimes.append(boarding.timeSteps if boarding.finished() else -1)
+    singleTime = time.perf_counter() - start
+
+    #Stuck simulations are stopped earlier by the batch engine so only
+    #finished ones are compared
+    finished = np.array(singleTimes) != -1
+    mismatches = int(np.sum(batchTimes[finished] != np.array(singleTimes)[finished]))
+    print("Batch engine took " + str(batchTime) + "s for " + str(numTrials) + " trials")
+    print("Single engine took " + str(singleTime) + "s for " + str(numTrials) + " trials")
+    print("Speed up of " + str(singleTime/batchTime) + " with " + str(mismatches) + " mismatches")
+    return batchTime, singleTime
+
+class BatchBoarding:
+    """
+    This class runs many boardings of the plane in lockstep. Each passenger
+    attribute is stored as an array with one row per simulation and one
+    column per passenger in boarding order, and every time step each
+    passenger is moved in all the simulations at once with the same rules
+    as move() and enter().
+    Attributes:
+        seatRow, seatColumn : Array(int)
+            The seat each passenger wishes to reach
+        row, column : Array(int)
+            The current position of each passenger, -1 if not on the plane
+        baggage, walkingSpeed, walkCooldown, aisle : Array(int)
+            Same as the attributes of Passenger
+        waiting, move : Array(Bool)
+            Same as the attributes of Passenger
+        waitingOn, movingFor : Array(int)
+            The passenger that is waited on or moved for, -1 if none
+        plane : Array(int)
+            Layout of each plane at the start of the time step
+        count : Array(int)
+            Number of passengers in each position of each plane
+        first : Array(int)
+            First passenger to board of those in each position, -1 if empty
+        numMoving : Array(int)
+            Number of passengers in each position that are set to move
+        aisleSeats : Array(int)
+            For each row and seat column, the number of passengers in the
+            aisle of that row whose seat is that seat
+        numBoarded, numSeated : Array(int)
+            Number of passengers on the plane and in their seat
+        running : Array(Bool)
+            True for simulations that are still boarding
+        changed : Array(Bool)
+            True for simulations where anything changed this time step
+        active : Array(Bool)
+            For each passenger and simulation, True if the passenger can
+            still act, so seated passengers are skipped
+        times : Array(int)
+            Time steps taken for each boarding, -1 until it has finished
+        timeSteps : int
+            Number of time steps run so far
+        maxTimeSteps : int
+            Stop any simulation that hasn't finished after this many time steps
+        layout : CabinLayout
+            Cabin of the planes
+    """
+
+    def __init__(self, queues, maxTimeSteps=None, layout=DEFAULT_LAYOUT):
+        #Queues are lists of passengers, or arrays from queueArrays()
+        if not isinstance(queues, dict):
+            queues = passengerArrays(queues)
+        self.seatRow = np.array(queues["seatRow"], dtype=np.int32)
+        self.seatColumn = np.array(queues["seatColumn"], dtype=np.int32)
+        self.baggage = np.array(queues["baggage"], dtype=np.int32)
+        self.walkingSpeed = np.array(queues["walkingSpeed"], dtype=np.int32)
+        self.aisle = np.array(queues["aisle"], dtype=np.int32)
+        numSimulations, self.numPassengers = self.seatRow.shape
+        self.layout = layout
+
+        shape = (numSimulations, self.numPassengers)
+        self.row = np.full(shape, -1, dtype=np.int32)
+        self.column = np.full(shape, -1, dtype=np.int32)
+        self.walkCooldown = np.zeros(shape, dtype=np.int32)
+        self.waiting = np.zeros(shape, dtype=bool)
+        self.move = np.zeros(shape, dtype=bool)
+        self.waitingOn = np.full(shape, -1, dtype=np.int32)
+        self.movingFor = np.full(shape, -1, dtype=np.int32)
+
+        empty = np.array(emptyPlane(layout), dtype=np.int8)
+        self.validCells = empty == 0
+        self.plane = np.repeat(empty[np.newaxis], numSimulations, axis=0)
+        self.count = np.zeros(self.plane.shape, dtype=np.int16)
+        self.first = np.full(self.plane.shape, -1, dtype=np.int32)
+        self.numMoving = np.zeros(self.plane.shape, dtype=np.int16)
+        self.aisleSeats = np.zeros(self.plane.shape, dtype=np.int16)
+        #Flat views of the plane arrays so a position is a single index
+        numSimulations, self.numRows, self.numColumns = self.plane.shape
+        self.planeCells = self.plane.reshape(-1)
+        self.countCells = self.count.reshape(-1)
+        self.firstCells = self.first.reshape(-1)
+        self.numMovingCells = self.numMoving.reshape(-1)
+        self.aisleSeatCells = self.aisleSeats.reshape(-1)
+
+        self.numBoarded = np.zeros(numSimulations, dtype=np.int32)
+        self.numSeated = np.zeros(numSimulations, dtype=np.int32)
+        self.running = np.ones(numSimulations, dtype=bool)
+        self.changed = np.zeros(numSimulations, dtype=bool)
+        self.active = np.zeros((self.numPassengers, numSimulations), dtype=bool)
+        self.times = np.full(numSimulations, -1, dtype=np.int64)
+        self.timeSteps = 0
+        self.maxTimeSteps = maxTimeSteps
+
+    def run(self):
+        while self.running.any():
+            self.step()
+        return self.times
+
+    def step(self):
+        sims = np.nonzero(self.running)[0]
+        self.changed[sims] = False
+        self.updateActive(sims)
+        self.enter(sims)
+        for k in range(self.numPassengers):
+            #Passengers can be set active part way through by being flagged
+            activeSims = np.flatnonzero(self.active[k])
+            if activeSims.size:
+                self.movePassengers(activeSims, k)
+        self.timeSteps += 1
+
+        self.plane[sims] = np.where(self.validCells, self.count[sims] > 0, -1)
+        done = sims[self.numSeated[sims] == self.numPassengers]
+        self.times[done] = self.timeSteps
+        self.running[done] = False
+        #Nothing changing means nothing ever will, so the boarding is stuck
+        self.running[sims[~self.changed[sims]]] = False
+        if self.maxTimeSteps is not None and self.timeSteps >= self.maxTimeSteps:
+            self.running[:] = False
+        self.active[:, ~self.running] = False
+
+    def updateActive(self, sims):
+        boarded = np.arange(self.numPassengers) < self.numBoarded[sims, np.newaxis]
+        idle = ((self.row[sims] == self.seatRow[sims]) & (self.column[sims] == self.seatColumn[sims])
+                & ~self.waiting[sims] & ~self.move[sims])
+        self.active[:, sims] = (boarded & ~idle).T
+
+    def enter(self, sims):
+        sims = sims[self.numBoarded[sims] < self.numPassengers]
+        #Passengers enter at the front of the aisle they need
+        aisle = self.aisle[sims, self.numBoarded[sims]]
+        free = self.plane[sims, 0, aisle] == 0
+        sims = sims[free]
+        if sims.size == 0:
+            return
+        aisle = aisle[free]
+        k = self.numBoarded[sims]
+        self.plane[sims, 0, aisle] = 1
+        self.row[sims, k] = 0
+        self.column[sims, k] = aisle
+        self.first[sims, 0, aisle] = np.where(self.count[sims, 0, aisle] == 0, k,
+                                              self.first[sims, 0, aisle])
+        self.count[sims, 0, aisle] += 1
+        self.numBoarded[sims] += 1
+        self.active[k, sims] = True
+        self.changed[sims] = True
+
+    def movePassengers(self, sims, k):
+        row = self.row[sims, k]
+        column = self.column[sims, k]
+        seatRow = self.seatRow[sims, k]
+        seatColumn = self.seatColumn[sims, k]
+        aisle = self.aisle[sims, k]
+        waiting = self.waiting[sims, k]
+        moving = self.move[sims, k]
+        #Work out which rule each simulation follows before moving anyone.
+        #A passenger takes at most one step a time step, so each rule just
+        #picks the direction of that step.
+        dRow = np.zeros(sims.size, dtype=np.int32)
+        dColumn = np.zeros(sims.size, dtype=np.int32)
+        if waiting.any():
+            self.waitingPassengers(sims[waiting], k)
+        movingRule = ~waiting & moving
+        if movingRule.any():
+            dRow[movingRule], dColumn[movingRule] = self.movingPassengers(
+                sims[movingRule], k, row[movingRule], column[movingRule],
+                seatRow[movingRule], seatColumn[movingRule], aisle[movingRule])
+        normalRule = ~waiting & ~moving & ((row != seatRow) | (column != seatColumn))
+        if normalRule.any():
+            dRow[normalRule], dColumn[normalRule] = self.normalPassengers(
+                sims[normalRule], row[normalRule], column[normalRule],
+                seatRow[normalRule], seatColumn[normalRule], aisle[normalRule])
+        walking = (dRow != 0) | (dColumn != 0)
+        if walking.any():
+            self.walk(sims[walking], k, row[walking], column[walking],
+                      dRow[walking], dColumn[walking])
+        if normalRule.any():
+            normalSims = sims[normalRule]
+            flagSims = normalSims[self.row[normalSims, k] == seatRow[normalRule] - 1]
+            if flagSims.size:
+                self.flagRow(flagSims, k)
+
+    def waitingPassengers(self, sims, k):
+        #Once moving passengers are in the aisle move normally
+        other = self.waitingOn[sims, k]
+        released = sims[self.row[sims, other] == self.seatRow[sims, other] + 1]
+        self.waiting[released, k] = False
+        self.changed[released] = True
+
+    def movingPassengers(self, sims, k, row, column, seatRow, seatColumn, aisle):
+        other = self.movingFor[sims, k]
+        out = self.row[sims, other] != self.seatRow[sims, other]
+        back = ~out
+        #Move out of seat
+        dColumn = np.where(out & (column < aisle), 1, np.where(out & (column > aisle), -1, 0))
+        dRow = np.where(out & (column == aisle) & (row <= seatRow + 1), 1, 0)
+        #Move back into seat
+        down = back & (row > seatRow)
+        dRow[down] = -1
+        back &= ~down
+        dColumn[back & (column < seatColumn)] = 1
+        dColumn[back & (column > seatColumn)] = -1
+        stop = back & (column == seatColumn)
+        if stop.any():
+            stopped = sims[stop]
+            self.move[stopped, k] = False
+            self.numMoving[stopped, row[stop], column[stop]] -= 1
+            self.changed[stopped] = True
+        return dRow, dColumn
+
+    def normalPassengers(self, sims, row, column, seatRow, seatColumn, aisle):
+        up = row < seatRow
+        dRow = np.zeros(sims.size, dtype=np.int32)
+        if up.any():
+            #Only move up if waiting or there are no moving passengers
+            upSims = sims[up]
+            upRow = row[up]
+            upAisle = aisle[up]
+            blocked = ((self.numMoving[upSims, upRow + 2, upAisle] > 0)
+                       | (self.numMoving[upSims, upRow + 3, upAisle] > 0))
+            for aisleColumn, columns in self.layout.movingColumns.items():
+                group = upAisle == aisleColumn
+                if not group.any():
+                    continue
+                for otherColumn in columns:
+                    blocked[group] |= self.numMoving[upSims[group], upRow[group] + 1, otherColumn] > 0
+            dRow[up] = (upRow == seatRow[up] - 1) | ~blocked
+        dColumn = np.where(up, 0, np.sign(seatColumn - column))
+        return dRow, dColumn
+
+    def flagRow(self, sims, k):
+        #Flags passengers that have to wait for other passengers to move,
+        #checked in the same order as move()
+        seatColumn = self.seatColumn[sims, k]
+        for column, checks in self.layout.flagChecks.items():
+            group = sims[seatColumn == column]
+            if group.size == 0:
+                continue
+            row = self.seatRow[group, k]
+            aisle = self.layout.seatAisle[column]
+            for check, otherColumn in checks:
+                if check == "any":
+                    found = self.first[group, row, otherColumn] >= 0
+                    flagColumn = otherColumn
+                elif check == "seated":
+                    other = self.first[group, row, otherColumn]
+                    found = ((other >= 0) & (self.seatRow[group, other] == row)
+                             & (self.seatColumn[group, other] == otherColumn))
+                    flagColumn = otherColumn
+                else:
+                    found = self.aisleSeats[group, row, otherColumn] > 0
+                    flagColumn = aisle
+                if found.any():
+                    self.flagPassengers(group[found], k, row[found], flagColumn)
+
+    def flagPassengers(self, sims, k, row, column):
+        self.waiting[sims, k] = True
+        other = self.first[sims, row, column]
+        newlyMoving = ~self.move[sims, other]
+        self.numMoving[sims[newlyMoving], row[newlyMoving], column] += 1
+        self.move[sims, other] = True
+        unset = self.waitingOn[sims, k] < 0
+        self.waitingOn[sims[unset], k] = other[unset]
+        self.movingFor[sims, other] = k
+        self.active[other, sims] = True
+        self.changed[sims] = True
+
+    def walk(self, sims, k, row, column, dRow, dColumn):
+        #Passengers put their baggage away before moving into the seats
+        stowing = (dColumn != 0) & (self.baggage[sims, k] > 0)
+        if stowing.any():
+            self.baggage[sims[stowing], k] -= 1
+            self.changed[sims[stowing]] = True
+        #Only move if the position to move to is free
+        oldCell = self.cell(sims, row, column)
+        newCell = oldCell + dRow * self.numColumns + dColumn
+        free = ~stowing & (self.planeCells[newCell] == 0)
+        sims = sims[free]
+        self.changed[sims] = True
+        ready = self.walkCooldown[sims, k] == 0
+        self.walkCooldown[sims[~ready], k] -= 1
+        free[free] = ready
+        sims = sims[ready]
+        self.walkCooldown[sims, k] = self.walkingSpeed[sims, k]
+        self.relocate(sims, k, oldCell[free], newCell[free], row[free] + dRow[free], column[free] + dColumn[free])
+
+    def cell(self, sims, row, column):
+        #Index of positions in the flattened plane arrays
+        return (sims * self.numRows + row) * self.numColumns + column
+
+    def relocate(self, sims, k, oldCell, newCell, newRow, newColumn):
+        if sims.size == 0:
+            return
+        oldRow = self.row[sims, k]
+        oldColumn = self.column[sims, k]
+        self.row[sims, k] = newRow
+        self.column[sims, k] = newColumn
+        seatRow = self.seatRow[sims, k]
+        seatColumn = self.seatColumn[sims, k]
+        self.numSeated[sims] += (((newRow == seatRow) & (newColumn == seatColumn)).astype(np.int32)
+                                 - ((oldRow == seatRow) & (oldColumn == seatColumn)))
+
+        moving = self.move[sims, k]
+        if moving.any():
+            self.numMovingCells[oldCell[moving]] -= 1
+            self.numMovingCells[newCell[moving]] += 1
+        seatCell = self.cell(sims, seatRow, seatColumn)
+        aisle = self.aisle[sims, k]
+        wasInAisle = (oldColumn == aisle) & (oldRow == seatRow)
+        if wasInAisle.any():
+            self.aisleSeatCells[seatCell[wasInAisle]] -= 1
+        nowInAisle = (newColumn == aisle) & (newRow == seatRow)
+        if nowInAisle.any():
+            self.aisleSeatCells[seatCell[nowInAisle]] += 1
+
+        count = self.countCells
+        first = self.firstCells
+        first[newCell] = np.where(count[newCell] == 0, k, np.minimum(first[newCell], k))
+        count[newCell] += 1
+        count[oldCell] -= 1
+        remaining = count[oldCell]
+        first[oldCell[remaining == 0]] = -1
+        #If the first passenger left a shared position find who is now first
+        rescan = (remaining > 0) & (first[oldCell] == k)
+        if rescan.any():
+            rescanSims = sims[rescan]
+            there = ((self.row[rescanSims] == oldRow[rescan, np.newaxis])
+                     & (self.column[rescanSims] == oldColumn[rescan, np.newaxis]))
+            first[oldCell[rescan]] = there.argmax(axis=1)
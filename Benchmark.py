@@ -0,0 +1,392 @@
+import argparse
+import json
+import math
+import platform
+import time
+import tracemalloc
+from Project import assignSeats, simulation, Boarding, DeadlockError
+from Layout import CabinLayout, DEFAULT_LAYOUT, LAYOUTS
+from Parallel import trialRandom
+from Strategies import strategiesFor
+
+#Engines that can be benchmarked, the arguments passed to simulation() for each
+ENGINES = {
+    "incremental": {"incremental": True},
+    "reference": {"incremental": False},
+}
+
+"""
+    Function that creates single aisle cabins of increasing length, so the
+    number of passengers doubles from one to the next.
+    Parameters:
+        rows : int
+            Number of rows of the smallest cabin
+        sizes : int
+            Number of cabins
+    Returns:
+        List of cabin layouts
+"""
+def scalingLayouts(rows=27, sizes=4):
+    return [CabinLayout(rows=rows * 2**x) for x in range(sizes)]
+
+"""
+    Function that times boarding cabins of different sizes, to show how the
+    run time grows with the number of passengers.
+    Boarding takes more time steps with more passengers, so as well as the
+    time per run the time per time step is fitted as passengers^exponent,
+    which is close to 1 if the engine scales linearly. Only trials that
+    finish are timed.
+    Parameters:
+        Type : String
+            Type of strategy to use
+        numTrials : int
+            Number of simulations to run for each cabin
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        layouts : List(CabinLayout)
+            Cabins to time, the common planes in Layout.LAYOUTS by default
+        seed : int
+            Seed the random number generators of the trials are created from
+        maxTimeSteps : int
+            If given, stop trials after this many time steps
+    Returns:
+        List with a dictionary of the results for each cabin
+"""
+def benchmarkScaling(Type, numTrials, baggage, percentFast, randomiseBaggage,
+                     layouts=None, seed=0, maxTimeSteps=None):
+    if layouts is None:
+        layouts = sorted(LAYOUTS.values(), key=lambda layout: layout.numSeats)
+    results = []
+    for layout in layouts:
+        elapsed = 0
+        timeSteps = 0
+        finished = 0
+        for trial in range(numTrials):
+            Passengers = assignSeats(Type, baggage, percentFast, randomiseBaggage,
+                                     trialRandom(seed, trial), layout)
+            start = time.perf_counter()
+            boarding = Boarding(Passengers, layout=layout)
+            boarding.run(maxTimeSteps)
+            if boarding.finished():
+                elapsed += time.perf_counter() - start
+                timeSteps += boarding.timeSteps
+                finished += 1
+        if finished == 0:
+            print(str(layout.numSeats) + " passengers: no trials finished")
+            continue
+        result = {
+            "layout": repr(layout),
+            "passengers": layout.numSeats,
+            "finished": finished,
+            "secondsPerRun": elapsed / finished,
+            "timeStepsPerRun": timeSteps / finished,
+            "secondsPerStep": elapsed / timeSteps,
+        }
+        results.append(result)
+        print(str(layout.numSeats) + " passengers: " + str(result["secondsPerRun"]) + "s per run, "
+              + str(result["timeStepsPerRun"]) + " time steps, "
+              + str(1e6 * result["secondsPerStep"]) + "us per time step, "
+              + str(finished) + "/" + str(numTrials) + " finished")
+    if len(results) > 1:
+        print("Time per run grows as passengers^" + str(scalingExponent(results, "secondsPerRun")))
+        print("Time per time step grows as passengers^" + str(scalingExponent(results, "secondsPerStep")))
+    return results
+
+"""
+    Function that fits a time from benchmarkScaling() as passengers^exponent
+    by least squares on the logarithms.
+    Parameters:
+        results : List(dict)
+            Results from benchmarkScaling()
+        key : String
+            The time to fit
+    Returns:
+        The fitted exponent
+"""
+def scalingExponent(results, key):
+    x = [math.log(result["passengers"]) for result in results]
+    y = [math.log(result[key]) for result in results]
+    meanX = sum(x) / len(x)
+    meanY = sum(y) / len(y)
+    return (sum((a - meanX) * (b - meanY) for a, b in zip(x, y))
+            / sum((a - meanX)**2 for a in x))
+
+"""
+    Function that measures the speed of simulation() for every combination
+    of the given strategies, baggage, percentage of fast passengers, cabins
+    and engines.
+    Parameters:
+        numTrials : int
+            Number of simulations to run for each combination
+        strategies : List(String)
+            Strategies to use, all that can be used with each cabin by default
+        baggages : List(int)
+            Amounts of baggage, randomised from 0 to each amount or fixed at
+            it depending on randomiseBaggages
+        percentFasts : List(float)
+            Percentages of passengers that move quickly
+        layouts : List(CabinLayout)
+            Cabins to use, the 737 by default
+        engines : List(String)
+            Engines in ENGINES to use
+        seed : int
+            Seed the random number generators of the trials are created from
+        maxTimeSteps : int
+            Stop trials after this many time steps
+        randomiseBaggages : List(Bool)
+            Whether to randomise the baggage, randomised by default
+    Returns:
+        List with a dictionary of the results for each combination
+"""
+def benchmarkSuite(numTrials=5, strategies=None, baggages=(0, 3), percentFasts=(0.3, 1),
+                   layouts=None, engines=("incremental",), seed=0, maxTimeSteps=5000,
+                   randomiseBaggages=(True,)):
+    if layouts is None:
+        layouts = [DEFAULT_LAYOUT]
+    results = []
+    for engine in engines:
+        for layout in layouts:
+            for Type in strategiesFor(layout) if strategies is None else strategies:
+                for baggage in baggages:
+                    for percentFast in percentFasts:
+                        for randomiseBaggage in randomiseBaggages:
+                            result = benchmarkCase(Type, numTrials, baggage, percentFast,
+                                                   randomiseBaggage, layout, engine, seed,
+                                                   maxTimeSteps)
+                            print(benchmarkKey(result) + ": " + str(result["boardingsPerSecond"])
+                                  + " boardings/s, " + str(result["ticksPerSecond"])
+                                  + " ticks/s, " + str(result["peakMemory"]) + " bytes")
+                            results.append(result)
+    return results
+
+"""
+    Function that measures the speed of simulation() for one combination of
+    settings. The peak memory is measured with tracemalloc on a separate run
+    so it doesn't slow down the timed ones.
+    Parameters:
+        Type : String
+            Type of strategy to use
+        numTrials : int
+            Number of simulations to run
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        layout : CabinLayout
+            Cabin of the plane
+        engine : String
+            Engine in ENGINES to use
+        seed : int
+            Seed the random number generators of the trials are created from
+        maxTimeSteps : int
+            Stop trials after this many time steps
+    Returns:
+        Dictionary of the results
+"""
+def benchmarkCase(Type, numTrials, baggage, percentFast, randomiseBaggage, layout, engine, seed,
+                  maxTimeSteps):
+    elapsed = 0
+    finishedTime = 0
+    timeSteps = 0
+    finished = 0
+    for trial in range(numTrials):
+        start = time.perf_counter()
+        try:
+            result = simulation(Type, baggage, percentFast, randomiseBaggage,
+                                rng=trialRandom(seed, trial), maxTimeSteps=maxTimeSteps,
+                                layout=layout, **ENGINES[engine])
+        except DeadlockError:
+            result = -1
+        trialTime = time.perf_counter() - start
+        elapsed += trialTime
+        #Stuck trials can skip straight to maxTimeSteps so only finished
+        #trials count towards the ticks and boardings per second
+        if result != -1:
+            finishedTime += trialTime
+            timeSteps += result
+            finished += 1
+
+    tracemalloc.start()
+    try:
+        simulation(Type, baggage, percentFast, randomiseBaggage, rng=trialRandom(seed, 0),
+                   maxTimeSteps=maxTimeSteps, layout=layout, **ENGINES[engine])
+    except DeadlockError:
+        pass
+    peakMemory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "strategy": Type,
+        "baggage": baggage,
+        "percentFast": percentFast,
+        "randomiseBaggage": randomiseBaggage,
+        "layout": repr(layout),
+        "engine": engine,
+        "trials": numTrials,
+        "finished": finished,
+        "seconds": elapsed,
+        "ticksPerSecond": timeSteps / finishedTime if finished else 0,
+        "boardingsPerSecond": finished / finishedTime if finished else 0,
+        "peakMemory": peakMemory,
+    }
+
+"""
+    Function that gives the settings of a benchmark result as a string, used
+    to match results with a baseline.
+    Parameters:
+        result : dict
+            Result from benchmarkSuite()
+    Returns:
+        String of the settings
+"""
+def benchmarkKey(result):
+    #Results saved before randomiseBaggage was recorded always randomised it
+    return (result["engine"] + " " + result["layout"] + " " + result["strategy"]
+            + " baggage=" + str(result["baggage"]) + " percentFast=" + str(result["percentFast"])
+            + " randomiseBaggage=" + str(result.get("randomiseBaggage", True)))
+
+"""
+    Function that saves benchmark results as JSON.
+    Parameters:
+        results : List(dict)
+            Results from benchmarkSuite()
+        path : String
+            File to save to
+"""
+def saveBenchmarks(results, path):
+    with open(path, "w") as file:
+        json.dump(dict(benchmarkEnvironment(), results=results), file, indent=1)
+
+"""
+    Function that describes where benchmarks are run. Results are only
+    comparable with a baseline from the same environment.
+    Returns:
+        Dictionary of the Python version and machine
+"""
+def benchmarkEnvironment():
+    return {"python": platform.python_version(), "machine": platform.machine()}
+
+"""
+    Function that loads benchmark results saved by saveBenchmarks().
+    Parameters:
+        path : String
+            File to load
+    Returns:
+        List with a dictionary of the results for each combination
+"""
+def loadBenchmarks(path):
+    return loadBenchmarkFile(path)[1]
+
+"""
+    Function that loads benchmark results saved by saveBenchmarks() along
+    with the environment they were run in.
+    Parameters:
+        path : String
+            File to load
+    Returns:
+        Dictionary of the environment, see benchmarkEnvironment(), and the
+        list of results
+"""
+def loadBenchmarkFile(path):
+    with open(path) as file:
+        data = json.load(file)
+    return {key: data.get(key) for key in benchmarkEnvironment()}, data["results"]
+
+"""
+    Function that finds how the environment of a baseline differs from the
+    current one.
+    Parameters:
+        environment : Dictionary
+            Environment of the baseline, see benchmarkEnvironment()
+    Returns:
+        List of the differences, empty if it is the same
+"""
+def environmentDifferences(environment):
+    current = benchmarkEnvironment()
+    return [key + " " + str(environment.get(key)) + " (now " + str(value) + ")"
+            for key, value in current.items() if environment.get(key) != value]
+
+"""
+    Function that compares benchmark results with a baseline and prints any
+    that have become slower, in boardings or time steps per second, or use
+    more memory. Results are only compared if the baseline has the same
+    settings.
+    Parameters:
+        results : List(dict)
+            Results from benchmarkSuite()
+        baseline : List(dict)
+            Earlier results to compare with
+        tolerance : float
+            Fraction results can be worse by before counting as a regression
+        environment : Dictionary
+            If given, the environment the baseline was run in, see
+            benchmarkEnvironment(). A warning is printed if it differs from
+            the current one, as the results aren't comparable.
+    Returns:
+        List of the keys of the results that regressed
+"""
+def compareBenchmarks(results, baseline, tolerance=0.2, environment=None):
+    if environment is not None:
+        differences = environmentDifferences(environment)
+        if differences:
+            print("Warning: baseline was run with a different " + ", ".join(differences))
+    baseline = {benchmarkKey(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        key = benchmarkKey(result)
+        if key not in baseline:
+            continue
+        old = baseline[key]
+        #A baseline where no trial finished has no speed to fall below
+        speed = (result["boardingsPerSecond"] / old["boardingsPerSecond"]
+                 if old["boardingsPerSecond"] else 1.0)
+        ticks = (result["ticksPerSecond"] / old["ticksPerSecond"]
+                 if old["ticksPerSecond"] else 1.0)
+        memory = result["peakMemory"] / max(old["peakMemory"], 1)
+        if speed < 1 - tolerance or ticks < 1 - tolerance or memory > 1 + tolerance:
+            print("Regression in " + key + ": " + str(speed) + "x speed, "
+                  + str(ticks) + "x ticks per second, " + str(memory) + "x memory")
+            regressions.append(key)
+    print(str(len(regressions)) + " regressions out of " + str(len(results)) + " results")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the boarding simulation")
+    parser.add_argument("--trials", type=int, default=5)
+    parser.add_argument("--strategies", nargs="+", default=None)
+    parser.add_argument("--baggage", type=int, nargs="+", default=[0, 3])
+    parser.add_argument("--percent-fast", type=float, nargs="+", default=[0.3, 1])
+    parser.add_argument("--layouts", nargs="+", default=["737"], choices=list(LAYOUTS))
+    parser.add_argument("--engines", nargs="+", default=["incremental"], choices=list(ENGINES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-time-steps", type=int, default=5000)
+    parser.add_argument("--output", help="save the results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--baggage-modes", nargs="+", default=["random"],
+                        choices=["random", "fixed"],
+                        help="randomise each passenger's baggage, give everyone the same, or both")
+    parser.add_argument("--ignore-environment", action="store_true",
+                        help="compare with a baseline from another Python version or machine")
+    args = parser.parse_args()
+    if args.baseline:
+        environment, baseline = loadBenchmarkFile(args.baseline)
+        differences = environmentDifferences(environment)
+        if differences and not args.ignore_environment:
+            raise SystemExit("Baseline was run with a different " + ", ".join(differences)
+                             + ", use --ignore-environment to compare anyway")
+    results = benchmarkSuite(args.trials, args.strategies, args.baggage, args.percent_fast,
+                             [LAYOUTS[name] for name in args.layouts], args.engines,
+                             args.seed, args.max_time_steps,
+                             [mode == "random" for mode in args.baggage_modes])
+    if args.output:
+        saveBenchmarks(results, args.output)
+    if args.baseline and compareBenchmarks(results, baseline, args.tolerance, environment):
+        raise SystemExit(1)
@@ -1,38 +1,260 @@
-from tkinter import *
-from Project import *
+import argparse
+import math
+import os
+import time
+from tkinter import Tk, Canvas, Label, PhotoImage, TclError
+from Project import assignSeats, Boarding
+from Layout import LAYOUTS
+from Trace import TraceReader
 
-root = Tk()
+#Image drawn for each passenger, found next to this file
+IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "man.png")
 
-root.title("Boarding")
+class LiveSource:
+    """
+    This class plays back a boarding as it is simulated, running one time
+    step of it at a time.
+    Attributes:
+        boarding : Boarding
+            Boarding being simulated
+        Passengers : List(Passenger)
+            Every passenger in boarding order
+        seats : List((int, int))
+            Seat of each passenger
+        maxTimeSteps : int
+            If given, stop after this many time steps
+    """
 
-canvas = Canvas(root, width=1350, height=950, bg='sky blue')
-canvas.pack()
+    def __init__(self, boarding, maxTimeSteps=None):
+        self.boarding = boarding
+        self.Passengers = list(boarding.OnBoardPassengers) + list(boarding.Passengers)
+        self.seats = [(passenger.row, passenger.column) for passenger in self.Passengers]
+        self.maxTimeSteps = maxTimeSteps
 
-for i in range(8):
-    x = 550 + (i * 30)
-    canvas.create_line(x, 932, x, -850, width=4)
+    def timeStep(self):
+        return self.boarding.timeSteps
 
-for i in range(32):
-    y = - (i * 30)
-    canvas.create_line(760, -y, 550, -y, width=4)
+    def advance(self):
+        #Runs the next time step, returns False once boarding has stopped
+        boarding = self.boarding
+        if boarding.finished():
+            return False
+        if self.maxTimeSteps is not None and boarding.timeSteps >= self.maxTimeSteps:
+            return False
+        return boarding.advance(self.maxTimeSteps)
 
-img = PhotoImage(file='/home/jordan/Documents/PersonalStuff/Airplane-Boarding-Simulation/man.png')
-img = img.subsample(22, 22)
+    def positions(self):
+        return [(passenger.currRow, passenger.currColumn) for passenger in self.Passengers]
 
-#30 spaces down for moving down a row
-canvas.create_image(
-    648,
-    2, 
-    anchor=NW, 
-    image=img
-    )    
-canvas.create_image(
-    648,
-    32, 
-    anchor=NW, 
-    image=img
-    )     
+class TraceSource:
+    """
+    This class plays back a boarding recorded with Trace.py.
+    Attributes:
+        reader : TraceReader
+            Trace being played
+        seats : List((int, int))
+            Seat of each passenger
+        frames : Generator
+            Time steps and positions replayed from the trace
+        currentTimeStep : int
+            Time step of the last record played
+        currentPositions : List([int, int])
+            Position of each passenger after the last record played
+    """
 
-#root.mainloop()
+    def __init__(self, reader):
+        self.reader = reader
+        self.seats = reader.seats
+        self.frames = reader.replay()
+        self.currentTimeStep = 0
+        self.currentPositions = [[-1, -1] for seat in self.seats]
 
-simulation("Random", 0, 1, False)
\ No newline at end of file
+    def timeStep(self):
+        return self.currentTimeStep
+
+    def advance(self):
+        try:
+            self.currentTimeStep, self.currentPositions = next(self.frames)
+        except StopIteration:
+            return False
+        return True
+
+    def positions(self):
+        return self.currentPositions
+
+class BoardingViewer:
+    """
+    This class animates a boarding on a Tk canvas. The plane is drawn once
+    and each passenger has one canvas item which is moved as they move.
+    Drawing is scheduled with after(), and each frame plays as many time
+    steps as needed to keep up with the speed, only drawing the last, so
+    the window stays responsive however fast the boarding is played.
+    Space pauses, + and - double and halve the speed.
+    Attributes:
+        root : Tk
+            Window
+        canvas : Canvas
+            Canvas the plane is drawn on
+        label : Label
+            Shows the time step and speed
+        source : LiveSource or TraceSource
+            Boarding being played
+        layout : CabinLayout
+            Cabin of the plane
+        cell : int
+            Size in pixels of each position on the plane
+        image : PhotoImage
+            Image of a passenger, None to draw circles
+        items : List(int)
+            Canvas item of each passenger, None until they board
+        drawn : List((int, int))
+            Position each passenger was last drawn at
+        speed : float
+            Time steps played per second
+        frameTime : int
+            Milliseconds between frames
+        playedTo : float
+            Time step the playback has reached, can be between time steps
+        lastFrame : float
+            Time the last frame was drawn
+        paused : Bool
+            True if the playback is paused
+        running : Bool
+            False once the boarding has stopped
+    """
+
+    def __init__(self, root, source, layout, speed=20.0, fps=30, maxHeight=900):
+        self.root = root
+        self.source = source
+        self.layout = layout
+        self.cell = max(6, min(30, (maxHeight - 20) // layout.numRows))
+        self.canvas = Canvas(root, width=layout.numColumns * self.cell + 20,
+                             height=layout.numRows * self.cell + 20, bg="sky blue")
+        self.canvas.pack()
+        self.label = Label(root)
+        self.label.pack()
+        self.image = self.loadImage()
+        self.items = [None] * len(source.seats)
+        self.drawn = [(-1, -1)] * len(source.seats)
+        self.speed = speed
+        self.frameTime = max(1, 1000 // fps)
+        self.playedTo = source.timeStep()
+        self.lastFrame = time.perf_counter()
+        self.paused = False
+        self.running = True
+        self.drawPlane()
+        root.bind("<space>", self.togglePause)
+        root.bind("+", lambda event: self.setSpeed(self.speed * 2))
+        root.bind("=", lambda event: self.setSpeed(self.speed * 2))
+        root.bind("-", lambda event: self.setSpeed(self.speed / 2))
+        self.root.after(self.frameTime, self.frame)
+
+    def loadImage(self):
+        #The image is scaled down to fit in a position, circles are drawn if
+        #it can't be loaded
+        try:
+            image = PhotoImage(file=IMAGE)
+        except TclError:
+            return None
+        factor = max(1, math.ceil(max(image.width(), image.height()) / (self.cell - 2)))
+        return image.subsample(factor, factor)
+
+    def corner(self, row, column):
+        return 10 + column * self.cell, 10 + row * self.cell
+
+    def drawPlane(self):
+        plane = self.layout.emptyPlane()
+        for row in range(self.layout.numRows):
+            for column in range(self.layout.numColumns):
+                if plane[row][column] == -1:
+                    continue
+                x, y = self.corner(row, column)
+                isAisle = column in self.layout.aisleColumns
+                self.canvas.create_rectangle(x, y, x + self.cell, y + self.cell,
+                                             fill="light grey" if isAisle else "white",
+                                             outline="black", width=2)
+
+    def setSpeed(self, speed):
+        self.speed = min(max(speed, 0.25), 100000)
+        self.updateLabel()
+
+    def togglePause(self, event=None):
+        self.paused = not self.paused
+        self.lastFrame = time.perf_counter()
+        self.updateLabel()
+
+    def updateLabel(self):
+        text = "Time step " + str(self.source.timeStep()) + ", " + str(self.speed) + " time steps/s"
+        if self.paused:
+            text += " (paused)"
+        elif not self.running:
+            text += " (stopped)"
+        self.label.config(text=text)
+
+    def frame(self):
+        now = time.perf_counter()
+        if not self.paused and self.running:
+            self.playedTo += (now - self.lastFrame) * self.speed
+            #Play time steps until caught up, giving up on the rest if they
+            #take longer than a frame so drawing isn't held up
+            deadline = now + self.frameTime / 2000
+            while self.source.timeStep() < self.playedTo:
+                if not self.source.advance():
+                    self.running = False
+                    break
+                if time.perf_counter() > deadline:
+                    self.playedTo = self.source.timeStep()
+                    break
+            self.draw()
+            self.updateLabel()
+        self.lastFrame = now
+        self.root.after(self.frameTime, self.frame)
+
+    def draw(self):
+        #Only passengers that moved since the last frame are changed
+        half = self.cell // 2
+        for number, position in enumerate(self.source.positions()):
+            position = tuple(position)
+            if position == self.drawn[number] or position[0] < 0:
+                continue
+            x, y = self.corner(*position)
+            item = self.items[number]
+            if item is None:
+                if self.image is not None:
+                    item = self.canvas.create_image(x + half, y + half, image=self.image)
+                else:
+                    item = self.canvas.create_oval(x + 3, y + 3, x + self.cell - 3,
+                                                   y + self.cell - 3, fill="red")
+                self.items[number] = item
+            elif self.image is not None:
+                self.canvas.coords(item, x + half, y + half)
+            else:
+                self.canvas.coords(item, x + 3, y + 3, x + self.cell - 3, y + self.cell - 3)
+            self.drawn[number] = position
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch the boarding of a plane")
+    parser.add_argument("--strategy", default="Random")
+    parser.add_argument("--baggage", type=int, default=0)
+    parser.add_argument("--percent-fast", type=float, default=1)
+    parser.add_argument("--randomise-baggage", action="store_true")
+    parser.add_argument("--layout", default="737", choices=list(LAYOUTS))
+    parser.add_argument("--trace", help="play back a trace instead of simulating")
+    parser.add_argument("--speed", type=float, default=20, help="time steps per second")
+    parser.add_argument("--max-time-steps", type=int, default=None)
+    args = parser.parse_args()
+
+    root = Tk()
+    root.title("Boarding")
+    if args.trace:
+        reader = TraceReader(args.trace)
+        #The trace stores the cabin it was recorded in, so --layout isn't used
+        layout = reader.layout
+        source = TraceSource(reader)
+    else:
+        layout = LAYOUTS[args.layout]
+        Passengers = assignSeats(args.strategy, args.baggage, args.percent_fast,
+                                 args.randomise_baggage, layout=layout)
+        source = LiveSource(Boarding(Passengers, layout=layout), args.max_time_steps)
+    BoardingViewer(root, source, layout, args.speed)
+    root.mainloop()
@@ -0,0 +1,209 @@
+import os
+from functools import partial
+from Project import Passenger, Boarding
+from Strategies import strategyGroups
+from Layout import DEFAULT_LAYOUT
+from MonteCarlo import RunningStats
+from Parallel import processPool, trialRandom
+
+"""
+    Function that draws the random numbers for the passenger in each seat.
+    The same numbers are used for every strategy, so strategies are compared
+    on the same passengers.
+    Parameters:
+        numSeats : int
+            Number of seats on the plane
+        rng : Random
+            Random number generator to use
+    Returns:
+        List of four random numbers (0,1) for each seat, used for the
+        walking speed, the walking speed of slow passengers, the baggage and
+        the order within the seat's group
+"""
+def seatRandoms(numSeats, rng):
+    draw = rng.random
+    return [(draw(), draw(), draw(), draw()) for seat in range(numSeats)]
+
+"""
+    Function that creates the passengers of a strategy from the random
+    numbers of each seat, with the same distributions as assignSeats().
+    Passengers in each group board in order of their random number.
+    Parameters:
+        Type : String
+            Type of strategy to use
+        randoms : List((float, float, float, float))
+            Random numbers of each seat from seatRandoms()
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        antithetic : Bool
+            If True use 1 - each random number, so the passengers are as
+            different as possible from those of the same random numbers
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+    Returns:
+        Sorted list of passengers
+"""
+def commonQueue(Type, randoms, baggage, percentFast, randomiseBaggage, antithetic=False,
+                layout=DEFAULT_LAYOUT):
+    return groupQueue(strategyGroups(Type, layout), randoms, baggage, percentFast,
+                      randomiseBaggage, antithetic, layout)
+
+"""
+    Function that creates the passengers of groups of seats from the random
+    numbers of each seat, as commonQueue() does for a strategy.
+    Parameters:
+        groups : List(List(int))
+            Groups of seat numbers, in the order they board
+        randoms : List((float, float, float, float))
+            Random numbers of each seat from seatRandoms()
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        antithetic : Bool
+            If True use 1 - each random number
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+    Returns:
+        Sorted list of passengers
+"""
+def groupQueue(groups, randoms, baggage, percentFast, randomiseBaggage, antithetic=False,
+               layout=DEFAULT_LAYOUT):
+    if antithetic:
+        randoms = [(1 - a, 1 - b, 1 - c, 1 - d) for a, b, c, d in randoms]
+    Passengers = []
+    for group in groups:
+        for seat in sorted(group, key=lambda seat: randoms[seat][3]):
+            fast, slow, bags, order = randoms[seat]
+            walkingSpeed = 0 if fast < percentFast else 1 if slow < 0.7 else 2
+            passengerBaggage = int(bags * (baggage + 1)) if randomiseBaggage else baggage
+            #1 - 0.0 can give exactly baggage + 1
+            passengerBaggage = min(passengerBaggage, baggage)
+            row, column = layout.seatPositions[seat]
+            Passengers.append(Passenger([row, column], passengerBaggage, walkingSpeed,
+                                        layout.seatAisle[column]))
+    return Passengers
+
+"""
+    Function that runs one trial of every strategy on the same passengers.
+    Parameters:
+        Types : List(String)
+            Types of strategy to compare
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        antithetic : Bool
+            If True also run the antithetic passengers and use the average
+            of the two times
+        maxTimeSteps : int
+            If given, stop boarding after this many time steps
+        layout : CabinLayout
+            Cabin of the plane
+        seed : int
+            Seed the random number generators of the trials are created from
+        trial : int
+            Number of the trial
+    Returns:
+        Dictionary of the time taken by each strategy, -1 if it was stopped
+"""
+def comparisonTrial(Types, baggage, percentFast, randomiseBaggage, antithetic, maxTimeSteps,
+                    layout, seed, trial):
+    randoms = seatRandoms(layout.numSeats, trialRandom(seed, trial))
+    times = {}
+    for Type in Types:
+        runs = []
+        for flipped in ((False, True) if antithetic else (False,)):
+            boarding = Boarding(commonQueue(Type, randoms, baggage, percentFast,
+                                            randomiseBaggage, flipped, layout),
+                                layout=layout)
+            boarding.run(maxTimeSteps)
+            runs.append(boarding.timeSteps if boarding.finished() else -1)
+        times[Type] = -1 if -1 in runs else sum(runs) / len(runs)
+    return times
+
+"""
+    Function that compares strategies using common random numbers, where
+    each trial runs every strategy on the same passengers, and reports the
+    paired difference of every pair of strategies. The differences have
+    much smaller standard errors than comparing independent trials, which
+    are printed for comparison. Trials where any strategy was stopped are
+    left out.
+    Parameters:
+        Types : List(String)
+            Types of strategy to compare
+        numTrials : int
+            Number of trials
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        antithetic : Bool
+            If True each trial is the average of the passengers and their
+            antithetic passengers
+        seed : int
+            Seed the random number generators of the trials are created from
+        workers : int
+            Number of processes to run the trials across, 1 by default
+        maxTimeSteps : int
+            If given, stop boarding after this many time steps
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+    Returns:
+        Dictionary of the RunningStats of each strategy and of each pair of
+        strategies (first, second), for the time of first - second
+"""
+def compareStrategiesCRN(Types, numTrials, baggage, percentFast, randomiseBaggage,
+                         antithetic=False, seed=0, workers=1, maxTimeSteps=None,
+                         layout=DEFAULT_LAYOUT):
+    run = partial(comparisonTrial, Types, baggage, percentFast, randomiseBaggage, antithetic,
+                  maxTimeSteps, layout, seed)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 1:
+        trials = [run(trial) for trial in range(numTrials)]
+    else:
+        with processPool(workers) as executor:
+            trials = list(executor.map(run, range(numTrials),
+                                       chunksize=max(1, numTrials // (workers * 4))))
+
+    stats = {Type: RunningStats() for Type in Types}
+    pairs = [(Types[i], Types[j]) for i in range(len(Types)) for j in range(i + 1, len(Types))]
+    for pair in pairs:
+        stats[pair] = RunningStats()
+    stopped = 0
+    for times in trials:
+        if -1 in times.values():
+            stopped += 1
+            continue
+        for Type in Types:
+            stats[Type].add(times[Type])
+        for first, second in pairs:
+            stats[(first, second)].add(times[first] - times[second])
+
+    if stopped:
+        print(str(stopped) + " trials left out as a strategy deadlocked or did not finish in "
+              + str(maxTimeSteps) + " time steps")
+    for Type in Types:
+        print("Average Time taken for strategy " + Type + " was " + str(stats[Type].mean))
+    for first, second in pairs:
+        difference = stats[(first, second)]
+        independent = (stats[first].standardError()**2 + stats[second].standardError()**2)**0.5
+        print(first + " - " + second + " = " + str(difference.mean)
+              + " with standard error " + str(difference.standardError())
+              + " (" + str(independent) + " if independent)")
+    return stats
@@ -0,0 +1,286 @@
+import argparse
+from functools import partial
+from Project import (assignSeats, referenceSimulation, Passenger, Boarding,
+                     DeadlockError, printPlane)
+from Layout import DEFAULT_LAYOUT, LAYOUTS
+from Parallel import trialRandom
+from Strategies import strategiesFor
+
+"""
+    Function that runs Boarding the same way as simulation() on each queue
+    of passengers, calling onTimeStep after every call of advance().
+    Parameters:
+        queues : List(List(Passenger))
+            Passengers of each boarding in the order they board
+        maxTimeSteps : int
+            If given, stop boarding after this many time steps
+        layout : CabinLayout
+            Cabin of the plane
+        onTimeStep : Function
+            If given, called with the number of the queue, the time step,
+            the plane and the on board passengers
+        skipIdle : Bool
+            If True, skip over time steps where passengers are only counting
+            down
+    Returns:
+        List of the time steps taken by each boarding, -1 if it was stopped
+        or deadlocked
+"""
+def boardingEngine(queues, maxTimeSteps, layout, onTimeStep=None, skipIdle=True):
+    times = []
+    for number, Passengers in enumerate(queues):
+        boarding = Boarding(Passengers, skipIdle, layout)
+        while not boarding.finished():
+            if maxTimeSteps is not None and boarding.timeSteps >= maxTimeSteps:
+                break
+            if not boarding.advance(maxTimeSteps):
+                break
+            if onTimeStep is not None:
+                onTimeStep(number, boarding.timeSteps, boarding.plane,
+                           boarding.OnBoardPassengers)
+        times.append(boarding.timeSteps if boarding.finished() else -1)
+    return times
+
+"""
+    Function that runs the batch engine on every queue of passengers at
+    once. The batch engine keeps its passengers in arrays, so only its times
+    are compared.
+    Parameters:
+        queues : List(List(Passenger))
+            Passengers of each boarding in the order they board
+        maxTimeSteps : int
+            If given, stop boarding after this many time steps
+        layout : CabinLayout
+            Cabin of the plane
+        onTimeStep : Function
+            Not used
+    Returns:
+        List of the time steps taken by each boarding, -1 if it was stopped
+        or deadlocked
+"""
+def batchEngine(queues, maxTimeSteps, layout, onTimeStep=None):
+    #Imported here so the other engines can be checked without NumPy
+    from BatchSimulation import BatchBoarding
+    return [int(time) for time in BatchBoarding(queues, maxTimeSteps, layout).run()]
+
+#Engines checked against referenceSimulation(), each called with a list of
+#queues of passengers, maxTimeSteps, the layout and onTimeStep
+CANDIDATES = {
+    "incremental": boardingEngine,
+    "noSkip": partial(boardingEngine, skipIdle=False),
+    "batch": batchEngine,
+}
+
+"""
+    Function that gets the position of every on board passenger.
+    Parameters:
+        Passengers : List(Passenger)
+            On board passengers in the order they boarded
+    Returns:
+        Tuple of (row, column) of each passenger
+"""
+def positionsOf(Passengers):
+    return tuple((passenger.currRow, passenger.currColumn) for passenger in Passengers)
+
+"""
+    Function that copies passengers who haven't boarded, so each engine
+    boards its own.
+    Parameters:
+        Passengers : List(Passenger)
+            Passengers to copy
+    Returns:
+        List of new passengers
+"""
+def copyQueue(Passengers):
+    return [Passenger(passenger.seat, passenger.baggage, passenger.walkingSpeed, passenger.aisle)
+            for passenger in Passengers]
+
+"""
+    Function that runs the reference engine and candidate engines on the
+    same passengers, created for each trial from the seed and trial number,
+    and finds where each candidate first differs from the reference.
+    Parameters:
+        candidates : {String: Function}
+            Engines to check, see CANDIDATES
+        Type : String
+            Type of strategy to use
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        seed : int
+            Seed the random number generators of the trials are created from
+        numTrials : int
+            Number of trials
+        maxTimeSteps : int
+            If given, stop boarding after this many time steps
+        layout : CabinLayout
+            Cabin of the plane
+        compareTimeSteps : Bool
+            If True also compare the position of every passenger after each
+            time step a candidate reports
+    Returns:
+        Dictionary of the list of results of each engine, one per trial,
+        with the time taken by the reference and the engine and, if the
+        positions differ, the first time step they differ at with the plane
+        of each engine and the numbers of the passengers in different
+        positions
+"""
+def compareCases(candidates, Type, baggage, percentFast, randomiseBaggage, seed, numTrials,
+                 maxTimeSteps, layout, compareTimeSteps=True):
+    queues = [assignSeats(Type, baggage, percentFast, randomiseBaggage,
+                          trialRandom(seed, trial), layout) for trial in range(numTrials)]
+
+    #Position of every passenger and the plane after each reference time step
+    histories = []
+    referenceTimes = []
+    for Passengers in queues:
+        history = {}
+        histories.append(history)
+
+        def recordReference(timeStep, plane, OnBoardPassengers):
+            history[timeStep] = (positionsOf(OnBoardPassengers), [list(row) for row in plane])
+
+        try:
+            referenceTimes.append(referenceSimulation(copyQueue(Passengers), maxTimeSteps, layout,
+                                                      recordReference if compareTimeSteps
+                                                      else None))
+        except DeadlockError:
+            #Not every engine can tell a deadlock from being stopped
+            referenceTimes.append(-1)
+
+    results = {}
+    for name, candidate in candidates.items():
+        divergences = [None] * numTrials
+
+        def compareCandidate(trial, timeStep, plane, OnBoardPassengers):
+            if divergences[trial] is not None or timeStep not in histories[trial]:
+                return
+            positions, referencePlane = histories[trial][timeStep]
+            candidatePositions = positionsOf(OnBoardPassengers)
+            if candidatePositions != positions:
+                length = max(len(positions), len(candidatePositions))
+                differing = [number for number in range(length)
+                             if number >= len(positions) or number >= len(candidatePositions)
+                             or positions[number] != candidatePositions[number]]
+                divergences[trial] = {"timeStep": timeStep, "passengers": differing,
+                                      "referencePlane": referencePlane,
+                                      "candidatePlane": [list(row) for row in plane]}
+
+        times = candidate([copyQueue(Passengers) for Passengers in queues], maxTimeSteps, layout,
+                          compareCandidate if compareTimeSteps else None)
+        results[name] = [{"strategy": Type, "baggage": baggage, "percentFast": percentFast,
+                          "randomiseBaggage": randomiseBaggage, "seed": seed, "trial": trial,
+                          "reference": referenceTimes[trial], "candidate": times[trial],
+                          "divergence": divergences[trial]}
+                         for trial in range(numTrials)]
+    return results
+
+"""
+    Function that prints where a candidate engine first differs from the
+    reference engine.
+    Parameters:
+        name : String
+            Name of the candidate engine
+        result : Dictionary
+            Result of compareCases()
+"""
+def printDivergence(name, result):
+    print("Engine " + name + " differs for strategy " + result["strategy"] + ", baggage "
+          + str(result["baggage"]) + ", percentFast " + str(result["percentFast"])
+          + ", randomiseBaggage " + str(result["randomiseBaggage"]) + ", seed "
+          + str(result["seed"]) + ", trial " + str(result["trial"]))
+    print("Reference took " + str(result["reference"]) + " time steps, " + name + " took "
+          + str(result["candidate"]))
+    divergence = result["divergence"]
+    if divergence is None:
+        return
+    print("Positions first differ after time step " + str(divergence["timeStep"])
+          + " for passengers " + str(divergence["passengers"]))
+    print("Reference plane:")
+    printPlane(divergence["referencePlane"])
+    print(name + " plane:")
+    printPlane(divergence["candidatePlane"])
+
+"""
+    Function that checks candidate engines against the reference engine on
+    seeded passengers for every combination of the given settings. The
+    first difference of each engine is printed with the plane of both
+    engines.
+    Parameters:
+        candidates : List(String)
+            Names of the engines in CANDIDATES to check, all by default
+        Types : List(String)
+            Types of strategy, all that can be used with each cabin by default
+        baggages : List(int)
+            Amounts of baggage
+        percentFasts : List(float)
+            Percentages of passengers that move quickly
+        randomiseBaggages : List(Bool)
+            Whether to randomise the baggage
+        numTrials : int
+            Number of trials of each combination
+        seed : int
+            Seed the random number generators of the trials are created from
+        maxTimeSteps : int
+            If given, stop boarding after this many time steps
+        layouts : List(CabinLayout)
+            Cabins of the plane
+        compareTimeSteps : Bool
+            If True compare the positions of the passengers after each time
+            step as well as the time taken
+    Returns:
+        Dictionary of the results of compareCases() that differ for each
+        engine
+"""
+def checkEquivalence(candidates=None, Types=None, baggages=(0, 2, 5), percentFasts=(0.3, 1),
+                     randomiseBaggages=(True, False), numTrials=3, seed=0, maxTimeSteps=5000,
+                     layouts=(DEFAULT_LAYOUT,), compareTimeSteps=True):
+    if candidates is None:
+        candidates = list(CANDIDATES)
+    mismatches = {name: [] for name in candidates}
+    numCases = 0
+    for layout in layouts:
+        for Type in strategiesFor(layout) if Types is None else Types:
+            for baggage in baggages:
+                for percentFast in percentFasts:
+                    for randomiseBaggage in randomiseBaggages:
+                        numCases += numTrials
+                        results = compareCases({name: CANDIDATES[name] for name in candidates},
+                                               Type, baggage, percentFast, randomiseBaggage,
+                                               seed, numTrials, maxTimeSteps, layout,
+                                               compareTimeSteps)
+                        for name in candidates:
+                            for result in results[name]:
+                                if (result["reference"] != result["candidate"]
+                                        or result["divergence"] is not None):
+                                    if not mismatches[name]:
+                                        printDivergence(name, result)
+                                    mismatches[name].append(result)
+    for name in candidates:
+        print("Engine " + name + " differs in " + str(len(mismatches[name])) + " of "
+              + str(numCases) + " cases")
+    return mismatches
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check engines against the reference engine")
+    parser.add_argument("--engines", nargs="+", default=None, choices=list(CANDIDATES))
+    parser.add_argument("--strategies", nargs="+", default=None)
+    parser.add_argument("--baggage", type=int, nargs="+", default=[0, 2, 5])
+    parser.add_argument("--percent-fast", type=float, nargs="+", default=[0.3, 1])
+    parser.add_argument("--trials", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-time-steps", type=int, default=5000)
+    parser.add_argument("--layouts", nargs="+", default=["737"], choices=list(LAYOUTS))
+    parser.add_argument("--final-only", action="store_true",
+                        help="only compare the time taken, not every time step")
+    args = parser.parse_args()
+    mismatches = checkEquivalence(args.engines, args.strategies, args.baggage, args.percent_fast,
+                                  (True, False), args.trials, args.seed, args.max_time_steps,
+                                  [LAYOUTS[name] for name in args.layouts],
+                                  not args.final_only)
+    if any(mismatches.values()):
+        raise SystemExit(1)
@@ -0,0 +1,205 @@
+class CabinLayout:
+    """
+    This class describes the cabin of the plane and precomputes the tables
+    used to turn seat numbers into positions on the plane.
+    The plane is a matrix of rows and columns. The seat rows are between
+    entryRows rows of aisle at the front, where passengers enter, and two rows
+    of aisle at the back that passengers moving out of the way can step into.
+    Each row has seatsPerSide seats by each window and, with two aisles,
+    middleSeats seats between the aisles. Seats in the middle are reached
+    from the nearest aisle, or the left one if they are as close to both.
+    Seats are numbered from 0 row by row from the front, left to right.
+    Attributes:
+        rows : int
+            Number of rows of seats
+        seatsPerSide : int
+            Number of seats between each window and the nearest aisle
+        aisles : int
+            Number of aisles, 1 or 2
+        middleSeats : int
+            Number of seats between the aisles, only used with two aisles
+        entryRows : int
+            Number of rows of aisle in front of the seats
+        numRows, numColumns : int
+            Size of the plane matrix
+        seatsPerRow : int
+            Number of seats in each row
+        numSeats : int
+            Number of seats on the plane
+        aisleColumns : tuple(int)
+            Columns of the aisles, left to right
+        seatColumns : tuple(int)
+            Columns of the seats, left to right
+        seatAisle : {int: int}
+            The aisle column each seat column is reached from
+        seatDistance : {int: int}
+            Number of seats from the aisle to each seat column, 1 for the
+            seat next to the aisle
+        sideSize : {int: int}
+            Number of seats on the same side of the same aisle as each seat
+            column, so the seat furthest from the aisle has
+            seatDistance == sideSize
+        seatPositions : List((int, int))
+            Row and column of each seat number
+        flagChecks : {int: List((String, int))}
+            Checks made by a passenger about to reach their row, for each seat
+            column, in order. "any" flags whoever is in that column of the row,
+            "seated" only flags someone sitting in their own seat there and
+            "aisle" flags someone in the aisle of that row whose seat is in
+            that column.
+        movingColumns : {int: tuple(int)}
+            For each aisle, the seat columns a passenger in the row ahead
+            could be moving out of
+    """
+
+    def __init__(self, rows=27, seatsPerSide=3, aisles=1, middleSeats=0, entryRows=2):
+        if aisles not in (1, 2):
+            raise ValueError("A cabin can only have 1 or 2 aisles")
+        if rows < 1 or seatsPerSide < 1 or entryRows < 1 or middleSeats < 0:
+            raise ValueError("Invalid cabin layout")
+        self.rows = rows
+        self.seatsPerSide = seatsPerSide
+        self.aisles = aisles
+        self.middleSeats = middleSeats if aisles == 2 else 0
+        self.entryRows = entryRows
+
+        #Columns from left to right, along with the aisle each seat is
+        #reached from and how far from it the seat is
+        self.seatAisle = {}
+        self.seatDistance = {}
+        self.sideSize = {}
+        left = seatsPerSide
+        for column in range(seatsPerSide):
+            self.addSeat(column, left, seatsPerSide)
+        if aisles == 1:
+            aisleColumns = (left,)
+        else:
+            right = left + self.middleSeats + 1
+            aisleColumns = (left, right)
+            #The middle is split between the aisles, with the left aisle
+            #taking the extra seat
+            leftHalf = (self.middleSeats + 1) // 2
+            for column in range(left + 1, right):
+                if column - left <= leftHalf:
+                    self.addSeat(column, left, leftHalf)
+                else:
+                    self.addSeat(column, right, self.middleSeats - leftHalf)
+        last = aisleColumns[-1]
+        for column in range(last + 1, last + seatsPerSide + 1):
+            self.addSeat(column, last, seatsPerSide)
+        self.aisleColumns = aisleColumns
+        self.seatColumns = tuple(sorted(self.seatAisle))
+        self.numColumns = last + seatsPerSide + 1
+        self.numRows = entryRows + rows + 2
+        self.seatsPerRow = len(self.seatColumns)
+        self.numSeats = rows * self.seatsPerRow
+        self.seatPositions = [(entryRows + seat // self.seatsPerRow,
+                               self.seatColumns[seat % self.seatsPerRow])
+                              for seat in range(self.numSeats)]
+
+        self.flagChecks = {}
+        for column in self.seatColumns:
+            aisle = self.seatAisle[column]
+            step = 1 if column < aisle else -1
+            #Seats between this one and the aisle, starting by the seat
+            between = list(range(column + step, aisle, step))
+            if not between:
+                continue
+            #Passengers further in only need seated passengers to move, as
+            #anyone else in the way is on their way further in too
+            check = "any" if self.seatDistance[column] == self.sideSize[column] else "seated"
+            self.flagChecks[column] = ([(check, other) for other in between]
+                                       + [("aisle", other) for other in between])
+        self.movingColumns = {aisle: tuple(column for column in self.seatColumns
+                                           if self.seatAisle[column] == aisle
+                                           and self.seatDistance[column] < self.sideSize[column])
+                              for aisle in aisleColumns}
+
+    def addSeat(self, column, aisle, sideSize):
+        self.seatAisle[column] = aisle
+        self.seatDistance[column] = abs(column - aisle)
+        self.sideSize[column] = sideSize
+
+    def key(self):
+        return (self.rows, self.seatsPerSide, self.aisles, self.middleSeats, self.entryRows)
+
+    def __eq__(self, other):
+        return isinstance(other, CabinLayout) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return ("CabinLayout(rows=%d, seatsPerSide=%d, aisles=%d, middleSeats=%d, entryRows=%d)"
+                % self.key())
+
+    def emptyPlane(self):
+        #Seat rows are 0, the front and back rows are -1 except for the aisles
+        plane = [[0 for x in range(self.numColumns)] for y in range(self.rows)]
+        for x in range(self.entryRows):
+            plane.insert(0, self.movementRow())
+        plane.append(self.movementRow())
+        plane.append(self.movementRow())
+        return plane
+
+    def fullPlane(self):
+        #Plane once every passenger is seated
+        plane = self.emptyPlane()
+        for row, column in self.seatPositions:
+            plane[row][column] = 1
+        return plane
+
+    def movementRow(self):
+        return [0 if column in self.aisleColumns else -1 for column in range(self.numColumns)]
+
+    def seatNumber(self, row, column):
+        return (row - self.entryRows) * self.seatsPerRow + self.seatColumns.index(column)
+
+    def rowBlocks(self, numBlocks):
+        #Seat numbers of each block of rows from front to back, lowest first.
+        #Blocks are as even as the number of rows allows.
+        blocks = []
+        for block in range(numBlocks):
+            first = self.rows * block // numBlocks
+            last = self.rows * (block + 1) // numBlocks
+            blocks.append(list(range(first * self.seatsPerRow, last * self.seatsPerRow)))
+        return blocks
+
+    def distanceGroups(self):
+        #Seat numbers grouped by distance from the aisle, furthest first.
+        #Each group takes its columns right to left, front to back.
+        groups = []
+        for distance in range(max(self.sideSize.values()), 0, -1):
+            group = []
+            for column in reversed(self.seatColumns):
+                if self.seatDistance[column] == distance:
+                    index = self.seatColumns.index(column)
+                    group += range(index, self.numSeats, self.seatsPerRow)
+            groups.append(group)
+        return groups
+
+#Boeing 737, the cabin used unless another is given
+DEFAULT_LAYOUT = CabinLayout()
+
+#Cabins of some common planes, all in economy
+LAYOUTS = {
+    "737": DEFAULT_LAYOUT,
+    "A321": CabinLayout(rows=37),
+    "A350": CabinLayout(rows=36, aisles=2, middleSeats=3),
+    "777": CabinLayout(rows=42, aisles=2, middleSeats=4),
+}
+
+"""
+    Function that gives a short name for a cabin layout, used in the names of
+    strategies made for one cabin.
+    Parameters:
+        layout : CabinLayout
+            Cabin of the plane
+    Returns:
+        Name of the layout in LAYOUTS, or its settings joined by "-"
+"""
+def layoutName(layout):
+    for name, other in LAYOUTS.items():
+        if other == layout:
+            return name
+    return "-".join(str(value) for value in layout.key())
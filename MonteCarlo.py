@@ -0,0 +1,272 @@
+import math
+import statistics
+import time
+from Layout import DEFAULT_LAYOUT
+from Parallel import parallelTimes
+
+class RunningStats:
+    """
+    This class keeps the mean and variance of results as they are added,
+    using Welford's method, so the results don't need to be stored.
+    Attributes:
+        count : int
+            Number of results added
+        mean : float
+            Mean of the results
+        m2 : float
+            Sum of squared differences from the mean
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other):
+        #Adds the results of another RunningStats, such as one from another
+        #process, as if they had been added one at a time
+        count = self.count + other.count
+        if count == 0:
+            return
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+
+    def variance(self):
+        if self.count < 2:
+            return math.inf
+        return self.m2 / (self.count - 1)
+
+    def stdev(self):
+        return math.sqrt(self.variance())
+
+    def standardError(self):
+        if self.count < 2:
+            return math.inf
+        return math.sqrt(self.variance() / self.count)
+
+    def halfWidth(self, confidence=0.95):
+        #Half the width of the normal confidence interval of the mean
+        return zScore(confidence) * self.standardError()
+
+"""
+    Function that gives the number of standard errors either side of the
+    mean needed for a confidence interval.
+    Parameters:
+        confidence : float (0,1)
+            Confidence of the interval
+    Returns:
+        The z score
+"""
+def zScore(confidence):
+    return statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+
+"""
+    Function that checks if a stopping target has been met.
+    Parameters:
+        stats : RunningStats
+            Results so far
+        targetError : float
+            Standard error to reach
+        targetHalfWidth : float
+            Confidence interval half width to reach
+        confidence : float
+            Confidence of the interval
+        minTrials : int
+            Number of results needed before stopping
+    Returns:
+        True if every target given has been met
+"""
+def targetMet(stats, targetError, targetHalfWidth, confidence, minTrials):
+    if stats.count < max(minTrials, 2):
+        return False
+    if targetError is not None and stats.standardError() > targetError:
+        return False
+    if targetHalfWidth is not None and stats.halfWidth(confidence) > targetHalfWidth:
+        return False
+    return True
+
+"""
+    Function used to test the speed of a strategy, running trials in batches
+    until the standard error or confidence interval of the mean time is
+    small enough, or the time budget or maximum number of trials is used
+    up. Trials are seeded from seed and the trial number, so the same
+    settings always run the same trials.
+    Parameters:
+        Type : String
+            Type of strategy to use
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        targetError : float
+            Stop once the standard error of the mean is at most this
+        targetHalfWidth : float
+            Stop once the half width of the confidence interval of the mean
+            is at most this
+        confidence : float
+            Confidence of the interval
+        batchSize : int
+            Number of trials run between checks
+        minTrials : int
+            Number of finished trials needed before stopping
+        maxTrials : int
+            Most trials to run
+        timeBudget : float
+            Seconds after which no more batches are started
+        seed : int
+            Seed the random number generators of the trials are created from
+        workers : int
+            Number of processes to run the trials across
+        maxTimeSteps : int
+            If given, trials still boarding after this many time steps are
+            left out of the results
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+    Returns:
+        RunningStats of the finished trials
+"""
+def adaptiveSimulationTest(Type, baggage, percentFast, randomiseBaggage,
+                           targetError=None, targetHalfWidth=None, confidence=0.95,
+                           batchSize=20, minTrials=20, maxTrials=10000, timeBudget=None,
+                           seed=0, workers=1, maxTimeSteps=None, layout=DEFAULT_LAYOUT):
+    stats = RunningStats()
+    start = time.perf_counter()
+    trials = 0
+    stopped = 0
+    reason = "maximum number of trials"
+    while trials < maxTrials:
+        batch = range(trials, min(trials + batchSize, maxTrials))
+        for result in parallelTimes(Type, batch, baggage, percentFast, randomiseBaggage,
+                                    seed, workers, maxTimeSteps=maxTimeSteps, layout=layout):
+            if result == -1:
+                stopped += 1
+            else:
+                stats.add(result)
+        trials = batch.stop
+        if (targetError is not None or targetHalfWidth is not None) and \
+                targetMet(stats, targetError, targetHalfWidth, confidence, minTrials):
+            reason = "target met"
+            break
+        if timeBudget is not None and time.perf_counter() - start >= timeBudget:
+            reason = "time budget used"
+            break
+    print("Stopped after " + str(trials) + " trials (" + reason + ")")
+    if stopped:
+        print(str(stopped) + " trials deadlocked or did not finish in " + str(maxTimeSteps)
+              + " time steps")
+    print("Average Time taken for strategy " + Type + " was " + str(stats.mean))
+    print("Standard Error in time is " + str(stats.standardError()))
+    return stats
+
+"""
+    Function that compares strategies, running trials of each in batches
+    until the difference between every pair of strategies is resolved, that
+    is the confidence interval of their difference doesn't include 0, or
+    the time budget or maximum number of trials is used up.
+    Each strategy has its own seeds so their results are independent.
+    Parameters:
+        Types : List(String)
+            Types of strategy to compare
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        confidence : float
+            Confidence of the intervals of the differences
+        batchSize : int
+            Number of trials of each strategy run between checks
+        minTrials : int
+            Number of finished trials of each strategy needed before stopping
+        maxTrials : int
+            Most trials of each strategy to run
+        timeBudget : float
+            Seconds after which no more batches are started
+        seed : int
+            Seed the random number generators of the trials are created from
+        workers : int
+            Number of processes to run the trials across
+        maxTimeSteps : int
+            If given, trials still boarding after this many time steps are
+            left out of the results
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+    Returns:
+        Dictionary of the RunningStats of the finished trials of each
+        strategy, and dictionary of the number of trials of each strategy
+        that deadlocked or were stopped after maxTimeSteps
+"""
+def compareStrategiesAdaptive(Types, baggage, percentFast, randomiseBaggage, confidence=0.95,
+                              batchSize=20, minTrials=20, maxTrials=10000, timeBudget=None,
+                              seed=0, workers=1, maxTimeSteps=None, layout=DEFAULT_LAYOUT):
+    stats = {Type: RunningStats() for Type in Types}
+    stopped = {Type: 0 for Type in Types}
+    start = time.perf_counter()
+    trials = 0
+    reason = "maximum number of trials"
+    while trials < maxTrials:
+        batch = range(trials, min(trials + batchSize, maxTrials))
+        for Type in Types:
+            for result in parallelTimes(Type, batch, baggage, percentFast, randomiseBaggage,
+                                        str(seed) + "/" + Type, workers,
+                                        maxTimeSteps=maxTimeSteps, layout=layout):
+                if result == -1:
+                    stopped[Type] += 1
+                else:
+                    stats[Type].add(result)
+        trials = batch.stop
+        if all(stats[Type].count >= max(minTrials, 2) for Type in Types) and \
+                not unresolvedPairs(stats, confidence):
+            reason = "all differences resolved"
+            break
+        if timeBudget is not None and time.perf_counter() - start >= timeBudget:
+            reason = "time budget used"
+            break
+    print("Stopped after " + str(trials) + " trials of each strategy (" + reason + ")")
+    for Type in Types:
+        if stopped[Type]:
+            print(str(stopped[Type]) + " trials of strategy " + Type + " deadlocked or did not "
+                  + "finish in " + str(maxTimeSteps) + " time steps")
+    for Type in sorted(Types, key=lambda Type: stats[Type].mean):
+        print("Average Time taken for strategy " + Type + " was " + str(stats[Type].mean)
+              + " with standard error " + str(stats[Type].standardError()))
+    for first, second in unresolvedPairs(stats, confidence):
+        print("Difference between " + first + " and " + second + " is not resolved")
+    return stats, stopped
+
+"""
+    Function that finds the pairs of strategies whose difference in mean
+    time isn't resolved.
+    Parameters:
+        stats : {String: RunningStats}
+            Results of each strategy
+        confidence : float
+            Confidence of the intervals of the differences
+    Returns:
+        List of pairs of strategies
+"""
+def unresolvedPairs(stats, confidence):
+    z = zScore(confidence)
+    Types = list(stats)
+    pairs = []
+    for i in range(len(Types)):
+        for j in range(i + 1, len(Types)):
+            first = stats[Types[i]]
+            second = stats[Types[j]]
+            error = math.sqrt(first.standardError()**2 + second.standardError()**2)
+            if abs(first.mean - second.mean) <= z * error:
+                pairs.append((Types[i], Types[j]))
+    return pairs
@@ -0,0 +1,255 @@
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from Project import Boarding
+from Strategies import registerStrategy, strategiesFor, strategyGroups
+from Layout import DEFAULT_LAYOUT, layoutName
+from Compare import seatRandoms, groupQueue
+from Parallel import trialRandom
+
+#A candidate boarding order gives each seat the number of the group it
+#boards in. Groups board one after the other with the passengers of each
+#group in a random order, the same as the strategies in Strategies.py.
+
+"""
+    Function that creates the groups of seats of a candidate.
+    Parameters:
+        candidate : Tuple(int)
+            Group number of each seat
+    Returns:
+        Tuple of groups of seat numbers, in the order they board, without
+        empty groups
+"""
+def candidateGroups(candidate):
+    groups = {}
+    for seat, group in enumerate(candidate):
+        groups.setdefault(group, []).append(seat)
+    return tuple(tuple(groups[group]) for group in sorted(groups))
+
+"""
+    Function that creates the candidate closest to a strategy, splitting its
+    groups as evenly as possible between numGroups groups.
+    Parameters:
+        Type : String
+            Type of strategy
+        numGroups : int
+            Number of groups candidates have
+        layout : CabinLayout
+            Cabin of the plane
+    Returns:
+        Group number of each seat
+"""
+def strategyCandidate(Type, numGroups, layout=DEFAULT_LAYOUT):
+    groups = strategyGroups(Type, layout)
+    candidate = [0] * layout.numSeats
+    for number, group in enumerate(groups):
+        for seat in group:
+            candidate[seat] = number * numGroups // len(groups)
+    return tuple(candidate)
+
+"""
+    Function that finds the average time taken to board the passengers of
+    groups of seats. Every candidate is run on the same trials, seeded from
+    seed and the trial number, so differences between candidates aren't
+    hidden by differences between their passengers. Trials that are stuck
+    or still boarding after maxTimeSteps count as taking maxTimeSteps.
+    Parameters:
+        groups : Tuple(Tuple(int))
+            Groups of seat numbers, in the order they board
+        numTrials : int
+            Number of trials
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        seed : int
+            Seed the random number generators of the trials are created from
+        maxTimeSteps : int
+            Most time steps a trial is run for
+        layout : CabinLayout
+            Cabin of the plane
+    Returns:
+        Average time taken
+"""
+def evaluateGroups(groups, numTrials, baggage, percentFast, randomiseBaggage, seed,
+                   maxTimeSteps, layout):
+    total = 0
+    for trial in range(numTrials):
+        randoms = seatRandoms(layout.numSeats, trialRandom(seed, trial))
+        boarding = Boarding(groupQueue(groups, randoms, baggage, percentFast, randomiseBaggage,
+                                       layout=layout),
+                            layout=layout)
+        boarding.run(maxTimeSteps)
+        total += boarding.timeSteps if boarding.finished() else maxTimeSteps
+    return total / numTrials
+
+"""
+    Function that creates a new candidate from two parents, taking each row
+    of seats from one parent or the other.
+    Parameters:
+        first, second : Tuple(int)
+            Parents
+        rng : Random
+            Random number generator to use
+        layout : CabinLayout
+            Cabin of the plane
+    Returns:
+        Child candidate
+"""
+def crossover(first, second, rng, layout):
+    child = []
+    for start in range(0, layout.numSeats, layout.seatsPerRow):
+        parent = first if rng.random() < 0.5 else second
+        child.extend(parent[start:start + layout.seatsPerRow])
+    return tuple(child)
+
+"""
+    Function that changes a candidate at random, either moving some seats to
+    a neighbouring group, swapping the groups of two seats or moving a whole
+    row to another group.
+    Parameters:
+        candidate : Tuple(int)
+            Candidate to change
+        numGroups : int
+            Number of groups candidates have
+        rng : Random
+            Random number generator to use
+        layout : CabinLayout
+            Cabin of the plane
+        rate : float
+            Chance of each seat being moved to a neighbouring group
+    Returns:
+        Changed candidate
+"""
+def mutate(candidate, numGroups, rng, layout, rate=0.02):
+    candidate = list(candidate)
+    choice = rng.random()
+    if choice < 0.4:
+        for seat in range(len(candidate)):
+            if rng.random() < rate:
+                candidate[seat] = min(max(candidate[seat] + rng.choice((-1, 1)), 0), numGroups - 1)
+    elif choice < 0.7:
+        first = rng.randrange(len(candidate))
+        second = rng.randrange(len(candidate))
+        candidate[first], candidate[second] = candidate[second], candidate[first]
+    else:
+        start = rng.randrange(layout.rows) * layout.seatsPerRow
+        group = rng.randrange(numGroups)
+        for seat in range(start, start + layout.seatsPerRow):
+            candidate[seat] = group
+    return tuple(candidate)
+
+"""
+    Function used to search for a good boarding order with a genetic
+    algorithm. Each generation the candidates not already evaluated are run
+    across several processes, on the same trials as every other candidate.
+    Candidates with the same groups are only evaluated once. The next
+    generation keeps the best candidates and fills the rest with children of
+    candidates picked by tournament. The first generation includes the
+    registered strategies that can be used with the cabin. The best order
+    found is registered as a strategy for that cabin only, named after it.
+    Parameters:
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        numGroups : int
+            Number of groups candidates have
+        populationSize : int
+            Number of candidates in each generation
+        generations : int
+            Number of generations
+        numTrials : int
+            Number of trials each candidate is evaluated on
+        eliteSize : int
+            Number of the best candidates kept in each generation
+        tournamentSize : int
+            Number of candidates compared to pick each parent
+        seed : int
+            Seed of the search and the trials
+        workers : int
+            Number of processes to run evaluations across, the number of CPUs
+            by default
+        maxTimeSteps : int
+            Most time steps a trial is run for
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+        name : String
+            Name to register the best order as, followed by the name of the
+            layout, e.g. "Optimised-737". None to not register it.
+    Returns:
+        The best groups found and their average time
+"""
+def optimiseBoarding(baggage, percentFast, randomiseBaggage, numGroups=6, populationSize=24,
+                     generations=20, numTrials=20, eliteSize=2, tournamentSize=3, seed=0,
+                     workers=None, maxTimeSteps=5000, layout=DEFAULT_LAYOUT, name="Optimised"):
+    rng = random.Random(seed)
+    evaluate = partial(evaluateGroups, numTrials=numTrials, baggage=baggage,
+                       percentFast=percentFast, randomiseBaggage=randomiseBaggage,
+                       seed=seed, maxTimeSteps=maxTimeSteps, layout=layout)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    #Average time of the groups of every candidate evaluated
+    fitness = {}
+    population = [strategyCandidate(Type, numGroups, layout) for Type in strategiesFor(layout)]
+    population = population[:populationSize]
+    while len(population) < populationSize:
+        population.append(tuple(rng.randrange(numGroups) for seat in range(layout.numSeats)))
+
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        for generation in range(generations):
+            missing = list({candidateGroups(candidate) for candidate in population} - set(fitness))
+            if executor is None:
+                times = [evaluate(groups) for groups in missing]
+            else:
+                times = list(executor.map(evaluate, missing))
+            fitness.update(zip(missing, times))
+            ranked = sorted(population, key=lambda candidate: fitness[candidateGroups(candidate)])
+            print("Generation " + str(generation) + ": best average time "
+                  + str(fitness[candidateGroups(ranked[0])]) + " (" + str(len(fitness))
+                  + " orders evaluated)")
+            if generation == generations - 1:
+                break
+            population = ranked[:eliteSize]
+            while len(population) < populationSize:
+                first = min(rng.sample(ranked, tournamentSize),
+                            key=lambda candidate: fitness[candidateGroups(candidate)])
+                second = min(rng.sample(ranked, tournamentSize),
+                             key=lambda candidate: fitness[candidateGroups(candidate)])
+                population.append(mutate(crossover(first, second, rng, layout), numGroups,
+                                         rng, layout))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    best = min(fitness, key=fitness.get)
+    if name is not None:
+        registerStrategy(name + "-" + layoutName(layout), partial(optimisedGroups, best, layout),
+                         [layout])
+    return best, fitness[best]
+
+"""
+    Function that gives the groups found by optimiseBoarding(), used when
+    registering them as a strategy.
+    Parameters:
+        groups : Tuple(Tuple(int))
+            Groups found
+        optimisedLayout : CabinLayout
+            Cabin the groups were found for
+        layout : CabinLayout
+            Cabin of the plane
+    Returns:
+        The groups
+"""
+def optimisedGroups(groups, optimisedLayout, layout):
+    if layout != optimisedLayout:
+        raise ValueError("Boarding order was optimised for a different cabin")
+    return [list(group) for group in groups]
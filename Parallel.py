@@ -0,0 +1,243 @@
+import math
+import os
+import random
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from Project import STRATEGIES, simulation, DeadlockError
+from Strategies import registeredStrategies, registerStrategies, supportsLayout
+from Layout import DEFAULT_LAYOUT
+
+"""
+    Function used to test the speed of many simulations, running the trials
+    across several processes. Every trial has its own random number
+    generator seeded from seed and the trial number, so the times are the
+    same whatever the number of workers.
+    Parameters:
+        Type : String
+            Type of strategy to use
+        numTrials : int
+            Number of simulations to conduct
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        seed : int
+            Seed the random number generators of the trials are created from
+        workers : int
+            Number of processes to use, the number of CPUs by default
+        chunkSize : int
+            Number of trials sent to a process at a time
+        maxTimeSteps : int
+            If given, trials still boarding after this many time steps are
+            left out of the results
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+    Returns:
+        List of the time taken for each trial, -1 for trials that
+        deadlocked or were stopped after maxTimeSteps
+"""
+def simulationTestParallel(Type, numTrials, baggage, percentFast, randomiseBaggage,
+                           seed=0, workers=None, chunkSize=None, maxTimeSteps=None,
+                           layout=DEFAULT_LAYOUT):
+    if Type not in STRATEGIES:
+        print("Invalid strategy")
+        return
+    if not supportsLayout(Type, layout):
+        print("Strategy " + Type + " can't be used with " + repr(layout))
+        return
+    results = parallelResults(Type, range(numTrials), baggage, percentFast, randomiseBaggage,
+                              seed, workers, chunkSize, maxTimeSteps, layout)
+    times = [time for time, deadlocked in results]
+    finished = [time for time in times if time != -1]
+    deadlocks = sum(deadlocked for time, deadlocked in results)
+    if deadlocks:
+        print(str(deadlocks) + " trials deadlocked")
+    if len(finished) + deadlocks != numTrials:
+        print(str(numTrials - len(finished) - deadlocks) + " trials did not finish in "
+              + str(maxTimeSteps) + " time steps")
+    if len(finished) < 2:
+        print("Not enough finished trials to estimate the time")
+        return times
+    print("Average Time taken for strategy " + Type + " was " + str(statistics.mean(finished)))
+    print("Standard Error in time is " + str(statistics.stdev(finished)/math.sqrt(len(finished))))
+    return times
+
+"""
+    Function that runs the given trials across several processes.
+    Parameters:
+        Type : String
+            Type of strategy to use
+        trials : List(int)
+            Numbers of the trials to run
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        seed : int
+            Seed the random number generators of the trials are created from
+        workers : int
+            Number of processes to use, the number of CPUs by default
+        chunkSize : int
+            Number of trials sent to a process at a time
+        maxTimeSteps : int
+            If given, stop trials after this many time steps
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+    Returns:
+        List of the time taken for each trial in the order of trials
+"""
+def parallelTimes(Type, trials, baggage, percentFast, randomiseBaggage,
+                  seed=0, workers=None, chunkSize=None, maxTimeSteps=None,
+                  layout=DEFAULT_LAYOUT):
+    return [time for time, deadlocked in parallelResults(Type, trials, baggage, percentFast,
+                                                         randomiseBaggage, seed, workers,
+                                                         chunkSize, maxTimeSteps, layout)]
+
+"""
+    Function that runs the given trials across several processes, the same
+    as parallelTimes() but also saying which trials deadlocked.
+    Parameters:
+        Type : String
+            Type of strategy to use
+        trials : List(int)
+            Numbers of the trials to run
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        seed : int
+            Seed the random number generators of the trials are created from
+        workers : int
+            Number of processes to use, the number of CPUs by default
+        chunkSize : int
+            Number of trials sent to a process at a time
+        maxTimeSteps : int
+            If given, stop trials after this many time steps
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+    Returns:
+        List of the time taken for each trial in the order of trials, along
+        with whether it deadlocked
+"""
+def parallelResults(Type, trials, baggage, percentFast, randomiseBaggage,
+                    seed=0, workers=None, chunkSize=None, maxTimeSteps=None,
+                    layout=DEFAULT_LAYOUT):
+    trials = list(trials)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    run = partial(trialResult, Type, baggage, percentFast, randomiseBaggage, seed,
+                  maxTimeSteps=maxTimeSteps, layout=layout)
+    if workers == 1:
+        return [run(trial) for trial in trials]
+    if chunkSize is None:
+        #A few chunks per worker keeps them all busy without sending every
+        #trial on its own
+        chunkSize = max(1, len(trials) // (workers * 4))
+    with processPool(workers) as executor:
+        return list(executor.map(run, trials, chunksize=chunkSize))
+
+"""
+    Function that creates a pool of processes with every strategy registered
+    in this one, including those registered while running such as by
+    optimiseBoarding(). Processes that are started rather than forked would
+    otherwise only have the strategies in Strategies.py.
+    Parameters:
+        workers : int
+            Number of processes
+    Returns:
+        ProcessPoolExecutor
+"""
+def processPool(workers):
+    return ProcessPoolExecutor(workers, initializer=registerStrategies,
+                               initargs=(registeredStrategies(),))
+
+"""
+    Function that runs a single trial with its own random number generator.
+    A trial that deadlocks is treated as stopped, so it doesn't stop the
+    rest of the trials. Callers count deadlocks with trialResult() and
+    report them once, rather than for every trial.
+    Parameters:
+        Type : String
+            Type of strategy to use
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        seed : int
+            Seed the random number generators of the trials are created from
+        trial : int
+            Number of the trial
+        maxTimeSteps : int
+            If given, stop the trial after this many time steps
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+    Returns:
+        Time steps taken for boarding to complete, -1 if it was stopped or
+        deadlocked
+"""
+def runTrial(Type, baggage, percentFast, randomiseBaggage, seed, trial, maxTimeSteps=None,
+             layout=DEFAULT_LAYOUT):
+    return trialResult(Type, baggage, percentFast, randomiseBaggage, seed, trial, maxTimeSteps,
+                       layout)[0]
+
+"""
+    Function that runs a single trial the same as runTrial(), also saying
+    whether it deadlocked.
+    Parameters:
+        Type : String
+            Type of strategy to use
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        seed : int
+            Seed the random number generators of the trials are created from
+        trial : int
+            Number of the trial
+        maxTimeSteps : int
+            If given, stop the trial after this many time steps
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+    Returns:
+        Time steps taken for boarding to complete, -1 if it was stopped or
+        deadlocked, and True if it deadlocked
+"""
+def trialResult(Type, baggage, percentFast, randomiseBaggage, seed, trial, maxTimeSteps=None,
+                layout=DEFAULT_LAYOUT):
+    try:
+        return simulation(Type, baggage, percentFast, randomiseBaggage,
+                          rng=trialRandom(seed, trial), maxTimeSteps=maxTimeSteps,
+                          layout=layout), False
+    except DeadlockError:
+        return -1, True
+
+"""
+    Function that creates the random number generator for a trial.
+    Seeding with a string hashes it, so the generators of different trials
+    are independent of each other and of the process they run in.
+    Parameters:
+        seed : int
+            Seed the random number generators of the trials are created from
+        trial : int
+            Number of the trial
+    Returns:
+        Random number generator for the trial
+"""
+def trialRandom(seed, trial):
+    return random.Random(str(seed) + ":" + str(trial))
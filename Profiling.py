@@ -0,0 +1,206 @@
+import time
+from contextlib import contextmanager
+import Project
+from Project import Boarding, Occupancy
+
+#Phases of the simulation that are timed, along with where the function of
+#each phase is. A phase can be made of more than one function.
+PHASES = [
+    ("enter", Project, "enter"),
+    ("move", Project, "move"),
+    ("move", Boarding, "moveActive"),
+    ("move.waiting", Project, "moveWaitingPassenger"),
+    ("move.movingFor", Project, "moveMovingPassenger"),
+    ("move.normal", Project, "moveNormalPassenger"),
+    ("move.flagging", Project, "flagRow"),
+    ("updatePlane", Project, "updatePlane"),
+    ("applyMoves", Boarding, "applyMoves"),
+    ("termination", Project, "planeFull"),
+    ("termination", Boarding, "finished"),
+    ("numSeatedPassengers", Project, "numSeatedPassengers"),
+]
+
+#Helpers that look up passengers by position, which are only counted
+SCANS = [
+    ("passengerCheck", Project, "passengerCheck"),
+    ("passengerSeatCheck", Project, "passengerSeatCheck"),
+    ("checkPassengerMove", Project, "checkPassengerMove"),
+    ("flagPassengers", Project, "flagPassengers"),
+    ("passengerAt", Occupancy, "passengerAt"),
+    ("passengersAt", Occupancy, "passengersAt"),
+]
+
+class Profile:
+    """
+    This class holds the time spent and number of calls for each phase of
+    the simulation, and the number of calls of each helper.
+    Times include the phases called from inside them, so move includes
+    the move.* phases and move.normal includes move.flagging. Timing adds
+    some overhead to every call, so times are best compared with each other
+    rather than with a simulation run without profiling.
+    Attributes:
+        seconds : {String: float}
+            Wall time spent in each phase
+        calls : {String: int}
+            Number of calls of each phase and helper
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+
+    def add(self, name, seconds, calls=1):
+        self.seconds[name] = self.seconds.get(name, 0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + calls
+
+    def merge(self, other):
+        for name, calls in other.calls.items():
+            self.calls[name] = self.calls.get(name, 0) + calls
+        for name, seconds in other.seconds.items():
+            self.seconds[name] = self.seconds.get(name, 0) + seconds
+
+    def summary(self):
+        #Dictionary of the calls and time of each phase, and calls of each
+        #helper, which can be saved as JSON
+        return {name: {"calls": calls, "seconds": self.seconds.get(name)}
+                for name, calls in self.calls.items()}
+
+    def printSummary(self):
+        for name, calls in self.calls.items():
+            if name in self.seconds:
+                print(name + ": " + str(calls) + " calls, " + str(self.seconds[name]) + "s")
+            else:
+                print(name + ": " + str(calls) + " calls")
+
+"""
+    Function that wraps a function so its calls and time are added to a
+    profile.
+    Parameters:
+        profile : Profile
+            Profile to add to
+        name : String
+            Name of the phase
+        function : Function
+            Function to wrap
+    Returns:
+        The wrapped function
+"""
+def timed(profile, name, function):
+    perf = time.perf_counter
+    seconds = profile.seconds
+    calls = profile.calls
+    seconds.setdefault(name, 0)
+    calls.setdefault(name, 0)
+    def wrapper(*args, **kwargs):
+        start = perf()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            seconds[name] += perf() - start
+            calls[name] += 1
+    return wrapper
+
+"""
+    Function that wraps a function so its calls are added to a profile.
+    Parameters:
+        profile : Profile
+            Profile to add to
+        name : String
+            Name of the helper
+        function : Function
+            Function to wrap
+    Returns:
+        The wrapped function
+"""
+def counted(profile, name, function):
+    calls = profile.calls
+    calls.setdefault(name, 0)
+    def wrapper(*args, **kwargs):
+        calls[name] += 1
+        return function(*args, **kwargs)
+    return wrapper
+
+"""
+    Context manager that profiles every simulation run inside it. The
+    functions of the simulation are only wrapped while it is open, so
+    simulations run without it are not slowed down at all.
+    Parameters:
+        profile : Profile
+            Profile to add to, a new one by default
+    Yields:
+        The profile
+"""
+@contextmanager
+def profiling(profile=None):
+    if profile is None:
+        profile = Profile()
+    originals = []
+    try:
+        for wrap, targets in ((timed, PHASES), (counted, SCANS)):
+            for name, owner, attribute in targets:
+                original = owner.__dict__[attribute]
+                originals.append((owner, attribute, original))
+                setattr(owner, attribute, wrap(profile, name, original))
+        yield profile
+    finally:
+        for owner, attribute, original in reversed(originals):
+            setattr(owner, attribute, original)
+
+"""
+    Function that runs a simulation while profiling it.
+    Parameters:
+        Type : String
+            Strategy type to use
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that walk quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        options :
+            Any other arguments of simulation()
+    Returns:
+        Time steps taken for boarding to complete, -1 if it was stopped or
+        deadlocked, and the profile of the run
+"""
+def profileSimulation(Type, baggage, percentFast, randomiseBaggage, **options):
+    with profiling() as profile:
+        start = time.perf_counter()
+        try:
+            timeSteps = Project.simulation(Type, baggage, percentFast, randomiseBaggage, **options)
+        except Project.DeadlockError:
+            timeSteps = -1
+        profile.add("simulation", time.perf_counter() - start)
+    return timeSteps, profile
+
+"""
+    Function that profiles many simulations, the same as simulationTest(),
+    and prints the profile of all of them together.
+    Parameters:
+        Type : String
+            Type of strategy to use
+        numTrials : int
+            Number of simulations to conduct
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        options :
+            Any other arguments of simulation()
+    Returns:
+        List of the profile of each run and the profile of all of them
+"""
+def profileSimulationTest(Type, numTrials, baggage, percentFast, randomiseBaggage, **options):
+    profiles = []
+    total = Profile()
+    for i in range(numTrials):
+        timeSteps, profile = profileSimulation(Type, baggage, percentFast, randomiseBaggage,
+                                               **options)
+        profiles.append(profile)
+        total.merge(profile)
+    total.printSummary()
+    return profiles, total
@@ -1,6 +1,12 @@
 import random
 import statistics
 import math
+from bisect import bisect_left
+from collections import deque
+from Layout import DEFAULT_LAYOUT
+from Strategies import STRATEGIES, strategyGroups, reversePyramidGroups
+from Trace import TraceWriter
+
 """
     Function used to test the speed of many simulations.
     Parameters:
@@ -17,18 +23,30 @@ import math
             0 to baggage
 """
 def simulationTest(Type, numTrials, baggage, percentFast, randomiseBaggage):
-    if Type not in ["Random", "Back-to-Front", "Front-to-Back", "Outside-In", "Reverse-Pyramid"]:
+    if Type not in STRATEGIES:
         print("Invalid strategy")
         return
     times = []
+    deadlocks = 0
     for i in range(numTrials):
-        times.append(simulation(False, Type, baggage, percentFast, randomiseBaggage))
+        try:
+            times.append(simulation(Type, baggage, percentFast, randomiseBaggage))
+        except DeadlockError:
+            deadlocks += 1
+    if deadlocks:
+        print(str(deadlocks) + " trials deadlocked")
+    if len(times) < 2:
+        print("Not enough finished trials to estimate the time")
+        return
     print("Average Time taken for strategy " + Type + " was " + str(statistics.mean(times)))
-    print("Standard Error in time is " + str(statistics.stdev(times)/math.sqrt(numTrials)))
+    print("Standard Error in time is " + str(statistics.stdev(times)/math.sqrt(len(times))))
     return
 
 """
     Function that assigns the passengers seats so a strategy can be used.
+    The groups of seats of each strategy are in Strategies.py. Each group is
+    shuffled to give the order its passengers board in, then the walking
+    speeds and baggage of all the passengers are drawn.
     Parameters:
         Type : String
             Type of strategy to use
@@ -39,87 +57,37 @@ def simulationTest(Type, numTrials, baggage, percentFast, randomiseBaggage):
         randomiseBaggage : Bool
             If True randomise the amount of baggage each passenger has from
             0 to baggage
+        rng : Random
+            Random number generator to use, the random module by default
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
     Returns:
         Sorted list of passengers
 """
-def assignSeats(Type, baggage, percentFast, randomiseBaggage):
+def assignSeats(Type, baggage, percentFast, randomiseBaggage, rng=random,
+                layout=DEFAULT_LAYOUT):
+    seats = []
+    #Groups are shared between trials so each is shuffled as a copy
+    for group in strategyGroups(Type, layout):
+        group = list(group)
+        rng.shuffle(group)
+        seats += group
+    walkingSpeeds = generateWalkingSpeeds(percentFast, len(seats), rng)
+    baggages = generateBaggage(baggage, randomiseBaggage, len(seats), rng)
     Passengers = []
-    if Type == "Random":
-        unassignedSeats = [x for x in range(162)]
-        for x in range(162):
-            randomlyAssignSeat(unassignedSeats, Passengers, 
-                               baggage, percentFast, randomiseBaggage)
-            
-    if Type == "Back-to-Front":
-        for x in range(162):
-            #Create the group
-            if x % (162/3) == 0:
-                rowSeats = [161 - y for y in range(x, x + (162//3))]
-            #Randomly assign a seat from that group
-            randomlyAssignSeat(rowSeats, Passengers, baggage, 
-                               percentFast, randomiseBaggage)  
-                
-    if Type == "Front-to-Back":
-        for x in range(162):
-            if x % (162/3) == 0:
-                rowSeats = [y for y in range(x, x + (162//3))]
-            randomlyAssignSeat(rowSeats, Passengers, baggage, 
-                               percentFast, randomiseBaggage)  
-                
-    if Type == "Outside-In":
-        outsideSeats = [6*y - 1 for y in range(1, 162//6 + 1)] + [6*y for y in range(162//6)]
-        middleSeats = [6*y - 2 for y in range(1, 162//6 + 1)] + [6*y + 1 for y in range(162//6)]
-        insideSeats = [6*y - 3 for y in range(1, 162//6 + 1)] + [6*y + 2 for y in range(162//6)]
-        seats = [outsideSeats, middleSeats, insideSeats]
-        for group in seats:
-            for x in range(162//3):
-                randomlyAssignSeat(group, Passengers, baggage, 
-                                   percentFast, randomiseBaggage)
-            
-    if Type == "Reverse-Pyramid":
-        seats = reversePyramidGroups()
-        for group in seats:
-            for x in range(162//9):
-                randomlyAssignSeat(group, Passengers, baggage, 
-                                   percentFast, randomiseBaggage)
-        
+    for seat, walkingSpeed, passengerBaggage in zip(seats, walkingSpeeds, baggages):
+        row, column = layout.seatPositions[seat]
+        Passengers.append(Passenger([row, column], passengerBaggage, walkingSpeed,
+                                    layout.seatAisle[column]))
     return Passengers
 
 """
-    Function that creates the groups needed for the reverse-pyramid method of boarding.
-    Returns:
-        List of groups from outside back to inside front
-"""
-def reversePyramidGroups():
-    obs = list(set([6*y - 1 for y in range(1, 162//6 + 1) if y ] + [6*y for y in range(162//6)]) 
-                            & set([161 - y for y in range(0,54)]))
-    oms = list(set([6*y - 1 for y in range(1, 162//6 + 1)] + [6*y for y in range(162//6)])
-                              & set([161 - y for y in range(54,108)]))
-    ofs = list(set([6*y - 1 for y in range(1, 162//6 + 1)] + [6*y for y in range(162//6)])
-                              & set([161 - y for y in range(108,162)]))
-    
-    mbs = list(set([6*y - 2 for y in range(1, 162//6 + 1)] + [6*y + 1 for y in range(162//6)])
-                           & set([161 - y for y in range(0,54)]))
-    mms = list(set([6*y - 2 for y in range(1, 162//6 + 1)] + [6*y + 1 for y in range(162//6)])
-                             & set([161 - y for y in range(54,108)]))
-    mfs = list(set([6*y - 2 for y in range(1, 162//6 + 1)] + [6*y + 1 for y in range(162//6)])
-                            & set([161 - y for y in range(108,162)]))
-    
-    ibs = list(set([6*y - 3 for y in range(1, 162//6 + 1)] + [6*y + 2 for y in range(162//6)])
-                           & set([161 - y for y in range(0,54)]))
-    ims = list(set([6*y - 3 for y in range(1, 162//6 + 1)] + [6*y + 2 for y in range(162//6)])
-                             & set([161 - y for y in range(54,108)]))
-    ifs = list(set([6*y - 3 for y in range(1, 162//6 + 1)] + [6*y + 2 for y in range(162//6)])
-                            & set([161 - y for y in range(108,162)]))
-    return [obs,oms,ofs,mbs,mms,mfs,ibs,ims,ifs]
-
-"""
-    Randomly assigns a seats to a passenger from a group of seats.
+    Function that creates the passengers for many simulations at once.
     Parameters:
-        Group : List(int)
-            List of seats
-        Passengers : List(Passenger)
-            List of Passengers
+        Type : String
+            Type of strategy to use
+        numQueues : int
+            Number of lists of passengers to create
         baggage : int
             Amount of baggage each passenger has
         percentFast : float
@@ -127,27 +95,17 @@ def reversePyramidGroups():
         randomiseBaggage : Bool
             If True randomise the amount of baggage each passenger has from
             0 to baggage
-            
+        rng : Random
+            Random number generator to use, the random module by default
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+    Returns:
+        List of sorted lists of passengers
 """
-def randomlyAssignSeat(Group, Passengers, baggage, percentFast, randomiseBaggage):
-    seat = random.choice(Group)
-    number = random.random()
-    if number < percentFast:
-        walkingSpeed = 0
-    else:
-        number = random.random()
-        if number < 0.7:
-            walkingSpeed = 1
-        else:
-            walkingSpeed = 2
-    if randomiseBaggage:
-        baggage = random.randint(0,baggage)
-    Group.remove(seat)
-    if seat%6 < 3:
-        Passengers.append(Passenger([seat//6 + 2, seat%6], baggage, walkingSpeed))
-    else:
-        Passengers.append(Passenger([seat//6 + 2, seat%6 + 1], baggage, walkingSpeed))
-    return
+def generateQueues(Type, numQueues, baggage, percentFast, randomiseBaggage, rng=random,
+                   layout=DEFAULT_LAYOUT):
+    return [assignSeats(Type, baggage, percentFast, randomiseBaggage, rng, layout)
+            for x in range(numQueues)]
 
 """
     Print the seats of Passengers.
@@ -174,89 +132,195 @@ def printPassengerSeats(Passengers):
         randomiseBaggage : Bool
             If True randomise the amount of baggage each passenger has from
             0 to baggage
+        incremental : Bool
+            If True update the plane in place and use counters to decide when
+            boarding is finished, otherwise rebuild the plane every time step
+        rng : Random
+            Random number generator used to create the passengers
+        maxTimeSteps : int
+            If given, stop boarding after this many time steps
+        skipIdle : Bool
+            If True, skip over time steps where passengers are only counting
+            down their walkCooldown or baggage. Only used if incremental is
+            True and gives the same time steps either way
+        observer : Function
+            If given, called with the telemetry of the plane every sampleRate
+            time steps, see Boarding.telemetry(). Only used if incremental
+            is True
+        sampleRate : int
+            Number of time steps between each call of observer
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+        trace : String
+            If given, record every move and change of flags to this file,
+            see Trace.py. Only used if incremental is True
     Returns:
-        Time steps taken for boaridng to complete
+        Time steps taken for boaridng to complete, -1 if it was stopped
+        after maxTimeSteps. Raises DeadlockError, naming the passengers
+        involved, as soon as nothing on the plane can ever change again.
+        Before deadlocks were detected such a boarding ran until
+        maxTimeSteps and returned -1, or never returned without it, so
+        callers that want -1 for a deadlock should catch DeadlockError, as
+        runTrial() in Parallel.py does
 """
-def simulation(Type, baggage, percentFast, randomiseBaggage):
-    #Matrix representing the plane
-    #Middle column [3] is the aisle, while [0-2] and [4-6] are the seats
-    #1 idencates that a person is there, 0 if not
-    plane = [[0 for x in range(7)] for y in range(27)]
-    
-    #Add on the movement aisles
-    plane.append([-1,-1,-1,0,-1,-1,-1])
-    plane.append([-1,-1,-1,0,-1,-1,-1])
-    plane.insert(0, [-1,-1,-1,0,-1,-1,-1])
-    plane.insert(0, [-1,-1,-1,0,-1,-1,-1])
-    
+def simulation(Type, baggage, percentFast, randomiseBaggage, incremental=True,
+               rng=random, maxTimeSteps=None, skipIdle=True, observer=None,
+               sampleRate=1, layout=DEFAULT_LAYOUT, trace=None):
     #Create a list of passengers to board the plane
     #Assign them all a seat to go to
-    Passengers = assignSeats(Type, baggage, percentFast, randomiseBaggage)
+    Passengers = assignSeats(Type, baggage, percentFast, randomiseBaggage, rng, layout)
+    if incremental:
+        boarding = Boarding(Passengers, skipIdle, layout)
+        if trace is not None:
+            boarding.recorder = TraceWriter(trace, boarding)
+        try:
+            boarding.run(maxTimeSteps, observer, sampleRate)
+        finally:
+            #Closed even if boarding fails, so the trace can still be read
+            if trace is not None:
+                boarding.recorder.close(boarding)
+        if boarding.deadlock is not None:
+            raise boarding.deadlock
+        if not boarding.finished():
+            return -1
+        return boarding.timeSteps
+
+    return referenceSimulation(Passengers, maxTimeSteps, layout)
+
+"""
+    Function that runs the reference engine, which rebuilds the plane from
+    every passenger each time step and compares it with a full plane. It is
+    the simplest statement of the rules, and the other engines are checked
+    against it, see Equivalence.py.
+    Parameters:
+        Passengers : List(Passenger)
+            Passengers in the order they board, removed as they board
+        maxTimeSteps : int
+            If given, stop boarding after this many time steps
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+        onTimeStep : Function
+            If given, called after every time step with the time step, the
+            plane and the on board passengers
+    Returns:
+        Time steps taken for boarding to complete, -1 if it was stopped
+        after maxTimeSteps. Raises DeadlockError if nothing on the plane can
+        ever change again
+"""
+def referenceSimulation(Passengers, maxTimeSteps=None, layout=DEFAULT_LAYOUT, onTimeStep=None):
+    #Matrix representing the plane
+    #For the 737 the middle column [3] is the aisle, while [0-2] and [4-6]
+    #are the seats
+    #1 idencates that a person is there, 0 if not
+    plane = emptyPlane(layout)
       
     #Create a full plane for ending the simulation
-    fullPlane = [[1,1,1,0,1,1,1] for y in range(27)]
-    fullPlane.append([-1,-1,-1,0,-1,-1,-1])
-    fullPlane.append([-1,-1,-1,0,-1,-1,-1])
-    fullPlane.insert(0, [-1,-1,-1,0,-1,-1,-1])
-    fullPlane.insert(0, [-1,-1,-1,0,-1,-1,-1])
+    fullPlane = layout.fullPlane()
     
     #Main loop that runs till the plane is full
     OnBoardPassengers = []
+    occupancy = Occupancy()
     timeSteps = 0
-    seatedPassengers = []
-    unseatedPassengers = []
-    stuckTimer = 0
-    while plane != fullPlane:
-        if enter(plane, Passengers):
+    quiet = False
+    while not planeFull(plane, fullPlane):
+        #After a time step where nothing moved, check if the next one changes
+        #anything at all
+        before = passengerStates(OnBoardPassengers) if quiet else None
+        entered = enter(plane, Passengers)
+        if entered:
             passenger = Passengers.pop(0)
-            passenger.position = [0,3] 
+            passenger.position = [0, passenger.aisle] 
             OnBoardPassengers.append(passenger)
-        move(plane, OnBoardPassengers)
+            occupancy.board(passenger)
+        move(plane, OnBoardPassengers, occupancy, layout)
         oldplane = plane
-        plane = updatePlane(plane, OnBoardPassengers)
+        plane = updatePlane(plane, OnBoardPassengers, layout)
         
         timeSteps += 1
+        if onTimeStep is not None:
+            onTimeStep(timeSteps, plane, OnBoardPassengers)
+        if maxTimeSteps is not None and timeSteps >= maxTimeSteps and not planeFull(plane, fullPlane):
+            return -1
         
-        #Code that prints the plane layout if the simulation is stuck
-        #This seems to be impossible, however I've keep it incase a 1/1000000
-        #bug can occur.
-        if oldplane == plane:
-            stuckTimer -= 1
-        else:
-            stuckTimer = 0
-        if stuckTimer == 100:
-            printPlane(plane)
-            print("Simulation is Stuck")
-            break
-
-        numSeated, numUnseated = numSeatedPassengers(OnBoardPassengers) 
-        seatedPassengers.append(numSeated)
-        unseatedPassengers.append(numUnseated)
+        #A time step that changes nothing will be repeated forever
+        quiet = not entered and oldplane == plane
+        if quiet and before is not None and passengerStates(OnBoardPassengers) == before:
+            raise findDeadlock(OnBoardPassengers, occupancy, plane, timeSteps)
     
     return timeSteps
 
+"""
+    Function that runs the simulation while streaming what is happening on
+    the plane. Nothing is kept once it has been yielded, so many runs can be
+    analysed without storing their whole history.
+    Parameters:
+        Type : String
+            Strategy type to use
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float 
+            Percentage of passengers that walk quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        sampleRate : int
+            Number of time steps between each yield
+        rng : Random
+            Random number generator used to create the passengers
+        maxTimeSteps : int
+            If given, stop boarding after this many time steps
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+    Yields:
+        Dictionary with the time step and the number of passengers seated,
+        boarded, in the aisle, blocked in the aisle, waiting and moving for
+        someone, along with the occupancy of the aisle in each row
+"""
+def simulationTelemetry(Type, baggage, percentFast, randomiseBaggage, sampleRate=1,
+                        rng=random, maxTimeSteps=None, layout=DEFAULT_LAYOUT):
+    Passengers = assignSeats(Type, baggage, percentFast, randomiseBaggage, rng, layout)
+    return Boarding(Passengers, layout=layout).stream(sampleRate, maxTimeSteps)
+
 """
     Function that randomly generates a list of walking speeds for the 
-    passengers.
+    passengers. Passengers that aren't fast are slow 70% of the time and
+    very slow otherwise.
     Parameters:
             percentFast : float (0,1)
                 Percentage of passengers that walk quickly
+            numPassengers : int
+                Number of passengers
+            rng : Random
+                Random number generator to use, the random module by default
     Returns:
         List of walking speeds
 """
-def generateWalkingSpeeds(percentFast):
-    walkingSpeeds = []
-    for x in range(162):
-        number = random.random()
-        if number < percentFast:
-            walkingSpeeds.append(0)
-        else:
-            number = random.random()
-            if number < 0.7:
-                walkingSpeeds.append(1)
-            else:
-                walkingSpeeds.append(2)
-    return walkingSpeeds
+def generateWalkingSpeeds(percentFast, numPassengers=162, rng=random):
+    draw = rng.random
+    return [0 if draw() < percentFast else 1 if draw() < 0.7 else 2
+            for x in range(numPassengers)]
+
+"""
+    Function that generates a list of the baggage of the passengers.
+    Parameters:
+            baggage : int
+                Amount of baggage each passenger has
+            randomiseBaggage : Bool
+                If True randomise the amount of baggage each passenger has
+                from 0 to baggage
+            numPassengers : int
+                Number of passengers
+            rng : Random
+                Random number generator to use, the random module by default
+    Returns:
+        List of the baggage of each passenger
+"""
+def generateBaggage(baggage, randomiseBaggage, numPassengers=162, rng=random):
+    if not randomiseBaggage:
+        return [baggage] * numPassengers
+    #Same as randint(0, baggage) but without its overhead for every passenger
+    draw = rng.random
+    return [int(draw() * (baggage + 1)) for x in range(numPassengers)]
     
 """
     Function for counting the number of passengers that are seated or not.
@@ -270,7 +334,7 @@ def numSeatedPassengers(Passengers):
     numSeated = 0
     numUnseated = 0
     for passenger in Passengers:
-        if passenger.reachedDest():
+        if passenger.currRow == passenger.row and passenger.currColumn == passenger.column:
             numSeated += 1
         else:
             numUnseated += 1
@@ -290,6 +354,18 @@ def printPlane(plane):
     print("--------------------------------")
     return
     
+"""
+    Function that creates an empty plane layout.
+    Parameters:
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+    Returns:
+        Matrix representing the plane, with the movement aisles added to
+        the front and back
+"""
+def emptyPlane(layout=DEFAULT_LAYOUT):
+    return layout.emptyPlane()
+    
 """
     Function that updates the position of every passenger on the plane.
     If called after every move command as the current position of all 
@@ -299,19 +375,17 @@ def printPlane(plane):
             Layout of the plane
         Passengers : List(Passenger)
             List of all Passengers on the plane
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
     Return:
         The new plane layout
 """
-def updatePlane(plane, Passengers):
+def updatePlane(plane, Passengers, layout=DEFAULT_LAYOUT):
     #Reset plane
-    plane = [[0 for x in range(7)] for y in range(27)]
-    plane.append([-1,-1,-1,0,-1,-1,-1])
-    plane.append([-1,-1,-1,0,-1,-1,-1])
-    plane.insert(0, [-1,-1,-1,0,-1,-1,-1])
-    plane.insert(0, [-1,-1,-1,0,-1,-1,-1])
+    plane = emptyPlane(layout)
     
     for passenger in Passengers:
-        plane[passenger.getCurrRow()][passenger.getCurrColumn()] = 1
+        plane[passenger.currRow][passenger.currColumn] = 1
     return plane
 
 
@@ -322,94 +396,137 @@ def updatePlane(plane, Passengers):
             Layout of the plane
         Passengers : List(Passenger)
             List of all Passengers on the plane
+        occupancy : Occupancy
+            Index of the positions of the Passengers, built from Passengers if
+            not given
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
 """
-def move(plane, Passengers):
+def move(plane, Passengers, occupancy=None, layout=DEFAULT_LAYOUT):
+    if occupancy is None:
+        occupancy = Occupancy(Passengers)
     for passenger in Passengers:
         #Wating passengers don't move
-        if passenger.waiting == True:
-            #Once moving passengers are in the aisle move normally
-            if passenger.getWaitingOn(1).getCurrRow() == passenger.getWaitingOn(1).getRow() + 1:
-                passenger.waiting = False
-        
+        if passenger.waiting:
+            moveWaitingPassenger(passenger)
         #Move passengers need to move into the aisle and up one
-        elif passenger.move == True:
-            #Move out of seat
-            if not (passenger.getMovingFor().getCurrRow() == passenger.getMovingFor().getRow()):
-                if passenger.getCurrColumn() < 3:
-                    passenger.moveRight(plane)
-                elif passenger.getCurrColumn() > 3:
-                    passenger.moveLeft(plane)
-                elif passenger.getCurrRow() <= passenger.getRow() + 1:
-                    passenger.moveUp(plane)
-            else:
-                #Move back into seat
-                if passenger.getCurrRow() > passenger.getRow():
-                    passenger.moveDown(plane)
-                elif passenger.getCurrColumn() < passenger.getColumn():
-                    passenger.moveRight(plane)
-                elif passenger.getCurrColumn() > passenger.getColumn():
-                    passenger.moveLeft(plane)
-                else:
-                    passenger.move = False
-        elif passenger.reachedDest():
+        elif passenger.move:
+            moveMovingPassenger(passenger, plane, occupancy)
+        elif passenger.currRow == passenger.row and passenger.currColumn == passenger.column:
            continue
         else:
-            #Normal move pattern
-            if passenger.getCurrRow() < passenger.getRow():
-                #Only move up if waiting or there are no moving passengers
-                if passenger.getCurrRow() == (passenger.getRow() - 1) or \
-                        not (checkPassengerMove(Passengers, [passenger.getCurrRow() + 1, 5])
-                        or checkPassengerMove(Passengers, [passenger.getCurrRow() + 1, 1])
-                        or checkPassengerMove(Passengers, [passenger.getCurrRow() + 1, 2])
-                        or checkPassengerMove(Passengers, [passenger.getCurrRow() + 1, 4])
-                        or checkPassengerMove(Passengers, [passenger.getCurrRow() + 2, 3])
-                        or checkPassengerMove(Passengers, [passenger.getCurrRow() + 3, 3])):
-                    passenger.moveUp(plane)
-            else:
-                if passenger.getCurrColumn() < passenger.getColumn():
-                    passenger.moveRight(plane)
-                if passenger.getCurrColumn() > passenger.getColumn():
-                    passenger.moveLeft(plane)
-            
-            if passenger.getCurrRow() == (passenger.getRow() - 1):
-                #Flags passengers that have to wait for other passengers to move
-                if passenger.getColumn() == 0:
-                    if passengerCheck(Passengers, [passenger.getRow(), 1], False):
-                        flagPassengers([passenger.getRow(), 1], passenger, Passengers)
-                    if passengerCheck(Passengers, [passenger.getRow(), 2], False):
-                        flagPassengers([passenger.getRow(), 2], passenger,  Passengers)
-                    if passengerSeatCheck(Passengers, [passenger.getRow(), 3], [passenger.getRow(), 1]):
-                        flagPassengers([passenger.getRow(), 3], passenger,  Passengers)
-                    if passengerSeatCheck(Passengers, [passenger.getRow(), 3], [passenger.getRow(), 2]):
-                        flagPassengers([passenger.getRow(), 3], passenger,  Passengers)
-                elif passenger.getColumn() == 1:
-                    if passengerCheck(Passengers, [passenger.getRow(), 2], True):
-                        flagPassengers([passenger.getRow(), 2], passenger,  Passengers)
-                    if passengerSeatCheck(Passengers, [passenger.getRow(), 3], [passenger.getRow(), 2]):
-                        flagPassengers([passenger.getRow(), 3], passenger,  Passengers)
-                elif passenger.getColumn() == 6:
-                    if passengerCheck(Passengers, [passenger.getRow(), 5], False):
-                        flagPassengers([passenger.getRow(), 5], passenger,  Passengers)
-                    if passengerCheck(Passengers, [passenger.getRow(), 4], False):
-                        flagPassengers([passenger.getRow(), 4], passenger,  Passengers)
-                    if passengerSeatCheck(Passengers, [passenger.getRow(), 3], [passenger.getRow(), 5]):
-                        flagPassengers([passenger.getRow(), 3], passenger,  Passengers)
-                    if passengerSeatCheck(Passengers, [passenger.getRow(), 3], [passenger.getRow(), 4]):
-                        flagPassengers([passenger.getRow(), 3], passenger,  Passengers)
-                elif passenger.getColumn() == 5:
-                    if passengerCheck(Passengers, [passenger.getRow(), 4], True):
-                        flagPassengers([passenger.getRow(), 4], passenger,  Passengers)
-                    if passengerSeatCheck(Passengers, [passenger.getRow(), 3], [passenger.getRow(), 4]):
-                        flagPassengers([passenger.getRow(), 3], passenger,  Passengers)
-            
+            moveNormalPassenger(passenger, plane, occupancy, layout)
     return
 
+"""
+    Function that checks if a waiting passenger can stop waiting.
+    Parameters:
+        passenger : Passenger
+            Passenger who is waiting
+"""
+def moveWaitingPassenger(passenger):
+    #Once moving passengers are in the aisle move normally
+    other = passenger.waitingOn[1]
+    if other.currRow == other.row + 1:
+        passenger.waiting = False
+
+"""
+    Function that moves a passenger who is moving out of the way for
+    another passenger, then back into their seat once they are seated.
+    Parameters:
+        passenger : Passenger
+            Passenger who is moving
+        plane : List(List(int))
+            Layout of the plane
+        occupancy : Occupancy
+            Index of the on board passengers
+"""
+def moveMovingPassenger(passenger, plane, occupancy):
+    other = passenger.movingFor
+    #Move out of seat
+    if other.currRow != other.row:
+        if passenger.currColumn < passenger.aisle:
+            passenger.moveRight(plane, occupancy)
+        elif passenger.currColumn > passenger.aisle:
+            passenger.moveLeft(plane, occupancy)
+        elif passenger.currRow <= passenger.row + 1:
+            passenger.moveUp(plane, occupancy)
+    else:
+        #Move back into seat
+        if passenger.currRow > passenger.row:
+            passenger.moveDown(plane, occupancy)
+        elif passenger.currColumn < passenger.column:
+            passenger.moveRight(plane, occupancy)
+        elif passenger.currColumn > passenger.column:
+            passenger.moveLeft(plane, occupancy)
+        else:
+            passenger.move = False
+
+"""
+    Function that moves a passenger towards their seat, flagging anyone in
+    their way once they reach the row before theirs.
+    Parameters:
+        passenger : Passenger
+            Passenger to move
+        plane : List(List(int))
+            Layout of the plane
+        occupancy : Occupancy
+            Index of the on board passengers
+        layout : CabinLayout
+            Cabin of the plane
+"""
+def moveNormalPassenger(passenger, plane, occupancy, layout):
+    row = passenger.row
+    currRow = passenger.currRow
+    if currRow < row:
+        #Only move up if waiting or there are no moving passengers
+        aisle = passenger.aisle
+        if currRow == (row - 1):
+            passenger.moveUp(plane, occupancy)
+        elif not (checkPassengerMove(occupancy, [currRow + 2, aisle])
+                  or checkPassengerMove(occupancy, [currRow + 3, aisle])):
+            for column in layout.movingColumns[aisle]:
+                if checkPassengerMove(occupancy, [currRow + 1, column]):
+                    break
+            else:
+                passenger.moveUp(plane, occupancy)
+    else:
+        if passenger.currColumn < passenger.column:
+            passenger.moveRight(plane, occupancy)
+        if passenger.currColumn > passenger.column:
+            passenger.moveLeft(plane, occupancy)
+    
+    if passenger.currRow == (row - 1):
+        flagRow(passenger, occupancy, layout)
+
+"""
+    Function that flags passengers that have to move out of the way for a
+    passenger about to reach their row.
+    For the 737 a window seat passenger checks both seats next to them, and
+    a middle seat passenger only the aisle seat.
+    Parameters:
+        passenger : Passenger
+            Passenger about to reach their row
+        occupancy : Occupancy
+            Index of the on board passengers
+        layout : CabinLayout
+            Cabin of the plane
+"""
+def flagRow(passenger, occupancy, layout):
+    row = passenger.row
+    for check, column in layout.flagChecks.get(passenger.column, ()):
+        if check == "aisle":
+            if passengerSeatCheck(occupancy, [row, passenger.aisle], [row, column]):
+                flagPassengers([row, passenger.aisle], passenger, occupancy)
+        elif passengerCheck(occupancy, [row, column], check == "seated"):
+            flagPassengers([row, column], passenger, occupancy)
+
 """
     Function that checks if the passenger at a given position is seating in
     a given position
     Parameters:
-        Passengers : List(Passenger)
-            List of on board passengers
+        occupancy : Occupancy
+            Index of the on board passengers
         position : [int, int]
             Position to check
         seat : [int, int]
@@ -417,11 +534,10 @@ def move(plane, Passengers):
     Return:
         True if passenger is in position and their seat is the same.
 """
-def passengerSeatCheck(Passengers, position, seat):
-    for passenger in Passengers:
-        if passenger.position == position:
-            if passenger.seat == seat:
-                return True
+def passengerSeatCheck(occupancy, position, seat):
+    for passenger in occupancy.passengersAt(position):
+        if passenger.row == seat[0] and passenger.column == seat[1]:
+            return True
     return False
 
 
@@ -430,8 +546,8 @@ def passengerSeatCheck(Passengers, position, seat):
     Additionally, will check if the position is the seat of the passenger if
     needed.
     Parameters:
-        Passengers : List(Passenger)
-            List of on board passengers
+        occupancy : Occupancy
+            Index of the on board passengers
         position : [int, int]
             Position to check
         checkSeat : Bool
@@ -439,30 +555,29 @@ def passengerSeatCheck(Passengers, position, seat):
     Return:
         True if passenger is in position, False otherwise
 """
-def passengerCheck(Passengers, position, checkSeat):
-    for passenger in Passengers:
-        if passenger.position == position:
-            if checkSeat:
-                return passenger.seat == position
-            else:
-                return True
-    return False
+def passengerCheck(occupancy, position, checkSeat):
+    passenger = occupancy.passengerAt(position)
+    if passenger is None:
+        return False
+    if checkSeat:
+        return passenger.row == position[0] and passenger.column == position[1]
+    return True
 
 
 """
     Function that checks if the passenger in a position is moving out of the
     way for another passenger.
     Parameters:
-        Passengers : List(Passenger)
-            List of on board passengers
+        occupancy : Occupancy
+            Index of the on board passengers
         position : [int, int]
             Position to check
     Return:
         True if passenger in position is set to move, False otherwise
 """
-def checkPassengerMove(Passengers, position):
-    for passenger in Passengers:
-        if passenger.position == position and passenger.move:
+def checkPassengerMove(occupancy, position):
+    for passenger in occupancy.passengersAt(position):
+        if passenger.move:
             return True
     return False
 
@@ -474,19 +589,34 @@ def checkPassengerMove(Passengers, position):
             Position to flag
         person : Passenger
             Passenger who is waiting
-        Passengers : List(Passenger)
-            List of on board passengers
+        occupancy : Occupancy
+            Index of the on board passengers
 """
-def flagPassengers(position, person, Passengers):
+def flagPassengers(position, person, occupancy):
     person.waiting = True
-    for passenger in Passengers:
-        if passenger.position == position:
-            passenger.move = True
-            person.setWaitingOn(passenger)
-            passenger.setMovingFor(person)
-            return 
+    passenger = occupancy.passengerAt(position)
+    if passenger is not None:
+        if occupancy.flagged is not None:
+            occupancy.flagged.append(passenger)
+        passenger.move = True
+        person.setWaitingOn(passenger)
+        passenger.setMovingFor(person)
     return
 
+"""
+    Function that checks if boarding is finished by comparing the plane
+    with a full plane.
+    Parameters:
+        plane : List(List(int))
+            Layout of the plane
+        fullPlane : List(List(int))
+            Layout of the plane once every passenger is seated
+    Return:
+        True if every seat is taken and nobody is standing
+"""
+def planeFull(plane, fullPlane):
+    return plane == fullPlane
+
 """
     Function that checks if a passenger can currently enter the plane.
     Parameters:
@@ -498,21 +628,159 @@ def flagPassengers(position, person, Passengers):
         True if the next passenger can enter the plane, False otherwise.
 """
 def enter(plane, Passengers):
-    if Passengers == []:
+    if not Passengers:
         return False
-    if plane[0][3] == 0:
-        plane[0][3] = 1
+    #Passengers enter at the front of the aisle they need
+    aisle = Passengers[0].aisle
+    if plane[0][aisle] == 0:
+        plane[0][aisle] = 1
         return True
     return False
 
+"""
+    Function that gets everything about the passengers that a time step can
+    change, to check if a time step changed anything.
+    Parameters:
+        Passengers : List(Passenger)
+            List of all Passengers on the plane
+    Return:
+        List of the position, flags and counters of each passenger
+"""
+def passengerStates(Passengers):
+    return [(passenger.currRow, passenger.currColumn, passenger.waiting, passenger.move,
+             passenger.walkCooldown, passenger.baggage) for passenger in Passengers]
+
+"""
+    Function that finds the passengers a passenger is waiting for, the
+    edges of the wait-for graph. These are the passengers they are waiting
+    on, the passengers in the position they need to move into, and for
+    passengers walking to their row, anyone ahead moving out of the way.
+    Parameters:
+        passenger : Passenger
+            Passenger to check
+        occupancy : Occupancy
+            Index of the on board passengers
+    Return:
+        List of passengers
+"""
+def blockingPassengers(passenger, occupancy):
+    if passenger.waiting:
+        return [other for other in passenger.waitingOn if other != 0]
+    row = passenger.currRow
+    column = passenger.currColumn
+    blocking = []
+    if passenger.move:
+        other = passenger.movingFor
+        if other.currRow != other.row:
+            if column != passenger.aisle:
+                target = (row, column + 1 if column < passenger.aisle else column - 1)
+            elif row <= passenger.row + 1:
+                target = (row + 1, column)
+            else:
+                #Out of the way, waiting for other to sit down
+                return [other]
+        elif row > passenger.row:
+            target = (row - 1, column)
+        else:
+            target = (row, column + 1 if column < passenger.column else column - 1)
+    elif row < passenger.row:
+        target = (row + 1, column)
+        for position in ((row + 2, column), (row + 3, column)):
+            blocking.extend(other for other in occupancy.passengersAt(position) if other.move)
+    else:
+        target = (row, column + 1 if column < passenger.column else column - 1)
+    blocking.extend(other for other in occupancy.passengersAt(target) if other is not passenger)
+    return blocking
+
+"""
+    Function that finds the passengers involved in a deadlock. If the
+    wait-for graph has a cycle, those are the passengers in it, otherwise
+    every passenger who hasn't finished moving.
+    Parameters:
+        Passengers : List(Passenger)
+            List of all Passengers on the plane
+        occupancy : Occupancy
+            Index of the on board passengers
+        plane : List(List(int))
+            Layout of the plane
+        timeStep : int
+            Time step the deadlock was found at
+    Return:
+        DeadlockError describing the deadlock
+"""
+def findDeadlock(Passengers, occupancy, plane, timeStep):
+    stuck = [passenger for passenger in Passengers
+             if passenger.waiting or passenger.move or not passenger.reachedDest()]
+    graph = {passenger: blockingPassengers(passenger, occupancy) for passenger in stuck}
+    #Depth first search, a passenger reached again while still on the path
+    #is in a cycle
+    finished = set()
+    for start in stuck:
+        if start in finished:
+            continue
+        path = [start]
+        onPath = {start: 0}
+        edges = [iter(graph[start])]
+        while path:
+            other = next(edges[-1], None)
+            if other is None:
+                passenger = path.pop()
+                del onPath[passenger]
+                finished.add(passenger)
+                edges.pop()
+            elif other in onPath:
+                return DeadlockError(path[onPath[other]:], timeStep, True, plane)
+            elif other in graph and other not in finished:
+                onPath[other] = len(path)
+                path.append(other)
+                edges.append(iter(graph[other]))
+    return DeadlockError(stuck, timeStep, False, plane)
+
+class DeadlockError(Exception):
+    """
+    This exception is raised when boarding can't finish because nothing on
+    the plane can ever change again.
+    Attributes:
+        passengers : List(Passenger)
+            Passengers involved, in the order they wait for each other if
+            they form a cycle
+        timeStep : int
+            Time step the deadlock was found at
+        cycle : Bool
+            True if the passengers are waiting for each other in a cycle
+        plane : List(List(int))
+            Layout of the plane
+    """
+
+    def __init__(self, passengers, timeStep, cycle, plane):
+        super().__init__(passengers, timeStep, cycle, plane)
+        self.passengers = passengers
+        self.timeStep = timeStep
+        self.cycle = cycle
+        self.plane = plane
+
+    def __str__(self):
+        kind = "waiting for each other" if self.cycle else "unable to move"
+        return ("Boarding deadlocked at time step " + str(self.timeStep) + " with "
+                + str(len(self.passengers)) + " passengers " + kind + ": "
+                + ", ".join("seat " + str(passenger.seat) + " at " + str(passenger.position)
+                            for passenger in self.passengers))
+
 class Passenger:
     """
     This class represents a passenger for the plane.
+    The seat and position are stored as separate integers and the class uses
+    __slots__, as passengers are looked at many times every time step. seat
+    and position can still be read and set as [int, int] lists.
     Attributes:
         seat : [int, int]
             The seat the passenger wishes to reach
+        row, column : int
+            The row and column of the seat
         position : [int, int]
             The current position of the passenger
+        currRow, currColumn : int
+            The row and column of the current position
         waiting : Bool
             True if the passenger is waiting for someone to move out of the way
         waitingOn : [Passenger, Passenger]
@@ -527,12 +795,17 @@ class Passenger:
             The number of time steps taken to move one position
         walkingCooldown : int
             The number time steps until the passenger can walk again
+        aisle : int
+            The column of the aisle the passenger reaches their seat from
     """
+    __slots__ = ("row", "column", "currRow", "currColumn", "waiting", "waitingOn",
+                 "move", "movingFor", "baggage", "walkingSpeed", "walkCooldown", "aisle")
     
-    def __init__(self, seat, baggage, walkingSpeed):
-        self.seat = seat
+    def __init__(self, seat, baggage, walkingSpeed, aisle=3):
+        self.row, self.column = seat
         #Passengers not on the plane are at position [-1,-1]
-        self.position = [-1,-1]
+        self.currRow = -1
+        self.currColumn = -1
         self.waiting = False
         self.waitingOn = [0, 0]
         self.move = False
@@ -540,53 +813,78 @@ class Passenger:
         self.baggage = baggage
         self.walkingSpeed = walkingSpeed
         self.walkCooldown = 0
+        self.aisle = aisle
+    
+    @property
+    def seat(self):
+        return [self.row, self.column]
+    
+    @seat.setter
+    def seat(self, seat):
+        self.row, self.column = seat
+    
+    @property
+    def position(self):
+        return [self.currRow, self.currColumn]
+    
+    @position.setter
+    def position(self, position):
+        self.currRow, self.currColumn = position
         
     def getRow(self):
-        return self.seat[0]
+        return self.row
     
     def getCurrRow(self):
-        return self.position[0]
+        return self.currRow
         
     def getColumn(self):
-        return self.seat[1]
+        return self.column
         
     def getCurrColumn(self):
-        return self.position[1]
+        return self.currColumn
         
-    def moveDown(self, plane):
+    def moveDown(self, plane, occupancy=None):
         #Only move if the position to move to is free
-        if plane[self.position[0] - 1][self.position[1]] == 0:
+        if plane[self.currRow - 1][self.currColumn] == 0:
             if self.walkCooldown == 0:
-                self.position[0] -= 1
+                self.currRow -= 1
                 self.walkCooldown = self.walkingSpeed
+                if occupancy is not None:
+                    occupancy.relocate(self, self.currRow + 1, self.currColumn)
             else:
                 self.walkCooldown -= 1    
 
-    def moveUp(self, plane):
-        if plane[self.position[0] + 1][self.position[1]] == 0:
+    def moveUp(self, plane, occupancy=None):
+        if plane[self.currRow + 1][self.currColumn] == 0:
             if self.walkCooldown == 0:
-                self.position[0] += 1
+                self.currRow += 1
                 self.walkCooldown = self.walkingSpeed
+                if occupancy is not None:
+                    occupancy.relocate(self, self.currRow - 1, self.currColumn)
             else:
                 self.walkCooldown -= 1   
         
-    def moveLeft(self, plane):
+    def moveLeft(self, plane, occupancy=None):
         if self.baggage == 0:
-            if plane[self.position[0]][self.position[1] - 1] == 0:
+            if plane[self.currRow][self.currColumn - 1] == 0:
                 if self.walkCooldown == 0:
-                    self.position[1] -= 1
+                    self.currColumn -= 1
                     self.walkCooldown = self.walkingSpeed
+                    if occupancy is not None:
+                        occupancy.relocate(self, self.currRow, self.currColumn + 1)
                 else:
                     self.walkCooldown -= 1   
         else:
             self.baggage -= 1
         
-    def moveRight(self, plane):
+    def moveRight(self, plane, occupancy=None):
         if self.baggage == 0:
-            if plane[self.position[0]][self.position[1] + 1] == 0:
+            if plane[self.currRow][self.currColumn + 1] == 0:
                 if self.walkCooldown == 0:
-                    self.position[1] += 1
+                    self.currColumn += 1
                     self.walkCooldown = self.walkingSpeed
+                    if occupancy is not None:
+                        occupancy.relocate(self, self.currRow, self.currColumn - 1)
                 else:
                     self.walkCooldown -= 1   
         else:
@@ -610,4 +908,320 @@ class Passenger:
         return self.movingFor
     
     def reachedDest(self):
-        return self.position == self.seat
\ No newline at end of file
+        return self.currRow == self.row and self.currColumn == self.column
+
+class Occupancy:
+    """
+    This class is an index of which passengers are in each position of the
+    plane, so passengers can be looked up by position without scanning every
+    passenger on board.
+    Attributes:
+        cells : {(int, int): List(Passenger)}
+            The passengers in each occupied position, in the order they boarded
+        order : {Passenger: int}
+            The order in which each passenger boarded
+        moves : List((Passenger, int, int))
+            If not None, each passenger that moves is recorded along with the
+            row and column they moved from
+        flagged : List(Passenger)
+            If not None, each passenger flagged to move is recorded
+    """
+    
+    def __init__(self, Passengers=()):
+        self.cells = {}
+        self.order = {}
+        self.moves = None
+        self.flagged = None
+        for passenger in Passengers:
+            self.board(passenger)
+    
+    def board(self, passenger):
+        #Passengers board last so they go to the back of their position
+        self.order[passenger] = len(self.order)
+        position = (passenger.currRow, passenger.currColumn)
+        if position in self.cells:
+            self.cells[position].append(passenger)
+        else:
+            self.cells[position] = [passenger]
+    
+    def relocate(self, passenger, oldRow, oldColumn):
+        #Called after a passenger has moved from [oldRow, oldColumn]
+        occupants = self.cells[(oldRow, oldColumn)]
+        if len(occupants) == 1:
+            del self.cells[(oldRow, oldColumn)]
+        else:
+            occupants.remove(passenger)
+        if self.moves is not None:
+            self.moves.append((passenger, oldRow, oldColumn))
+        position = (passenger.currRow, passenger.currColumn)
+        occupants = self.cells.get(position)
+        if occupants is None:
+            self.cells[position] = [passenger]
+            return
+        #Keep boarding order so lookups match a scan of the on board passengers
+        rank = self.order[passenger]
+        index = len(occupants)
+        while index > 0 and self.order[occupants[index - 1]] > rank:
+            index -= 1
+        occupants.insert(index, passenger)
+    
+    def passengerAt(self, position):
+        occupants = self.cells.get((position[0], position[1]))
+        if occupants:
+            return occupants[0]
+        return None
+    
+    def passengersAt(self, position):
+        return self.cells.get((position[0], position[1]), ())
+
+class Boarding:
+    """
+    This class runs the boarding of the plane one time step at a time.
+    The plane layout is updated in place from the moves made each time step
+    and boarding finishes once every passenger is seated, so the plane never
+    needs to be rebuilt or compared against a full plane.
+    Attributes:
+        plane : List(List(int))
+            Layout of the plane at the start of the time step
+        Passengers : deque(Passenger)
+            Passengers still waiting to board
+        OnBoardPassengers : List(Passenger)
+            Passengers on the plane, in the order they boarded
+        active : List(Passenger)
+            On board passengers who can still do something, that is everyone
+            not sat in their seat or sat but flagged to move, in the order
+            they boarded
+        activeSet : Set(Passenger)
+            Passengers in active
+        occupancy : Occupancy
+            Index of the positions of the on board passengers
+        numPassengers : int
+            Number of passengers boarding the plane
+        numSeated : int
+            Number of passengers currently in their seat
+        timeSteps : int
+            Number of time steps run so far
+        deadlock : DeadlockError
+            Set once nothing on the plane can ever change again, None until
+            then
+        skipIdle : Bool
+            If True, skip over time steps where the only thing happening is
+            passengers counting down their walkCooldown or baggage
+        quiet : Bool
+            True if nobody boarded or moved in the last time step
+        layout : CabinLayout
+            Cabin of the plane
+        recorder : TraceWriter
+            If not None, called after every time step that is run to record
+            what happened
+    """
+    
+    def __init__(self, Passengers, skipIdle=True, layout=DEFAULT_LAYOUT):
+        self.layout = layout
+        self.plane = emptyPlane(layout)
+        self.Passengers = deque(Passengers)
+        self.OnBoardPassengers = []
+        self.active = []
+        self.activeSet = set()
+        self.occupancy = Occupancy()
+        self.occupancy.moves = []
+        self.occupancy.flagged = []
+        self.numPassengers = len(self.Passengers)
+        self.numSeated = 0
+        self.timeSteps = 0
+        self.deadlock = None
+        self.skipIdle = skipIdle
+        self.quiet = False
+        self.recorder = None
+    
+    def finished(self):
+        return self.numSeated == self.numPassengers
+    
+    def step(self):
+        #Returns the number of positions on the plane that changed
+        entered = enter(self.plane, self.Passengers)
+        if entered:
+            passenger = self.Passengers.popleft()
+            passenger.currRow = 0
+            passenger.currColumn = passenger.aisle
+            self.OnBoardPassengers.append(passenger)
+            self.active.append(passenger)
+            self.activeSet.add(passenger)
+            self.occupancy.board(passenger)
+        self.moveActive()
+        self.timeSteps += 1
+        self.quiet = not entered and not self.occupancy.moves
+        if self.recorder is not None:
+            self.recorder.record(self, entered)
+        return self.applyMoves()
+    
+    def idleStep(self, maxTimeSteps=None):
+        #Runs a time step, and if nobody boarded, moved or changed what they
+        #were doing, skips ahead to the next time step where someone can if
+        #skipIdle is set, or sets deadlock if nobody ever can.
+        #Returns the number of positions on the plane that changed.
+        #Seated passengers only act once someone who isn't seated flags them
+        active = list(self.active)
+        before = [(passenger.walkCooldown, passenger.baggage, passenger.waiting, passenger.move)
+                  for passenger in active]
+        changed = self.step()
+        if not self.quiet:
+            return changed
+        #Passengers counting down, along with whether it is their baggage
+        counting = []
+        for passenger, (walkCooldown, baggage, waiting, moving) in zip(active, before):
+            if passenger.waiting != waiting or passenger.move != moving:
+                return changed
+            if passenger.walkCooldown != walkCooldown:
+                counting.append((passenger, False))
+            elif passenger.baggage != baggage:
+                counting.append((passenger, True))
+        #If nobody is counting down nothing will ever change again
+        if not counting:
+            self.deadlock = findDeadlock(self.OnBoardPassengers, self.occupancy, self.plane,
+                                         self.timeSteps)
+            return changed
+        if not self.skipIdle:
+            return changed
+        #Until a counter reaches 0 every following time step does exactly the
+        #same as this one, so those time steps can be done all at once
+        skip = min(passenger.baggage if isBaggage else passenger.walkCooldown
+                   for passenger, isBaggage in counting)
+        if maxTimeSteps is not None:
+            skip = min(skip, maxTimeSteps - self.timeSteps)
+        if skip <= 0:
+            return changed
+        for passenger, isBaggage in counting:
+            if isBaggage:
+                passenger.baggage -= skip
+            else:
+                passenger.walkCooldown -= skip
+        self.timeSteps += skip
+        return changed
+    
+    def moveActive(self):
+        #Same as move() but only for the active passengers. Passengers who
+        #sit down are retired, and seated passengers flagged to move are put
+        #back in boarding order, so they still move this time step if they
+        #boarded after whoever flagged them.
+        active = self.active
+        activeSet = self.activeSet
+        occupancy = self.occupancy
+        flagged = occupancy.flagged
+        i = 0
+        while i < len(active):
+            passenger = active[i]
+            if passenger.waiting:
+                moveWaitingPassenger(passenger)
+            elif passenger.move:
+                moveMovingPassenger(passenger, self.plane, occupancy)
+            elif passenger.currRow != passenger.row or passenger.currColumn != passenger.column:
+                moveNormalPassenger(passenger, self.plane, occupancy, self.layout)
+            if flagged:
+                for other in flagged:
+                    if other not in activeSet:
+                        activeSet.add(other)
+                        index = bisect_left(active, occupancy.order[other],
+                                            key=occupancy.order.__getitem__)
+                        active.insert(index, other)
+                        if index <= i:
+                            i += 1
+                flagged.clear()
+            if (not passenger.waiting and not passenger.move
+                    and passenger.currRow == passenger.row
+                    and passenger.currColumn == passenger.column):
+                del active[i]
+                activeSet.discard(passenger)
+            else:
+                i += 1
+    
+    def applyMoves(self):
+        #The plane isn't changed during move() so every passenger sees the
+        #layout from the start of the time step
+        plane = self.plane
+        cells = self.occupancy.cells
+        changed = 0
+        for passenger, oldRow, oldColumn in self.occupancy.moves:
+            if passenger.row == oldRow and passenger.column == oldColumn:
+                self.numSeated -= 1
+            elif passenger.reachedDest():
+                self.numSeated += 1
+            if plane[oldRow][oldColumn] == 1 and (oldRow, oldColumn) not in cells:
+                plane[oldRow][oldColumn] = 0
+                changed += 1
+            if plane[passenger.currRow][passenger.currColumn] == 0:
+                plane[passenger.currRow][passenger.currColumn] = 1
+                changed += 1
+        self.occupancy.moves.clear()
+        return changed
+    
+    def advance(self, maxTimeSteps=None):
+        #Runs the next time step, or several if they can be skipped.
+        #Returns False if the simulation is deadlocked.
+        #Only look for time steps to skip, or a deadlock, after one where
+        #nobody moved
+        if self.quiet:
+            self.idleStep(maxTimeSteps)
+        else:
+            self.step()
+        return self.deadlock is None
+    
+    def run(self, maxTimeSteps=None, observer=None, sampleRate=1):
+        #Stops early if maxTimeSteps is reached, leaving boarding unfinished
+        if observer is not None:
+            for snapshot in self.stream(sampleRate, maxTimeSteps):
+                observer(snapshot)
+            return self.timeSteps
+        while not self.finished():
+            if maxTimeSteps is not None and self.timeSteps >= maxTimeSteps:
+                break
+            if not self.advance(maxTimeSteps):
+                break
+        return self.timeSteps
+    
+    def stream(self, sampleRate=1, maxTimeSteps=None):
+        #Same as run() but yields the telemetry of every sampleRate time step
+        while not self.finished():
+            if maxTimeSteps is not None and self.timeSteps >= maxTimeSteps:
+                break
+            previous = self.timeSteps
+            running = self.advance(maxTimeSteps)
+            #Skipped time steps all look the same as the last one run
+            snapshot = None
+            for timeStep in range(previous + 1, self.timeSteps + 1):
+                if timeStep % sampleRate == 0:
+                    if snapshot is None:
+                        snapshot = self.telemetry()
+                    yield dict(snapshot, timeStep=timeStep)
+            if not running:
+                break
+    
+    def telemetry(self):
+        #Counts of what the passengers on board are currently doing
+        inAisle = 0
+        blocked = 0
+        waiting = 0
+        moving = 0
+        for passenger in self.OnBoardPassengers:
+            if passenger.waiting:
+                waiting += 1
+            elif passenger.move:
+                moving += 1
+            if passenger.currColumn == passenger.aisle:
+                inAisle += 1
+                #Passengers walking to their row that can't step forward
+                if (not passenger.waiting and not passenger.move
+                        and passenger.currRow < passenger.row
+                        and self.plane[passenger.currRow + 1][passenger.aisle] != 0):
+                    blocked += 1
+        return {
+            "timeStep": self.timeSteps,
+            "seated": self.numSeated,
+            "boarded": len(self.OnBoardPassengers),
+            "inAisle": inAisle,
+            "blocked": blocked,
+            "waiting": waiting,
+            "moving": moving,
+            "aisle": [sum(row[aisle] for aisle in self.layout.aisleColumns)
+                      for row in self.plane],
+        }
@@ -0,0 +1,218 @@
+from collections import deque
+from Project import Passenger, Occupancy, Boarding
+
+class BoardingSnapshot:
+    """
+    This class stores the state of a boarding between time steps so any
+    number of boardings can be continued from it. Passengers are numbered,
+    on board passengers first in the order they boarded then the queue, and
+    passengers that refer to each other store those numbers, so a snapshot
+    is a few tuples of integers that are much quicker to take and restore
+    than a deepcopy of the passengers.
+    Attributes:
+        layout : CabinLayout
+            Cabin of the plane
+        plane : Tuple(Tuple(int))
+            Layout of the plane
+        passengers : Tuple(Tuple)
+            row, column, currRow, currColumn, waiting, move, baggage,
+            walkingSpeed, walkCooldown and aisle of each passenger
+        links : Tuple((int, int, int))
+            waitingOn and movingFor of each passenger, as passenger numbers,
+            -1 for nobody
+        numOnBoard : int
+            Number of passengers that have boarded
+        numPassengers, numSeated, timeSteps : int
+            Counters of the boarding
+        deadlock : DeadlockError
+            Deadlock of the boarding, None if it isn't deadlocked
+        skipIdle, quiet : Bool
+            Idle skipping state of the boarding
+        rngState : Tuple
+            State of the random number generator given, None if not given
+    """
+
+    def __init__(self, boarding, rng=None):
+        Passengers = boarding.OnBoardPassengers + list(boarding.Passengers)
+        numbers = {passenger: number for number, passenger in enumerate(Passengers)}
+        numbers[0] = -1
+        self.layout = boarding.layout
+        self.plane = tuple(tuple(row) for row in boarding.plane)
+        self.passengers = tuple((passenger.row, passenger.column, passenger.currRow,
+                                 passenger.currColumn, passenger.waiting, passenger.move,
+                                 passenger.baggage, passenger.walkingSpeed,
+                                 passenger.walkCooldown, passenger.aisle)
+                                for passenger in Passengers)
+        self.links = tuple((numbers[passenger.waitingOn[0]], numbers[passenger.waitingOn[1]],
+                            numbers[passenger.movingFor])
+                           for passenger in Passengers)
+        self.numOnBoard = len(boarding.OnBoardPassengers)
+        self.numPassengers = boarding.numPassengers
+        self.numSeated = boarding.numSeated
+        self.timeSteps = boarding.timeSteps
+        self.deadlock = boarding.deadlock
+        self.skipIdle = boarding.skipIdle
+        self.quiet = boarding.quiet
+        self.rngState = rng.getstate() if rng is not None else None
+
+    def restore(self, rng=None):
+        #Creates a new boarding in the state of the snapshot, and puts rng
+        #back to the state it was snapshotted with
+        Passengers = []
+        new = Passenger.__new__
+        for (row, column, currRow, currColumn, waiting, moving, baggage, walkingSpeed,
+             walkCooldown, aisle) in self.passengers:
+            passenger = new(Passenger)
+            passenger.row = row
+            passenger.column = column
+            passenger.currRow = currRow
+            passenger.currColumn = currColumn
+            passenger.waiting = waiting
+            passenger.move = moving
+            passenger.baggage = baggage
+            passenger.walkingSpeed = walkingSpeed
+            passenger.walkCooldown = walkCooldown
+            passenger.aisle = aisle
+            Passengers.append(passenger)
+        for passenger, (first, second, movingFor) in zip(Passengers, self.links):
+            passenger.waitingOn = [0 if first < 0 else Passengers[first],
+                                   0 if second < 0 else Passengers[second]]
+            passenger.movingFor = 0 if movingFor < 0 else Passengers[movingFor]
+
+        boarding = Boarding.__new__(Boarding)
+        boarding.layout = self.layout
+        boarding.plane = [list(row) for row in self.plane]
+        boarding.OnBoardPassengers = Passengers[:self.numOnBoard]
+        boarding.Passengers = deque(Passengers[self.numOnBoard:])
+        boarding.occupancy = Occupancy(boarding.OnBoardPassengers)
+        boarding.occupancy.moves = []
+        boarding.occupancy.flagged = []
+        boarding.active = [passenger for passenger in boarding.OnBoardPassengers
+                           if passenger.waiting or passenger.move or not passenger.reachedDest()]
+        boarding.activeSet = set(boarding.active)
+        boarding.numPassengers = self.numPassengers
+        boarding.numSeated = self.numSeated
+        boarding.timeSteps = self.timeSteps
+        boarding.deadlock = self.deadlock
+        boarding.skipIdle = self.skipIdle
+        boarding.quiet = self.quiet
+        boarding.recorder = None
+        if rng is not None and self.rngState is not None:
+            rng.setstate(self.rngState)
+        return boarding
+
+"""
+    Function that creates several copies of a boarding to continue in
+    different ways.
+    Parameters:
+        boarding : Boarding
+            Boarding to copy
+        numForks : int
+            Number of copies
+    Returns:
+        List of boardings
+"""
+def fork(boarding, numForks):
+    snapshot = BoardingSnapshot(boarding)
+    return [snapshot.restore() for fork in range(numForks)]
+
+"""
+    Function that makes a passenger still waiting to board late, moving them
+    back in the queue.
+    Parameters:
+        boarding : Boarding
+            Boarding to change
+        number : int
+            Place of the passenger in the queue
+        place : int
+            Place in the queue to move them to, the back by default
+    Returns:
+        The late passenger
+"""
+def latePassenger(boarding, number, place=None):
+    passenger = boarding.Passengers[number]
+    del boarding.Passengers[number]
+    if place is None:
+        boarding.Passengers.append(passenger)
+    else:
+        boarding.Passengers.insert(place, passenger)
+    return passenger
+
+"""
+    Function that blocks a position of an aisle, as a trolley or a passenger
+    who has stopped would. The obstacle is a passenger already in their
+    seat, so nobody can move into the position and it is never moved.
+    Parameters:
+        boarding : Boarding
+            Boarding to change
+        row : int
+            Row of the plane to block
+        aisle : int
+            Column of the aisle, the first aisle by default
+    Returns:
+        The obstacle, to be given to clearAisle()
+"""
+def blockAisle(boarding, row, aisle=None):
+    if aisle is None:
+        aisle = boarding.layout.aisleColumns[0]
+    if boarding.plane[row][aisle] != 0:
+        raise ValueError("Position [" + str(row) + "," + str(aisle) + "] is not empty")
+    obstacle = Passenger([row, aisle], 0, 0, aisle)
+    obstacle.currRow = row
+    obstacle.currColumn = aisle
+    boarding.OnBoardPassengers.append(obstacle)
+    boarding.occupancy.board(obstacle)
+    boarding.plane[row][aisle] = 1
+    boarding.numPassengers += 1
+    boarding.numSeated += 1
+    boarding.quiet = False
+    return obstacle
+
+"""
+    Function that removes an obstacle added by blockAisle(). A deadlock
+    found while the aisle was blocked is cleared, as the boarding may be
+    able to carry on.
+    Parameters:
+        boarding : Boarding
+            Boarding to change
+        obstacle : Passenger
+            Obstacle to remove
+"""
+def clearAisle(boarding, obstacle):
+    boarding.OnBoardPassengers.remove(obstacle)
+    if obstacle in boarding.activeSet:
+        boarding.active.remove(obstacle)
+        boarding.activeSet.discard(obstacle)
+    position = (obstacle.currRow, obstacle.currColumn)
+    occupants = boarding.occupancy.cells[position]
+    occupants.remove(obstacle)
+    if not occupants:
+        del boarding.occupancy.cells[position]
+        boarding.plane[obstacle.currRow][obstacle.currColumn] = 0
+    boarding.numPassengers -= 1
+    boarding.numSeated -= 1
+    boarding.quiet = False
+    boarding.deadlock = None
+
+"""
+    Function that blocks a position of an aisle for a number of time steps.
+    If nothing can move while it is blocked, the time steps left are skipped
+    as nothing would change during them.
+    Parameters:
+        boarding : Boarding
+            Boarding to change
+        row : int
+            Row of the plane to block
+        timeSteps : int
+            Number of time steps to block it for
+        aisle : int
+            Column of the aisle, the first aisle by default
+"""
+def blockAisleFor(boarding, row, timeSteps, aisle=None):
+    obstacle = blockAisle(boarding, row, aisle)
+    end = boarding.timeSteps + timeSteps
+    while boarding.timeSteps < end and not boarding.finished():
+        if not boarding.advance(end):
+            boarding.timeSteps = end
+            break
+    clearAisle(boarding, obstacle)
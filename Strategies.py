@@ -0,0 +1,223 @@
+from Layout import DEFAULT_LAYOUT
+
+#Boarding strategies that can be passed to simulation(), each with the
+#function that creates its groups of seats for a cabin layout
+STRATEGIES = {}
+
+#Cabin layouts each strategy can be used with, None for any
+strategyLayouts = {}
+
+#Groups of seats already created for each strategy and cabin layout
+groupCache = {}
+
+"""
+    Function that adds a boarding strategy, or replaces one with the same
+    name.
+    Parameters:
+        name : String
+            Name of the strategy
+        groups : Function
+            Called with a CabinLayout, returns a list of groups of seat
+            numbers. Groups board one after the other, with the passengers of
+            each group boarding in a random order.
+        layouts : List(CabinLayout)
+            Cabin layouts the strategy can be used with, None for any
+"""
+def registerStrategy(name, groups, layouts=None):
+    STRATEGIES[name] = groups
+    strategyLayouts[name] = None if layouts is None else frozenset(layouts)
+    for key in [key for key in groupCache if key[0] == name]:
+        del groupCache[key]
+
+"""
+    Function that gives every registered strategy, so the same strategies
+    can be registered in another process.
+    Returns:
+        Dictionary of the function creating the groups and the cabin layouts
+        of each strategy
+"""
+def registeredStrategies():
+    return {name: (STRATEGIES[name], strategyLayouts[name]) for name in STRATEGIES}
+
+"""
+    Function that registers strategies from registeredStrategies(), leaving
+    any that are already registered the same way.
+    Parameters:
+        strategies : {String: (Function, frozenset(CabinLayout))}
+            Function creating the groups and cabin layouts of each strategy
+"""
+def registerStrategies(strategies):
+    for name, (groups, layouts) in strategies.items():
+        if STRATEGIES.get(name) is not groups or strategyLayouts.get(name) != layouts:
+            registerStrategy(name, groups, layouts)
+
+"""
+    Function that checks if a strategy can be used with a cabin layout.
+    Parameters:
+        Type : String
+            Type of strategy
+        layout : CabinLayout
+            Cabin of the plane
+    Returns:
+        True if the strategy can be used with the layout
+"""
+def supportsLayout(Type, layout):
+    layouts = strategyLayouts.get(Type)
+    return layouts is None or layout in layouts
+
+"""
+    Function that gives the strategies that can be used with a cabin layout,
+    used instead of every strategy in STRATEGIES when a cabin is given.
+    Parameters:
+        layout : CabinLayout
+            Cabin of the plane
+    Returns:
+        List of the names of the strategies
+"""
+def strategiesFor(layout):
+    return [Type for Type in STRATEGIES if supportsLayout(Type, layout)]
+
+"""
+    Function that gets the groups of seats of a strategy. The groups are only
+    created the first time they are needed for each cabin layout, so they
+    shouldn't be changed.
+    Parameters:
+        Type : String
+            Type of strategy to use
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+    Returns:
+        Tuple of groups of seat numbers, in the order they board
+"""
+def strategyGroups(Type, layout=DEFAULT_LAYOUT):
+    key = (Type, layout)
+    groups = groupCache.get(key)
+    if groups is None:
+        if Type not in STRATEGIES:
+            raise ValueError("Invalid strategy " + str(Type))
+        if not supportsLayout(Type, layout):
+            raise ValueError("Strategy " + Type + " can't be used with " + repr(layout))
+        groups = tuple(tuple(group) for group in STRATEGIES[Type](layout))
+        groupCache[key] = groups
+    return groups
+
+"""
+    Function that creates the group for random boarding.
+    Parameters:
+        layout : CabinLayout
+            Cabin of the plane
+    Returns:
+        A single group of every seat
+"""
+def randomGroups(layout):
+    return [list(range(layout.numSeats))]
+
+"""
+    Function that creates the groups for back to front boarding.
+    Parameters:
+        layout : CabinLayout
+            Cabin of the plane
+    Returns:
+        Groups of a third of the rows each, from the back
+"""
+def backToFrontGroups(layout):
+    return [block[::-1] for block in reversed(layout.rowBlocks(3))]
+
+"""
+    Function that creates the groups for front to back boarding.
+    Parameters:
+        layout : CabinLayout
+            Cabin of the plane
+    Returns:
+        Groups of a third of the rows each, from the front
+"""
+def frontToBackGroups(layout):
+    return layout.rowBlocks(3)
+
+"""
+    Function that creates the groups for outside in boarding, also known as
+    window-middle-aisle (WilMA).
+    Parameters:
+        layout : CabinLayout
+            Cabin of the plane
+    Returns:
+        Groups of seats the same distance from the aisle, window seats first
+"""
+def outsideInGroups(layout):
+    return layout.distanceGroups()
+
+"""
+    Function that creates the groups needed for the reverse-pyramid method of boarding.
+    Parameters:
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+    Returns:
+        List of groups from outside back to inside front
+"""
+def reversePyramidGroups(layout=DEFAULT_LAYOUT):
+    #Each third of the rows is listed from the back seat forwards, the
+    #order the seats come out of the groups depends on the sets being built
+    #this way
+    thirds = backToFrontGroups(layout)
+    groups = []
+    for seats in layout.distanceGroups():
+        for third in thirds:
+            groups.append(list(set(seats) & set(third)))
+    return groups
+
+"""
+    Function that creates the groups for the Steffen method, where every
+    passenger boards in a set order. Window seats board first, one side at a
+    time, from the back in every other row so passengers next to each other
+    in the aisle can put their baggage away at the same time. The rows
+    skipped board next, then the middle and aisle seats the same way.
+    Parameters:
+        layout : CabinLayout
+            Cabin of the plane
+    Returns:
+        Groups of a single seat each
+"""
+def steffenGroups(layout):
+    groups = []
+    backRows = list(range(layout.rows - 1, -1, -1))
+    for seats in layout.distanceGroups():
+        #Columns in the same order as the distance groups
+        columns = []
+        for seat in seats:
+            column = seat % layout.seatsPerRow
+            if column not in columns:
+                columns.append(column)
+        for rows in (backRows[0::2], backRows[1::2]):
+            for column in columns:
+                for row in rows:
+                    groups.append([row * layout.seatsPerRow + column])
+    return groups
+
+"""
+    Function that creates the groups for block rotating boarding, where
+    blocks of rows board from the back and front in turn, working towards
+    the middle.
+    Parameters:
+        layout : CabinLayout
+            Cabin of the plane
+        numBlocks : int
+            Number of blocks of rows
+    Returns:
+        Groups of a block of rows each, in the order they board
+"""
+def blockRotatingGroups(layout, numBlocks=6):
+    blocks = layout.rowBlocks(min(numBlocks, layout.rows))
+    groups = []
+    while blocks:
+        groups.append(blocks.pop())
+        if blocks:
+            groups.append(blocks.pop(0))
+    return groups
+
+registerStrategy("Random", randomGroups)
+registerStrategy("Back-to-Front", backToFrontGroups)
+registerStrategy("Front-to-Back", frontToBackGroups)
+registerStrategy("Outside-In", outsideInGroups)
+registerStrategy("Reverse-Pyramid", reversePyramidGroups)
+registerStrategy("Steffen", steffenGroups)
+registerStrategy("Block-Rotating", blockRotatingGroups)
@@ -0,0 +1,363 @@
+import json
+import math
+import re
+import numpy as np
+from Layout import CabinLayout, DEFAULT_LAYOUT
+from MonteCarlo import RunningStats
+from Sweep import ResultCache, groupsVersion, sweep
+
+#Settings a surface is fitted over, in the order they are given to it
+VARIABLES = ("baggage", "percentFast", "rows")
+
+"""
+    Function that creates a cabin from the way it is stored in the cache.
+    Parameters:
+        text : String
+            repr() of the cabin
+    Returns:
+        CabinLayout
+"""
+def parseLayout(text):
+    return CabinLayout(**{name: int(value) for name, value in re.findall(r"(\w+)=(\d+)", text)})
+
+"""
+    Function that gives the settings that have a surface of their own. Only
+    the number of rows of the cabin is fitted over, so each arrangement of
+    seats has its own surfaces.
+    Parameters:
+        Type : String
+            Type of strategy
+        randomiseBaggage : Bool
+            Whether the baggage is randomised
+        layout : CabinLayout
+            Cabin of the plane
+    Returns:
+        String naming the settings
+"""
+def surfaceKey(Type, randomiseBaggage, layout):
+    return "|".join((Type, str(bool(randomiseBaggage)), str(layout.seatsPerSide),
+                     str(layout.aisles), str(layout.middleSeats), str(layout.entryRows)))
+
+"""
+    Function that gives the value of each term of a surface at a point.
+    Parameters:
+        terms : List(List(int))
+            Variables multiplied together in each term, [] for the constant
+        point : List(float)
+            Value of each variable
+    Returns:
+        List of the value of each term
+"""
+def termValues(terms, point):
+    values = []
+    for term in terms:
+        value = 1.0
+        for variable in term:
+            value *= point[variable]
+        values.append(value)
+    return values
+
+class ResponseSurface:
+    """
+    This class estimates a result, such as the mean time taken, for any
+    baggage, percentFast and number of rows from the results of the
+    configurations that were run. It is a quadratic, or linear if there are
+    too few configurations, fitted by least squares with each configuration
+    weighted by how precisely its result is known.
+    Attributes:
+        terms : List(List(int))
+            Variables multiplied together in each term of the surface
+        coefficients : List(float)
+            Coefficient of each term
+        covariance : List(List(float))
+            Covariance of the coefficients
+        low, high : List(float)
+            Lowest and highest value of each variable fitted over
+        numConfigs : int
+            Number of configurations fitted to
+    """
+
+    def __init__(self, terms, coefficients, covariance, low, high, numConfigs):
+        self.terms = terms
+        self.coefficients = coefficients
+        self.covariance = covariance
+        self.low = low
+        self.high = high
+        self.numConfigs = numConfigs
+
+    @classmethod
+    def fit(cls, points, means, errors, minError=0.5):
+        #points are the values of the variables of each configuration, and
+        #errors the standard errors of their results. Errors are raised to
+        #minError, so a result known exactly, such as the time when every
+        #passenger is fast, doesn't outweigh everything else.
+        numVariables = len(VARIABLES)
+        low = [min(point[i] for point in points) for i in range(numVariables)]
+        high = [max(point[i] for point in points) for i in range(numVariables)]
+        varying = [i for i in range(numVariables) if low[i] != high[i]]
+        terms = [[]] + [[i] for i in varying]
+        quadratic = []
+        for a in range(len(varying)):
+            for b in range(a, len(varying)):
+                i, j = varying[a], varying[b]
+                #A square needs at least 3 values to be told apart from a line
+                if i != j or len({point[i] for point in points}) >= 3:
+                    quadratic.append([i, j])
+        if len(points) >= 2 * (len(terms) + len(quadratic)):
+            terms += quadratic
+        if len(points) < len(terms):
+            return None
+
+        surface = cls(terms, None, None, low, high, len(points))
+        X = np.array([termValues(terms, surface.scale(point)) for point in points])
+        weights = 1 / np.maximum(np.array(errors), minError)
+        y = np.array(means)
+        coefficients = np.linalg.lstsq(X * weights[:, None], y * weights, rcond=None)[0]
+        #Scale by how well the surface fits, but never claim to be more
+        #precise than the means it was fitted to
+        residuals = (X @ coefficients - y) * weights
+        degrees = len(points) - len(terms)
+        scale = max(1.0, float(residuals @ residuals) / degrees) if degrees > 0 else 1.0
+        covariance = scale * np.linalg.pinv((X * weights[:, None]**2).T @ X)
+        surface.coefficients = coefficients.tolist()
+        surface.covariance = covariance.tolist()
+        return surface
+
+    def scale(self, point):
+        #Each variable from 0 at its lowest fitted value to 1 at its highest
+        return [(point[i] - self.low[i]) / (self.high[i] - self.low[i])
+                if self.high[i] != self.low[i] else 0.0 for i in range(len(point))]
+
+    def inRegion(self, point):
+        return all(self.low[i] <= point[i] <= self.high[i] for i in range(len(point)))
+
+    def estimate(self, point):
+        #Result and its standard error at a point
+        values = termValues(self.terms, self.scale(point))
+        mean = sum(c * v for c, v in zip(self.coefficients, values))
+        variance = sum(values[i] * sum(row[j] * values[j] for j in range(len(values)))
+                       for i, row in enumerate(self.covariance))
+        return mean, math.sqrt(max(variance, 0.0))
+
+    def toDict(self):
+        return {"terms": self.terms, "coefficients": self.coefficients,
+                "covariance": self.covariance, "low": self.low, "high": self.high,
+                "numConfigs": self.numConfigs}
+
+class SurrogateModel:
+    """
+    This class answers queries for the mean time taken by a configuration
+    from response surfaces fitted to the results stored by sweep(), without
+    running any simulations. Trials that deadlocked or were stopped have no
+    time, so the fraction of them is fitted by a surface of its own and
+    given with each estimate. Configurations where more than maxStopped of
+    the trials didn't finish aren't used for the mean, as it would only
+    come from the trials that happened to finish. Queries outside the
+    settings the surfaces were fitted over, or where too many trials are
+    expected not to finish, are flagged so they can be simulated instead.
+    Attributes:
+        version : String
+            Version of the engine the results were from
+        seed : int
+            Seed of the trials fitted to
+        maxTimeSteps : int
+            maxTimeSteps of the trials fitted to
+        maxStopped : float
+            Highest fraction of trials that didn't finish for a
+            configuration's mean to be used
+        surfaces : {String: ResponseSurface}
+            Surface of the mean time for each strategy, randomiseBaggage
+            and arrangement of seats, see surfaceKey()
+        stoppedSurfaces : {String: ResponseSurface}
+            Surface of the fraction of trials that didn't finish for each
+    """
+
+    def __init__(self, version, seed, maxTimeSteps, maxStopped, surfaces, stoppedSurfaces):
+        self.version = version
+        self.seed = seed
+        self.maxTimeSteps = maxTimeSteps
+        self.maxStopped = maxStopped
+        self.surfaces = surfaces
+        self.stoppedSurfaces = stoppedSurfaces
+
+    @classmethod
+    def fromCache(cls, cache="sweep.db", seed=0, maxTimeSteps=5000, minTrials=10,
+                  maxStopped=0.1):
+        #Fits surfaces to the configurations in the cache with at least
+        #minTrials trials, from the current engine version and groups of
+        #each strategy. Only trials with the given seed and maxTimeSteps are
+        #used, so no trial is counted twice.
+        opened = isinstance(cache, str)
+        if opened:
+            cache = ResultCache(cache)
+        try:
+            version = cache.version
+            rows = cache.connection.execute(
+                "SELECT strategy, groups, baggage, percentFast, randomiseBaggage, layout, timeSteps "
+                "FROM trials WHERE engine=? AND seed=? AND maxTimeSteps=?",
+                (version, str(seed), -1 if maxTimeSteps is None else maxTimeSteps)).fetchall()
+        finally:
+            if opened:
+                cache.close()
+        stats = {}
+        stopped = {}
+        currentGroups = {}
+        for Type, groups, baggage, percentFast, randomiseBaggage, layout, timeSteps in rows:
+            if (Type, layout) not in currentGroups:
+                #Strategies no longer registered have no current groups
+                try:
+                    currentGroups[(Type, layout)] = groupsVersion(Type, parseLayout(layout))
+                except ValueError:
+                    currentGroups[(Type, layout)] = None
+            if groups != currentGroups[(Type, layout)]:
+                continue
+            config = (Type, baggage, percentFast, randomiseBaggage, layout)
+            if config not in stats:
+                stats[config] = RunningStats()
+                stopped[config] = 0
+            if timeSteps == -1:
+                stopped[config] += 1
+            else:
+                stats[config].add(timeSteps)
+
+        data = {}
+        stoppedData = {}
+        for config, configStats in stats.items():
+            Type, baggage, percentFast, randomiseBaggage, layout = config
+            numTrials = configStats.count + stopped[config]
+            if numTrials < max(minTrials, 2):
+                continue
+            layout = parseLayout(layout)
+            key = surfaceKey(Type, randomiseBaggage, layout)
+            point = [baggage, percentFast, layout.rows]
+            fraction = stopped[config] / numTrials
+            points, fractions, errors = stoppedData.setdefault(key, ([], [], []))
+            points.append(point)
+            fractions.append(fraction)
+            #Binomial standard error, which is never taken as below half a
+            #trial so configurations where every trial finished aren't exact
+            errors.append(max(math.sqrt(fraction * (1 - fraction) / numTrials),
+                              0.5 / numTrials))
+            if fraction > maxStopped or configStats.count < 2:
+                continue
+            points, means, errors = data.setdefault(key, ([], [], []))
+            points.append(point)
+            means.append(configStats.mean)
+            errors.append(configStats.standardError())
+        return cls(version, seed, maxTimeSteps, maxStopped, fitSurfaces(data),
+                   fitSurfaces(stoppedData, 0))
+
+    def estimate(self, Type, baggage, percentFast, randomiseBaggage, layout=DEFAULT_LAYOUT):
+        #Mean time, its standard error, the fraction of trials expected not
+        #to finish and whether the query is inside the settings fitted over
+        #with few enough trials expected not to finish. The mean is None if
+        #nothing was fitted for the strategy, randomiseBaggage and
+        #arrangement of seats, and the fraction too if no trials were run.
+        key = surfaceKey(Type, randomiseBaggage, layout)
+        point = [baggage, percentFast, layout.rows]
+        stoppedSurface = self.stoppedSurfaces.get(key)
+        if stoppedSurface is None:
+            return None, None, None, False
+        fraction = min(max(stoppedSurface.estimate(point)[0], 0.0), 1.0)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            return None, None, fraction, False
+        mean, error = surface.estimate(point)
+        return (mean, error, fraction,
+                surface.inRegion(point) and stoppedSurface.inRegion(point)
+                and fraction <= self.maxStopped)
+
+    def save(self, path):
+        with open(path, "w") as file:
+            json.dump({"version": self.version, "seed": self.seed,
+                       "maxTimeSteps": self.maxTimeSteps, "maxStopped": self.maxStopped,
+                       "surfaces": {key: surface.toDict()
+                                    for key, surface in self.surfaces.items()},
+                       "stoppedSurfaces": {key: surface.toDict()
+                                           for key, surface in self.stoppedSurfaces.items()}},
+                      file)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as file:
+            data = json.load(file)
+        return cls(data["version"], data["seed"], data["maxTimeSteps"], data["maxStopped"],
+                   {key: ResponseSurface(**surface) for key, surface in data["surfaces"].items()},
+                   {key: ResponseSurface(**surface)
+                    for key, surface in data["stoppedSurfaces"].items()})
+
+"""
+    Function that fits a response surface to the results for each key.
+    Parameters:
+        data : {String: (List(List(float)), List(float), List(float))}
+            Points, results and standard errors of the results for each key
+        minError : float
+            Lowest standard error a result is taken to have
+    Returns:
+        Dictionary of the surface for each key with enough points
+"""
+def fitSurfaces(data, minError=0.5):
+    surfaces = {}
+    for key, (points, values, errors) in data.items():
+        surface = ResponseSurface.fit(points, values, errors, minError)
+        if surface is not None:
+            surfaces[key] = surface
+    return surfaces
+
+"""
+    Function that estimates the mean time taken by a configuration with the
+    surrogate model, simulating it instead if the model flags the query or
+    is from another engine version. Trials are run with the seed and
+    maxTimeSteps of the model. The trials simulated are stored in the cache
+    and the model is fitted again, so it covers the query next time.
+    Parameters:
+        model : SurrogateModel
+            Model to use
+        Type : String
+            Type of strategy to use
+        baggage : int
+            Amount of baggage each passenger has
+        percentFast : float
+            Percentage of passengers that move quickly
+        randomiseBaggage : Bool
+            If True randomise the amount of baggage each passenger has from
+            0 to baggage
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+        cache : ResultCache or String
+            Cache the model was fitted from, or the path of its database
+        numTrials : int
+            Number of trials simulated
+        workers : int
+            Number of processes to run the trials across
+    Returns:
+        The mean time of the trials that finished, its standard error, the
+        fraction of trials that deadlocked or were stopped, the model to use
+        from now on and whether the answer was simulated
+"""
+def estimateOrSimulate(model, Type, baggage, percentFast, randomiseBaggage,
+                       layout=DEFAULT_LAYOUT, cache="sweep.db", numTrials=100, workers=None):
+    opened = isinstance(cache, str)
+    if opened:
+        cache = ResultCache(cache)
+    try:
+        if model.version == cache.version:
+            mean, error, fraction, inRegion = model.estimate(Type, baggage, percentFast,
+                                                             randomiseBaggage, layout)
+            if inRegion:
+                return mean, error, fraction, model, False
+        config = (Type, baggage, percentFast, randomiseBaggage)
+        times = sweep([config], numTrials, cache, model.seed, workers, model.maxTimeSteps,
+                      layout)[config]
+        model = SurrogateModel.fromCache(cache, model.seed, model.maxTimeSteps,
+                                         maxStopped=model.maxStopped)
+    finally:
+        if opened:
+            cache.close()
+    stats = RunningStats()
+    for timeSteps in times:
+        if timeSteps != -1:
+            stats.add(timeSteps)
+    return (stats.mean if stats.count else None,
+            stats.standardError() if stats.count >= 2 else None,
+            (len(times) - stats.count) / len(times), model, True)
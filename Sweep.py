@@ -0,0 +1,204 @@
+import hashlib
+import inspect
+import itertools
+import sqlite3
+import Project
+import Layout
+import Parallel
+import Strategies
+from Layout import DEFAULT_LAYOUT
+from Parallel import parallelTimes
+
+#Code that decides the result of a trial. Results are stored along with a
+#hash of it, so changing any of it means trials are run again.
+ENGINE_SOURCES = [
+    Project.assignSeats,
+    Project.generateWalkingSpeeds,
+    Project.generateBaggage,
+    Project.move,
+    Project.moveWaitingPassenger,
+    Project.moveMovingPassenger,
+    Project.moveNormalPassenger,
+    Project.flagRow,
+    Project.passengerSeatCheck,
+    Project.passengerCheck,
+    Project.checkPassengerMove,
+    Project.flagPassengers,
+    Project.enter,
+    Project.Passenger,
+    Project.Occupancy,
+    Project.Boarding,
+    Project.simulation,
+    Project.referenceSimulation,
+    Project.DeadlockError,
+    Project.passengerStates,
+    Project.blockingPassengers,
+    Project.findDeadlock,
+    Parallel.trialRandom,
+    Parallel.runTrial,
+    Parallel.trialResult,
+    Parallel.parallelTimes,
+    Parallel.parallelResults,
+    Layout,
+    Strategies,
+]
+
+"""
+    Function that creates the version of the simulation engine from the code
+    that decides the results of trials.
+    Returns:
+        Hash of the engine code
+"""
+def engineVersion():
+    digest = hashlib.sha256()
+    for source in ENGINE_SOURCES:
+        digest.update(inspect.getsource(source).encode())
+    return digest.hexdigest()[:16]
+
+"""
+    Function that creates the version of the groups a strategy boards in, so
+    trials of a strategy registered again with other groups aren't reused.
+    Parameters:
+        Type : String
+            Type of strategy
+        layout : CabinLayout
+            Cabin of the plane
+    Returns:
+        Hash of the groups of the strategy
+"""
+def groupsVersion(Type, layout=DEFAULT_LAYOUT):
+    return hashlib.sha256(repr(Strategies.strategyGroups(Type, layout)).encode()).hexdigest()[:16]
+
+"""
+    Function that creates every combination of the given settings.
+    Parameters:
+        Types : List(String)
+            Types of strategy
+        baggages : List(int)
+            Amounts of baggage
+        percentFasts : List(float)
+            Percentages of passengers that move quickly
+        randomiseBaggages : List(Bool)
+            Whether to randomise the baggage
+    Returns:
+        List of configurations (Type, baggage, percentFast, randomiseBaggage)
+"""
+def sweepGrid(Types, baggages, percentFasts, randomiseBaggages=(True,)):
+    return list(itertools.product(Types, baggages, percentFasts, randomiseBaggages))
+
+class ResultCache:
+    """
+    This class stores the time taken by each trial in an SQLite database,
+    keyed by the configuration, groups of the strategy, cabin, engine version,
+    seed and trial number.
+    Attributes:
+        connection : Connection
+            Connection to the database
+        version : String
+            Version of the engine results are stored and looked up for
+    """
+
+    def __init__(self, path="sweep.db", version=None):
+        self.connection = sqlite3.connect(path)
+        self.version = engineVersion() if version is None else version
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(trials)")]
+        if columns and "groups" not in columns:
+            #Trials stored before the groups were, which can't be matched
+            self.connection.execute("DROP TABLE trials")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS trials ("
+            "engine TEXT, strategy TEXT, groups TEXT, baggage INTEGER, percentFast REAL, "
+            "randomiseBaggage INTEGER, layout TEXT, maxTimeSteps INTEGER, seed TEXT, "
+            "trial INTEGER, timeSteps INTEGER, "
+            "PRIMARY KEY (engine, strategy, groups, baggage, percentFast, randomiseBaggage, "
+            "layout, maxTimeSteps, seed, trial))")
+        self.connection.commit()
+
+    def key(self, config, layout, maxTimeSteps, seed):
+        Type, baggage, percentFast, randomiseBaggage = config
+        #maxTimeSteps of None is stored as -1 as NULL can't be matched
+        return (self.version, Type, groupsVersion(Type, layout), baggage, percentFast, int(randomiseBaggage), repr(layout),
+                -1 if maxTimeSteps is None else maxTimeSteps, str(seed))
+
+    def get(self, config, layout, maxTimeSteps, seed):
+        #Dictionary of the time taken by each stored trial
+        rows = self.connection.execute(
+            "SELECT trial, timeSteps FROM trials WHERE engine=? AND strategy=? AND groups=? "
+            "AND baggage=? AND percentFast=? AND randomiseBaggage=? AND layout=? "
+            "AND maxTimeSteps=? AND seed=?",
+            self.key(config, layout, maxTimeSteps, seed))
+        return dict(rows)
+
+    def put(self, config, layout, maxTimeSteps, seed, results):
+        key = self.key(config, layout, maxTimeSteps, seed)
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO trials VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [key + (trial, timeSteps) for trial, timeSteps in results.items()])
+        self.connection.commit()
+
+    def clearStale(self):
+        #Deletes results of other engine versions, returns how many
+        deleted = self.connection.execute("DELETE FROM trials WHERE engine != ?",
+                                          (self.version,)).rowcount
+        self.connection.commit()
+        return deleted
+
+    def close(self):
+        self.connection.close()
+
+"""
+    Function that runs trials of many configurations, reusing any trials
+    already stored in the cache and storing the ones it runs. Trials are
+    stored in chunks as they finish, so a sweep that is stopped part way
+    carries on from the last chunk when run again.
+    Parameters:
+        configs : List((String, int, float, Bool))
+            Configurations (Type, baggage, percentFast, randomiseBaggage)
+        numTrials : int
+            Number of trials of each configuration
+        cache : ResultCache or String
+            Cache to use, or the path of its database
+        seed : int
+            Seed the random number generators of the trials are created from
+        workers : int
+            Number of processes to run the trials across
+        maxTimeSteps : int
+            If given, stop trials after this many time steps
+        layout : CabinLayout
+            Cabin of the plane, a Boeing 737 by default
+        chunkSize : int
+            Number of trials run between each save to the cache
+    Returns:
+        Dictionary of the list of times of each configuration, -1 for trials
+        that were stopped after maxTimeSteps
+"""
+def sweep(configs, numTrials, cache="sweep.db", seed=0, workers=None, maxTimeSteps=None,
+          layout=DEFAULT_LAYOUT, chunkSize=200):
+    opened = isinstance(cache, str)
+    if opened:
+        cache = ResultCache(cache)
+    try:
+        results = {}
+        computed = 0
+        for config in configs:
+            config = tuple(config)
+            Type, baggage, percentFast, randomiseBaggage = config
+            times = cache.get(config, layout, maxTimeSteps, seed)
+            missing = [trial for trial in range(numTrials) if trial not in times]
+            for start in range(0, len(missing), chunkSize):
+                chunk = missing[start:start + chunkSize]
+                chunkTimes = parallelTimes(Type, chunk, baggage, percentFast, randomiseBaggage,
+                                           seed, workers, maxTimeSteps=maxTimeSteps,
+                                           layout=layout)
+                chunkResults = dict(zip(chunk, chunkTimes))
+                cache.put(config, layout, maxTimeSteps, seed, chunkResults)
+                times.update(chunkResults)
+            computed += len(missing)
+            results[config] = [times[trial] for trial in range(numTrials)]
+    finally:
+        #A cache passed in is left open for the caller
+        if opened:
+            cache.close()
+    print("Ran " + str(computed) + " trials, reused "
+          + str(len(configs) * numTrials - computed) + " from the cache")
+    return results
@@ -0,0 +1,322 @@
+import mmap
+import struct
+from bisect import bisect_right
+from Layout import CabinLayout
+
+#File layout:
+#  header: magic, version, the settings of the cabin (rows, seatsPerSide,
+#          aisles, middleSeats, entryRows), numPassengers, then the seat
+#          row, seat column and aisle of each passenger in boarding order
+#  records: one for each time step where anything happened, see record(),
+#           with a keyframe after every KEYFRAME_INTERVAL records
+#  index: time step and file offset of each record
+#  keyframes: number of the record and file offset of each keyframe
+#  footer: offset of the index, number of records, offset of the keyframes,
+#          number of keyframes, time steps run, whether boarding finished
+#          and an end marker
+HEADER = struct.Struct("<4sBHHHHHH")
+PASSENGER = struct.Struct("<HHH")
+POSITION = struct.Struct("<hh")
+INDEX = struct.Struct("<IQ")
+KEYFRAME = struct.Struct("<IQ")
+FOOTER = struct.Struct("<QIQIIB4s")
+MAGIC = b"BTRC"
+END = b"BTRE"
+VERSION = 3
+
+#Number of records between each keyframe, which stores the position of
+#every passenger so positions can be found without replaying from the start
+KEYFRAME_INTERVAL = 256
+
+#Change in row and column of each direction a passenger can step in
+DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+"""
+    Function that adds an unsigned integer to a buffer using as few bytes as
+    possible, 7 bits per byte.
+    Parameters:
+        buffer : bytearray
+            Buffer to add to
+        value : int
+            Integer to add
+"""
+def writeVarint(buffer, value):
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+"""
+    Function that reads an unsigned integer written by writeVarint().
+    Parameters:
+        data : bytes
+            Data to read from
+        offset : int
+            Position of the integer
+    Returns:
+        The integer and the position after it
+"""
+def readVarint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+class TraceWriter:
+    """
+    This class records everything that happens during a boarding to a binary
+    file. It is given to a Boarding as its recorder, which calls record()
+    after every time step it runs. Only changes are stored: for each time
+    step, how many time steps since the last record, whether a passenger
+    boarded, the direction each passenger that moved stepped in, and the
+    passengers whose waiting or move flags changed. Passengers are numbered
+    in the order they board. Only the passengers that were active in the
+    time step are checked for changed flags, as nobody else can change, so
+    recording costs about the same as the time step.
+    Attributes:
+        file : File
+            File being written
+        offset : int
+            Position in the file of the next record
+        index : List((int, int))
+            Time step and position of each record
+        lastTimeStep : int
+            Time step of the last record
+        waiting, moving : List(Bool)
+            Flags of each passenger at the last record
+        previous : List(Passenger)
+            Active passengers after the last time step recorded
+        keyframes : List((int, int))
+            Number of the record before and position of each keyframe
+    """
+
+    def __init__(self, path, boarding):
+        self.file = open(path, "wb")
+        Passengers = list(boarding.OnBoardPassengers) + list(boarding.Passengers)
+        layout = boarding.layout
+        header = bytearray(HEADER.pack(MAGIC, VERSION, *layout.key(), len(Passengers)))
+        for passenger in Passengers:
+            header += PASSENGER.pack(passenger.row, passenger.column, passenger.aisle)
+        self.file.write(header)
+        self.offset = len(header)
+        self.index = []
+        self.lastTimeStep = boarding.timeSteps
+        self.waiting = [False] * len(Passengers)
+        self.moving = [False] * len(Passengers)
+        self.previous = list(boarding.active)
+        self.keyframes = []
+
+    def record(self, boarding, entered):
+        #Called with the moves of the time step before they are applied
+        order = boarding.occupancy.order
+        moves = bytearray()
+        numMoves = 0
+        for passenger, oldRow, oldColumn in boarding.occupancy.moves:
+            direction = DIRECTIONS.index((passenger.currRow - oldRow,
+                                          passenger.currColumn - oldColumn))
+            writeVarint(moves, order[passenger] << 2 | direction)
+            numMoves += 1
+        flags = bytearray()
+        numFlags = 0
+        waiting = self.waiting
+        moving = self.moving
+        #Passengers who acted this time step were active before it, or have
+        #just boarded or been flagged to move and so are active now
+        numbers = {order[passenger] for passenger in self.previous}
+        numbers.update(order[passenger] for passenger in boarding.active)
+        self.previous = list(boarding.active)
+        OnBoardPassengers = boarding.OnBoardPassengers
+        for number in sorted(numbers):
+            passenger = OnBoardPassengers[number]
+            if passenger.waiting != waiting[number] or passenger.move != moving[number]:
+                waiting[number] = passenger.waiting
+                moving[number] = passenger.move
+                writeVarint(flags, number << 2 | passenger.waiting << 1 | passenger.move)
+                numFlags += 1
+        if not entered and not numMoves and not numFlags:
+            return
+        record = bytearray()
+        writeVarint(record, boarding.timeSteps - self.lastTimeStep)
+        record.append(int(entered))
+        writeVarint(record, numMoves)
+        record += moves
+        writeVarint(record, numFlags)
+        record += flags
+        self.index.append((boarding.timeSteps, self.offset))
+        self.file.write(record)
+        self.offset += len(record)
+        self.lastTimeStep = boarding.timeSteps
+        if len(self.index) % KEYFRAME_INTERVAL == 0:
+            self.keyframe(boarding)
+
+    def keyframe(self, boarding):
+        #Positions of the on board passengers after the last record. Moves
+        #are made before record() is called, only the plane is updated after.
+        data = bytearray()
+        writeVarint(data, len(boarding.OnBoardPassengers))
+        for passenger in boarding.OnBoardPassengers:
+            data += POSITION.pack(passenger.currRow, passenger.currColumn)
+        self.keyframes.append((len(self.index) - 1, self.offset))
+        self.file.write(data)
+        self.offset += len(data)
+
+    def close(self, boarding):
+        indexOffset = self.offset
+        for entry in self.index:
+            self.file.write(INDEX.pack(*entry))
+        keyframeOffset = indexOffset + len(self.index) * INDEX.size
+        for entry in self.keyframes:
+            self.file.write(KEYFRAME.pack(*entry))
+        self.file.write(FOOTER.pack(indexOffset, len(self.index), keyframeOffset,
+                                    len(self.keyframes), boarding.timeSteps,
+                                    int(boarding.finished()), END))
+        self.file.close()
+
+class TraceReader:
+    """
+    This class reads a trace written by TraceWriter. The file is memory
+    mapped, so records are only read when they are used and any record can
+    be found from its time step without reading the ones before it. The
+    positions at a time step are replayed from the keyframe before it.
+    Attributes:
+        data : mmap
+            Contents of the file
+        layout : CabinLayout
+            Cabin of the plane
+        numRows, numColumns : int
+            Size of the plane
+        seats : List((int, int))
+            Seat of each passenger in boarding order
+        aisles : List(int)
+            Aisle column each passenger boards through
+        numRecords : int
+            Number of records
+        timeSteps : int
+            Time steps the boarding ran for
+        finished : Bool
+            True if every passenger was seated
+        indexOffset : int
+            Position of the index in the file
+        recordTimeSteps : List(int)
+            Time step of each record
+        keyframeRecords : List(int)
+            Number of the record before each keyframe
+        keyframeOffsets : List(int)
+            Position of each keyframe in the file
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, *settings, numPassengers = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a boarding trace of version " + str(VERSION))
+        rows, seatsPerSide, aisles, middleSeats, entryRows = settings
+        self.layout = CabinLayout(rows, seatsPerSide, aisles, middleSeats, entryRows)
+        self.numRows = self.layout.numRows
+        self.numColumns = self.layout.numColumns
+        self.seats = []
+        self.aisles = []
+        for number in range(numPassengers):
+            row, column, aisle = PASSENGER.unpack_from(self.data, HEADER.size + number * PASSENGER.size)
+            self.seats.append((row, column))
+            self.aisles.append(aisle)
+        (self.indexOffset, self.numRecords, keyframeOffset, numKeyframes, self.timeSteps,
+         finished, end) = FOOTER.unpack_from(self.data, len(self.data) - FOOTER.size)
+        if end != END:
+            raise ValueError("Trace was not closed")
+        self.finished = bool(finished)
+        self.recordTimeSteps = [INDEX.unpack_from(self.data, self.indexOffset + i * INDEX.size)[0]
+                                for i in range(self.numRecords)]
+        keyframes = [KEYFRAME.unpack_from(self.data, keyframeOffset + i * KEYFRAME.size)
+                     for i in range(numKeyframes)]
+        self.keyframeRecords = [number for number, offset in keyframes]
+        self.keyframeOffsets = [offset for number, offset in keyframes]
+
+    def __len__(self):
+        return self.numRecords
+
+    def close(self):
+        self.data.close()
+
+    def record(self, number):
+        #Time step, whether a passenger boarded, the moves as (passenger,
+        #direction) and the flags as (passenger, waiting, move) of a record
+        timeStep, offset = INDEX.unpack_from(self.data, self.indexOffset + number * INDEX.size)
+        data = self.data
+        delta, offset = readVarint(data, offset)
+        entered = bool(data[offset])
+        offset += 1
+        numMoves, offset = readVarint(data, offset)
+        moves = []
+        for x in range(numMoves):
+            value, offset = readVarint(data, offset)
+            moves.append((value >> 2, value & 3))
+        numFlags, offset = readVarint(data, offset)
+        flags = []
+        for x in range(numFlags):
+            value, offset = readVarint(data, offset)
+            flags.append((value >> 2, bool(value & 2), bool(value & 1)))
+        return timeStep, entered, moves, flags
+
+    def records(self, start=0):
+        for number in range(start, self.numRecords):
+            yield self.record(number)
+
+    def recordAt(self, timeStep):
+        #Number of the last record at or before timeStep, -1 if none
+        return bisect_right(self.recordTimeSteps, timeStep) - 1
+
+    def keyframe(self, number):
+        #Position of every passenger and number of passengers boarded at a
+        #keyframe
+        offset = self.keyframeOffsets[number]
+        boarded, offset = readVarint(self.data, offset)
+        positions = [[-1, -1] for seat in self.seats]
+        for passenger in range(boarded):
+            positions[passenger] = list(POSITION.unpack_from(self.data,
+                                                             offset + passenger * POSITION.size))
+        return positions, boarded
+
+    def applyRecord(self, positions, boarded, entered, moves):
+        #Changes positions to after a record, returns the number boarded
+        if entered:
+            positions[boarded] = [0, self.aisles[boarded]]
+            boarded += 1
+        for passenger, direction in moves:
+            dRow, dColumn = DIRECTIONS[direction]
+            positions[passenger][0] += dRow
+            positions[passenger][1] += dColumn
+        return boarded
+
+    def replay(self):
+        #Yields the time step and the position of every passenger, [-1, -1]
+        #if not on board, after each record. The positions are changed in
+        #place so should be copied to be kept.
+        positions = [[-1, -1] for seat in self.seats]
+        boarded = 0
+        for timeStep, entered, moves, flags in self.records():
+            boarded = self.applyRecord(positions, boarded, entered, moves)
+            yield timeStep, positions
+
+    def positionsAt(self, timeStep):
+        #Positions of every passenger at the end of a time step, replayed
+        #from the last keyframe before it
+        last = self.recordAt(timeStep)
+        keyframe = bisect_right(self.keyframeRecords, last) - 1
+        if keyframe >= 0:
+            positions, boarded = self.keyframe(keyframe)
+            start = self.keyframeRecords[keyframe] + 1
+        else:
+            positions = [[-1, -1] for seat in self.seats]
+            boarded = 0
+            start = 0
+        for number in range(start, last + 1):
+            timeStep, entered, moves, flags = self.record(number)
+            boarded = self.applyRecord(positions, boarded, entered, moves)
+        return positions
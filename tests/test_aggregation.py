@@ -0,0 +1,51 @@
+import random
+import statistics
+import pytest
+from MonteCarlo import RunningStats
+from Aggregation import QuantileSketch, Histogram, TimeAggregate
+
+def test_running_stats_merge_matches_one_pass():
+    rng = random.Random(0)
+    values = [rng.gauss(700, 50) for x in range(1000)]
+    whole = RunningStats()
+    for value in values:
+        whole.add(value)
+    parts = [RunningStats() for x in range(3)]
+    for number, value in enumerate(values):
+        parts[number % 3].add(value)
+    merged = RunningStats()
+    for part in parts:
+        merged.merge(part)
+    assert merged.count == whole.count
+    assert merged.mean == pytest.approx(statistics.mean(values))
+    assert merged.variance() == pytest.approx(whole.variance())
+    assert merged.variance() == pytest.approx(statistics.variance(values))
+
+def test_quantile_sketch_merge_is_within_relative_error():
+    rng = random.Random(1)
+    values = [rng.randint(300, 3000) for x in range(5000)]
+    sketches = [QuantileSketch(0.01) for x in range(3)]
+    for number, value in enumerate(values):
+        sketches[number % 3].add(value)
+    merged = QuantileSketch(0.01)
+    for sketch in sketches:
+        merged.merge(sketch)
+    ordered = sorted(values)
+    for q in (0.5, 0.9, 0.99):
+        exact = ordered[int(q * (len(values) - 1))]
+        assert abs(merged.quantile(q) - exact) <= 0.01 * exact + 1
+    with pytest.raises(ValueError):
+        merged.merge(QuantileSketch(0.05))
+
+def test_time_aggregate_merge():
+    first, second = TimeAggregate(), TimeAggregate()
+    for value in (500, 600, -1):
+        first.add(value)
+    second.add(-1, True)
+    second.add(700)
+    first.merge(second)
+    summary = first.summary()
+    assert (summary["finished"], summary["stopped"], summary["deadlocked"]) == (3, 2, 1)
+    assert (summary["min"], summary["max"], summary["mean"]) == (500, 700, 600)
+    with pytest.raises(ValueError):
+        Histogram(0, 3000, 60).merge(Histogram(0, 3000, 30))
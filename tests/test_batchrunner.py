@@ -0,0 +1,35 @@
+import json
+import pytest
+from BatchRunner import loadJob, runJob, DEFAULT_JOB
+from Strategies import STRATEGIES
+
+def writeSpec(tmp_path, text, extension):
+    path = tmp_path / ("job" + extension)
+    path.write_text(text)
+    return str(path)
+
+def test_defaults_filled_in(tmp_path):
+    job = loadJob(writeSpec(tmp_path, json.dumps({"trials": 3}), ".json"))
+    assert job["trials"] == 3 and job["layouts"] == DEFAULT_JOB["layouts"]
+    assert job["strategies"] == list(STRATEGIES)
+
+def test_toml_spec(tmp_path):
+    job = loadJob(writeSpec(tmp_path, 'strategies = ["Steffen"]\nbaggage = [0, 2]\n'
+                            'layouts = ["A321"]\nrecords = "summaries"\n', ".toml"))
+    assert (job["strategies"], job["baggage"], job["layouts"]) == (["Steffen"], [0, 2], ["A321"])
+
+@pytest.mark.parametrize("spec", [{"trails": 3}, {"strategies": ["Nope"]}, {"layouts": ["747"]},
+                                  {"records": "everything"}])
+def test_invalid_specs_rejected(tmp_path, spec):
+    with pytest.raises(ValueError):
+        loadJob(writeSpec(tmp_path, json.dumps(spec), ".json"))
+
+def test_run_job_writes_trials_and_summary(tmp_path):
+    job = loadJob(writeSpec(tmp_path, json.dumps({"strategies": ["Random"], "trials": 3,
+                                                  "chunkSize": 2, "workers": 1}), ".json"))
+    records = []
+    runJob(job, records.append)
+    assert [record["type"] for record in records].count("trial") == 3
+    summary = records[-1]
+    assert summary["type"] == "summary" and summary["trials"] == 3
+    assert summary["finished"] + summary["stopped"] == 3
@@ -0,0 +1,25 @@
+from Benchmark import (benchmarkCase, benchmarkKey, compareBenchmarks, saveBenchmarks,
+                       loadBenchmarkFile, environmentDifferences, benchmarkEnvironment)
+from Layout import DEFAULT_LAYOUT
+
+def test_fixed_baggage_is_benchmarked_separately():
+    fixed = benchmarkCase("Random", 1, 2, 1, False, DEFAULT_LAYOUT, "incremental", 0, 3000)
+    randomised = benchmarkCase("Random", 1, 2, 1, True, DEFAULT_LAYOUT, "incremental", 0, 3000)
+    assert fixed["randomiseBaggage"] is False and randomised["randomiseBaggage"] is True
+    assert benchmarkKey(fixed) != benchmarkKey(randomised)
+
+def test_baseline_environment_is_checked(tmp_path, capsys):
+    result = benchmarkCase("Random", 1, 0, 1, True, DEFAULT_LAYOUT, "incremental", 0, 3000)
+    path = str(tmp_path / "baseline.json")
+    saveBenchmarks([result], path)
+    environment, baseline = loadBenchmarkFile(path)
+    assert environment == benchmarkEnvironment() and not environmentDifferences(environment)
+    compareBenchmarks([result], baseline, environment=dict(environment, python="0.0"))
+    assert "different python" in capsys.readouterr().out
+
+def test_ticks_per_second_regression_is_found():
+    result = benchmarkCase("Random", 1, 0, 1, True, DEFAULT_LAYOUT, "incremental", 0, 3000)
+    assert result["boardingsPerSecond"] > 0
+    faster = dict(result, ticksPerSecond=result["ticksPerSecond"] * 2)
+    assert compareBenchmarks([result], [faster]) == [benchmarkKey(result)]
+    assert compareBenchmarks([result], [result]) == []
@@ -0,0 +1,18 @@
+import pytest
+from Equivalence import CANDIDATES, checkEquivalence
+from Layout import CabinLayout, DEFAULT_LAYOUT
+
+#A short two aisle cabin keeps the reference engine quick
+LAYOUTS = [DEFAULT_LAYOUT, CabinLayout(rows=10, aisles=2, middleSeats=3)]
+
+@pytest.mark.parametrize("layout", LAYOUTS, ids=repr)
+def test_engines_match_reference(layout):
+    candidates = sorted(CANDIDATES)
+    try:
+        import numpy
+    except ImportError:
+        candidates.remove("batch")
+    mismatches = checkEquivalence(candidates, ["Random", "Steffen", "Back-to-Front"], (3,),
+                                  (0.5,), (True, False), numTrials=1, maxTimeSteps=3000,
+                                  layouts=[layout])
+    assert all(mismatches[name] == [] for name in candidates)
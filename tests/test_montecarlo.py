@@ -0,0 +1,9 @@
+from MonteCarlo import compareStrategiesAdaptive
+
+def test_compare_adaptive_counts_stopped_trials():
+    #No trial can finish boarding in 10 time steps
+    stats, stopped = compareStrategiesAdaptive(["Random", "Back-to-Front"], 0, 1, True,
+                                               batchSize=2, maxTrials=2, workers=1,
+                                               maxTimeSteps=10)
+    assert stopped == {"Random": 2, "Back-to-Front": 2}
+    assert all(stats[Type].count == 0 for Type in stats)
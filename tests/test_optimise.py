@@ -0,0 +1,50 @@
+import multiprocessing
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from Layout import LAYOUTS
+from Optimise import optimiseBoarding
+from Strategies import (STRATEGIES, strategyLayouts, groupCache, strategiesFor, strategyGroups,
+                        registeredStrategies, registerStrategies)
+from BatchRunner import runJob, DEFAULT_JOB
+
+SETTINGS = {"numGroups": 3, "populationSize": 4, "generations": 2, "numTrials": 1,
+            "workers": 1, "maxTimeSteps": 3000, "name": "Test-Optimised"}
+
+@pytest.fixture
+def optimisedStrategies():
+    #Strategies registered by a test are removed afterwards
+    before = set(STRATEGIES)
+    yield
+    for name in set(STRATEGIES) - before:
+        del STRATEGIES[name]
+        del strategyLayouts[name]
+        for key in [key for key in groupCache if key[0] == name]:
+            del groupCache[key]
+
+def test_optimise_twice_on_different_layouts(optimisedStrategies):
+    first, _ = optimiseBoarding(0, 1, True, layout=LAYOUTS["737"], **SETTINGS)
+    second, _ = optimiseBoarding(0, 1, True, layout=LAYOUTS["A321"], **SETTINGS)
+    assert "Test-Optimised-737" in STRATEGIES and "Test-Optimised-A321" in STRATEGIES
+    assert strategyGroups("Test-Optimised-737", LAYOUTS["737"]) == first
+    assert strategyGroups("Test-Optimised-A321", LAYOUTS["A321"]) == second
+    assert "Test-Optimised-737" not in strategiesFor(LAYOUTS["A321"])
+    assert "Test-Optimised-A321" not in strategiesFor(LAYOUTS["737"])
+    with pytest.raises(ValueError):
+        strategyGroups("Test-Optimised-737", LAYOUTS["A321"])
+
+def test_jobs_skip_strategies_for_other_layouts(optimisedStrategies):
+    optimiseBoarding(0, 1, True, layout=LAYOUTS["737"], **SETTINGS)
+    job = dict(DEFAULT_JOB, strategies=list(STRATEGIES), layouts=["A321"], trials=1, workers=1,
+               maxTimeSteps=3000, records="summaries")
+    records = []
+    runJob(job, records.append)
+    assert {record["strategy"] for record in records} == set(strategiesFor(LAYOUTS["A321"]))
+
+def test_spawned_workers_have_optimised_strategies(optimisedStrategies):
+    best, _ = optimiseBoarding(0, 1, True, layout=LAYOUTS["737"], **SETTINGS)
+    #Spawned processes don't inherit strategies registered while running
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=registerStrategies,
+                             initargs=(registeredStrategies(),)) as executor:
+        groups = executor.submit(strategyGroups, "Test-Optimised-737", LAYOUTS["737"]).result()
+    assert groups == best
@@ -0,0 +1,36 @@
+import pytest
+from Project import simulation, DeadlockError
+from Layout import LAYOUTS
+from Strategies import STRATEGIES, strategyLayouts, registerStrategy, randomGroups
+from Parallel import trialRandom, trialResult, runTrial, parallelResults, simulationTestParallel
+
+#Back-to-Front with baggage often deadlocks
+SETTINGS = ("Back-to-Front", 1, 0.5, True)
+
+def test_deadlocked_trials_are_counted_not_logged(capsys):
+    results = [trialResult(*SETTINGS, 0, trial, 3000) for trial in range(6)]
+    assert any(deadlocked for time, deadlocked in results)
+    for trial, (time, deadlocked) in enumerate(results):
+        assert runTrial(*SETTINGS, 0, trial, 3000) == time
+        if deadlocked:
+            assert time == -1
+            with pytest.raises(DeadlockError):
+                simulation(*SETTINGS, rng=trialRandom(0, trial), maxTimeSteps=3000)
+    assert parallelResults(*SETTINGS[:1], range(6), *SETTINGS[1:], workers=1,
+                           maxTimeSteps=3000) == results
+    assert capsys.readouterr().out == ""
+
+def test_deadlocks_summarised_once(capsys):
+    simulationTestParallel(*SETTINGS[:1], 6, *SETTINGS[1:], workers=1, maxTimeSteps=3000)
+    out = capsys.readouterr().out
+    assert out.count("deadlocked") == 1
+
+def test_unsupported_layout_is_rejected(capsys):
+    registerStrategy("Test-737-Only", randomGroups, [LAYOUTS["737"]])
+    try:
+        assert simulationTestParallel("Test-737-Only", 2, 0, 1, True, workers=1,
+                                      layout=LAYOUTS["A350"]) is None
+        assert "can't be used with" in capsys.readouterr().out
+    finally:
+        del STRATEGIES["Test-737-Only"]
+        del strategyLayouts["Test-737-Only"]
@@ -0,0 +1,31 @@
+import random
+import pytest
+from Project import Boarding, assignSeats
+from Snapshot import BoardingSnapshot, fork
+
+def outcome(boarding):
+    boarding.run(5000)
+    return (boarding.timeSteps, boarding.finished(), boarding.deadlock is None,
+            [(passenger.currRow, passenger.currColumn) for passenger in boarding.OnBoardPassengers])
+
+@pytest.mark.parametrize("Type", ["Random", "Steffen", "Back-to-Front"])
+@pytest.mark.parametrize("seed", range(3))
+def test_forks_continue_like_the_original(Type, seed):
+    Passengers = assignSeats(Type, 3, 0.5, True, random.Random(seed))
+    expected = outcome(Boarding(Passengers))
+
+    Passengers = assignSeats(Type, 3, 0.5, True, random.Random(seed))
+    boarding = Boarding(Passengers)
+    boarding.run(150)
+    forks = fork(boarding, 3)
+    assert all(outcome(other) == expected for other in forks)
+    assert outcome(boarding) == expected
+
+def test_snapshot_restores_random_state():
+    rng = random.Random(0)
+    boarding = Boarding(assignSeats("Random", 0, 1, True, rng))
+    boarding.run(50)
+    snapshot = BoardingSnapshot(boarding, rng)
+    first = [rng.random() for x in range(3)]
+    snapshot.restore(rng)
+    assert [rng.random() for x in range(3)] == first
@@ -0,0 +1,51 @@
+from Layout import DEFAULT_LAYOUT
+from Sweep import ResultCache
+from Surrogate import SurrogateModel
+
+def fillCache(path, seed=0, maxTimeSteps=5000, offset=0):
+    #Made up times that grow with baggage and percentFast, with every fourth
+    #trial stopped for Back-to-Front
+    cache = ResultCache(path)
+    for Type in ("Steffen", "Back-to-Front"):
+        for baggage in (0, 2, 4):
+            for percentFast in (0.2, 0.6, 1.0):
+                times = {trial: 500 + offset + 20 * baggage + 100 * percentFast + trial % 3
+                         for trial in range(12)}
+                if Type == "Back-to-Front":
+                    times.update({trial: -1 for trial in range(0, 12, 4)})
+                cache.put((Type, baggage, percentFast, True), DEFAULT_LAYOUT, maxTimeSteps, seed,
+                          times)
+    cache.close()
+
+def test_surrogate_reports_stopped_trials(tmp_path):
+    path = str(tmp_path / "sweep.db")
+    fillCache(path)
+    model = SurrogateModel.fromCache(path, maxStopped=0.5)
+    mean, error, fraction, inRegion = model.estimate("Steffen", 2, 0.6, True)
+    assert abs(mean - 601) < 1 and error > 0 and fraction == 0 and inRegion
+    mean, error, fraction, inRegion = model.estimate("Back-to-Front", 2, 0.6, True)
+    assert abs(fraction - 0.25) < 1e-6 and inRegion
+    #Too many trials didn't finish to trust the mean
+    strict = SurrogateModel.fromCache(path, maxStopped=0.1)
+    assert strict.estimate("Back-to-Front", 2, 0.6, True)[3] is False
+    #Outside the settings fitted over
+    assert model.estimate("Steffen", 6, 0.6, True)[3] is False
+
+def test_surrogate_only_uses_one_seed_and_max_time_steps(tmp_path):
+    path = str(tmp_path / "sweep.db")
+    fillCache(path)
+    fillCache(path, seed=1, offset=1000)
+    fillCache(path, maxTimeSteps=3000, offset=2000)
+    mean = SurrogateModel.fromCache(path).estimate("Steffen", 2, 0.6, True)[0]
+    assert abs(mean - 601) < 1
+
+def test_surrogate_save_load(tmp_path):
+    path = str(tmp_path / "sweep.db")
+    fillCache(path)
+    model = SurrogateModel.fromCache(path, maxStopped=0.5)
+    model.save(str(tmp_path / "model.json"))
+    loaded = SurrogateModel.load(str(tmp_path / "model.json"))
+    assert (loaded.version, loaded.seed, loaded.maxTimeSteps, loaded.maxStopped) == \
+        (model.version, model.seed, model.maxTimeSteps, model.maxStopped)
+    for Type in ("Steffen", "Back-to-Front"):
+        assert loaded.estimate(Type, 3, 0.5, True) == model.estimate(Type, 3, 0.5, True)
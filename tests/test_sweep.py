@@ -0,0 +1,53 @@
+import Project
+import Strategies
+import Sweep
+from Layout import DEFAULT_LAYOUT
+from Sweep import ResultCache, engineVersion, sweep
+
+CONFIG = ("Random", 0, 1, True)
+
+def test_engine_version_covers_simulation_and_seeding():
+    for source in (Project.simulation, Project.findDeadlock, Sweep.Parallel.runTrial,
+                   Sweep.Parallel.trialRandom):
+        assert source in Sweep.ENGINE_SOURCES
+
+def test_engine_change_invalidates_cache(tmp_path, monkeypatch):
+    path = str(tmp_path / "sweep.db")
+    cache = ResultCache(path)
+    cache.put(CONFIG, DEFAULT_LAYOUT, 3000, 0, {0: 123, 1: 456})
+    assert cache.get(CONFIG, DEFAULT_LAYOUT, 3000, 0) == {0: 123, 1: 456}
+    cache.close()
+
+    #Any change to the engine code changes the version
+    monkeypatch.setattr(Sweep, "ENGINE_SOURCES", Sweep.ENGINE_SOURCES + [test_sweep_reuses_cache])
+    assert engineVersion() != cache.version
+    changed = ResultCache(path, version=engineVersion())
+    assert changed.get(CONFIG, DEFAULT_LAYOUT, 3000, 0) == {}
+    assert changed.clearStale() == 2
+    changed.close()
+
+def test_sweep_reuses_cache(tmp_path):
+    path = str(tmp_path / "sweep.db")
+    cache = ResultCache(path)
+    #Times no simulation would give, so they can only have come from the cache
+    cache.put(CONFIG, DEFAULT_LAYOUT, 3000, 0, {0: 1, 1: 2})
+    cache.close()
+    assert sweep([CONFIG], 2, path, workers=1, maxTimeSteps=3000)[CONFIG] == [1, 2]
+
+def test_new_groups_invalidate_cache(tmp_path):
+    path = str(tmp_path / "sweep.db")
+    cache = ResultCache(path)
+    config = ("Regrouped", 0, 1, True)
+    try:
+        Strategies.registerStrategy("Regrouped", Strategies.randomGroups)
+        cache.put(config, DEFAULT_LAYOUT, 3000, 0, {0: 1, 1: 2})
+        assert cache.get(config, DEFAULT_LAYOUT, 3000, 0) == {0: 1, 1: 2}
+        #The same name boarding in other groups can't reuse the trials
+        Strategies.registerStrategy("Regrouped", Strategies.backToFrontGroups)
+        assert cache.get(config, DEFAULT_LAYOUT, 3000, 0) == {}
+    finally:
+        del Strategies.STRATEGIES["Regrouped"]
+        del Strategies.strategyLayouts["Regrouped"]
+        for key in [key for key in Strategies.groupCache if key[0] == "Regrouped"]:
+            del Strategies.groupCache[key]
+        cache.close()
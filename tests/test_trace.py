@@ -0,0 +1,59 @@
+import random
+import pytest
+import Trace
+from Project import simulation, assignSeats, DeadlockError
+from Equivalence import boardingEngine, copyQueue
+from Layout import CabinLayout, DEFAULT_LAYOUT
+from Trace import TraceReader
+
+@pytest.mark.parametrize("seed", range(3))
+def test_trace_round_trip(tmp_path, monkeypatch, seed):
+    #Small keyframe interval so positions are found from keyframes too
+    monkeypatch.setattr(Trace, "KEYFRAME_INTERVAL", 16)
+    path = str(tmp_path / "boarding.trc")
+    try:
+        timeSteps = simulation("Steffen", 3, 0.5, True, rng=random.Random(seed), trace=path)
+    except DeadlockError:
+        timeSteps = -1
+    Passengers = assignSeats("Steffen", 3, 0.5, True, random.Random(seed))
+    expected = {}
+
+    def recordPositions(number, timeStep, plane, OnBoardPassengers):
+        positions = [[passenger.currRow, passenger.currColumn] for passenger in OnBoardPassengers]
+        expected[timeStep] = positions + [[-1, -1]] * (len(Passengers) - len(positions))
+
+    assert boardingEngine([copyQueue(Passengers)], None, DEFAULT_LAYOUT,
+                          recordPositions) == [timeSteps]
+    reader = TraceReader(path)
+    assert reader.keyframeRecords
+    assert reader.finished == (timeSteps != -1)
+    assert reader.seats == [(passenger.row, passenger.column) for passenger in Passengers]
+    for timeStep, positions in expected.items():
+        assert reader.positionsAt(timeStep) == positions
+    replayed = {timeStep: [list(position) for position in positions]
+                for timeStep, positions in reader.replay()}
+    assert all(replayed[timeStep] == expected[timeStep] for timeStep in replayed)
+    reader.close()
+
+def test_trace_closed_on_error(tmp_path):
+    path = str(tmp_path / "boarding.trc")
+
+    def fail(snapshot):
+        if snapshot["timeStep"] == 50:
+            raise RuntimeError("stopped")
+
+    with pytest.raises(RuntimeError):
+        simulation("Random", 0, 1, True, rng=random.Random(0), observer=fail, trace=path)
+    reader = TraceReader(path)
+    assert not reader.finished and reader.timeSteps == 50
+    reader.close()
+
+def test_trace_stores_layout(tmp_path):
+    #A cabin that isn't in LAYOUTS can still be played back
+    layout = CabinLayout(rows=11, seatsPerSide=2, aisles=2, middleSeats=3, entryRows=1)
+    path = str(tmp_path / "boarding.trc")
+    simulation("Random", 0, 1, True, rng=random.Random(0), layout=layout, trace=path)
+    reader = TraceReader(path)
+    assert reader.layout == layout
+    assert (reader.numRows, reader.numColumns) == (layout.numRows, layout.numColumns)
+    reader.close()